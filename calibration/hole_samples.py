@@ -1,8 +1,12 @@
 from geoscad.as_units import mm
 from geoscad.utilities import grounded_cube
-from solid import scad_render_to_file, cylinder, union
+from solid import cylinder, union
 from solid.utils import forward, down
 
+from utilities.file_utilities import save_variants
+from utilities.resolution import facets
+from utilities.schema import builder
+
 # X dimensions
 PLATTER_WIDTH = 12 @ mm
 
@@ -15,7 +19,14 @@ PLATTER_HEIGHT = 2 @ mm
 HOLE_EXTENSION = 1 @ mm
 HOLE_HEIGHT = PLATTER_HEIGHT + 2 * HOLE_EXTENSION
 
+VARIANTS = {'hole_samples': dict()}
+
+
+def main():
+    save_variants(hole_samples, VARIANTS)
+
 
+@builder
 def hole_samples():
     return platter() - hole_set()
 
@@ -30,7 +41,7 @@ def hole_set():
         hole_list.append(
             down(HOLE_EXTENSION)(
                 forward(offset)(
-                    cylinder(r=radius, h=HOLE_HEIGHT, segments=16)
+                    cylinder(r=radius, h=HOLE_HEIGHT, segments=facets(radius))
                 )
             )
 
@@ -45,4 +56,4 @@ def platter():
 
 
 if __name__ == '__main__':
-    scad_render_to_file(hole_samples(), 'hole_samples.scad')
+    main()
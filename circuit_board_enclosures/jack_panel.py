@@ -3,7 +3,10 @@ from geoscad.utilities import grounded_cube
 from solid.utils import back, cylinder, rotate, right, up, forward, union, left, down
 
 from circuit_board_enclosures.keystone import add_keystones
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.patterns import rectangular_grid
+from utilities.resolution import facets
+from utilities.schema import Text, builder
 
 NARROW_WIDTH = 2.5 * inches
 WIDE_WIDTH = 3.0 * inches
@@ -16,6 +19,27 @@ JACK_OFFSET = 0.925 * inches
 PANEL_HOLE_SPACING = 0.8125 * inches
 PANEL_HOLE_DIAMETER = 5 * mm
 
+VARIANTS = {
+    'jack_panel_mount': dict(part='mount'),
+    'jack_panel_front': dict(part='front'),
+    'jack_panel_back': dict(part='back'),
+    'jack_panel_side': dict(part='side'),
+    'jack4_panel_side': dict(part='side_quadruple'),
+    'jack_panel_set': dict(part='set'),
+}
+
+
+@builder
+def jack_panel(part: Text):
+    return {
+        'mount': mount_panel,
+        'front': front_panel,
+        'back': back_panel,
+        'side': side_panel,
+        'side_quadruple': side_quadruple_panel,
+        'set': panel_set,
+    }[part]()
+
 
 def panel_set():
 
@@ -86,11 +110,10 @@ def mount_panel():
 
 def mount_hole_punch(width, length, height):
     offsets = [0, PANEL_HEIGHT / 2, WIDE_WIDTH / 2 + PANEL_THICKNESS]
-    x_spacing = [(x - 1.5) * PANEL_HOLE_SPACING for x in range(4)]
-    z_spacing = [(z - 1) * PANEL_HOLE_SPACING for z in range(3)]
     return spaced_hole_punch(
         offsets,
-        [x_spacing, z_spacing],
+        [4, 3],
+        PANEL_HOLE_SPACING,
         diameter=PANEL_HOLE_DIAMETER,
         thickness=length
 
@@ -174,13 +197,12 @@ def panel_base(width, length, thickness=PANEL_THICKNESS):
 
 
 def hole_punch(offsets, spacing, diameter, thickness):
-    spacings = [-spacing, 0, spacing]
-    return spaced_hole_punch(offsets, [spacings, spacings], diameter, thickness)
+    return spaced_hole_punch(offsets, [3, 3], spacing, diameter, thickness)
 
 
-def spaced_hole_punch(offsets, spacings, diameter, thickness):
+def spaced_hole_punch(offsets, counts, spacing, diameter, thickness):
     x_offset, y_offset, z_offset = offsets
-    x_spacings, z_spacings = spacings
+    x_count, z_count = counts
     hole = back(y_offset)(
         up(z_offset)(
             right(x_offset)(
@@ -188,26 +210,21 @@ def spaced_hole_punch(offsets, spacings, diameter, thickness):
             )
         )
     )
-    return union()([
-        up(z)(right(x)(hole))
-        for z in z_spacings
-        for x in x_spacings
-    ])
+    return rectangular_grid(
+        [x_count, 1, z_count],
+        [spacing, 0, spacing],
+        [-0.5 * (x_count - 1) * spacing, 0, -0.5 * (z_count - 1) * spacing]
+    )(hole)
 
 
 def punch_hole(diameter, thickness):
     return rotate(90, [1, 0, 0])(
-        cylinder(r=diameter / 2, h=thickness * 2, center=True, segments=16)
+        cylinder(r=diameter / 2, h=thickness * 2, center=True, segments=facets(diameter / 2))
     )
 
 
 def main():
-    save_as_scad(mount_panel(), 'jack_panel_mount.scad')
-    save_as_scad(front_panel(), 'jack_panel_front.scad')
-    save_as_scad(back_panel(), 'jack_panel_back.scad')
-    save_as_scad(side_panel(), 'jack_panel_side.scad')
-    save_as_scad(side_quadruple_panel(), 'jack4_panel_side.scad')
-    save_as_scad(panel_set(), 'jack_panel_set.scad')
+    save_variants(jack_panel, VARIANTS)
 
 
 if __name__ == '__main__':
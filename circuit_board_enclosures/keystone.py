@@ -2,7 +2,10 @@ from geoscad.as_units import mm
 from geoscad.utilities import grounded_cube
 from solid.utils import down, back, forward, up, cube, right
 
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.memoize import part_builder
+from utilities.patterns import baked
+from utilities.schema import builder
 
 KEYSTONE_THICKNESS = 1.5 * mm
 KEYSTONE_WIDTH = 15.4 * mm
@@ -16,11 +19,13 @@ KEYSTONE_REACH = KEYSTONE_DEPTH - KEYSTONE_CLASP_DEPTH
 KEYSTONE_LENGTH = KEYSTONE_OPENING + KEYSTONE_BOTTOM_SHELF_LENGTH + KEYSTONE_TOP_SHELF_LENGTH
 KEYSTONE_CLASP_LENGTH = (KEYSTONE_LENGTH - KEYSTONE_CLASP_OPENING) / 2
 
+VARIANTS = {'keystone': dict()}
+
 def main():
-    save_as_scad(keystone(), 'keystone.scad')
+    save_variants(keystone, VARIANTS)
 
 def add_keystones(face, jack_placements, height):
-    jack = keystone()
+    jack = baked()(keystone())
     keyhole = keystone_hole()
     for x, h in jack_placements:
         y = h - height / 2
@@ -36,6 +41,8 @@ def keystone_hole():
         depth
     ]))
 
+@builder
+@part_builder
 def keystone():
     return keystone_box() + \
            keystone_bottom_shelf() + \
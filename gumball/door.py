@@ -2,9 +2,13 @@ import math
 
 from geoscad.as_units import mm, Degrees
 from geoscad.utilities import grounded_cube
-from solid import scad_render_to_file, rotate, cube, mirror, union, cylinder
+from solid import rotate, cube, mirror, union, cylinder
 from solid.utils import down, forward, back, up, right, left
 
+from utilities.file_utilities import save_variants
+from utilities.resolution import facets
+from utilities.schema import builder
+
 THICKNESS = 1.94 * mm
 WIDTH = 55.56 * mm
 LENGTH = 81.2 * mm
@@ -25,6 +29,9 @@ CUT_LENGTH = 3.0 * mm
 ROD_RADIUS = 1.5 * mm
 ROD_LENGTH = WIDTH + 2 * (5.52 * mm)
 
+VARIANTS = {'gumball_door': dict()}
+
+@builder
 def gumball_door():
     return box() - spring_cut() + rod()
 
@@ -38,7 +45,7 @@ def box():
     return tilt_back(door) - floor
 
 def rod():
-    return up(ROD_RADIUS)(forward(BOTTOM_LENGTH)(left(0.5 * ROD_LENGTH)(rotate(90, [0, 1, 0])(cylinder(r=ROD_RADIUS, h=ROD_LENGTH, segments=16)))))
+    return up(ROD_RADIUS)(forward(BOTTOM_LENGTH)(left(0.5 * ROD_LENGTH)(rotate(90, [0, 1, 0])(cylinder(r=ROD_RADIUS, h=ROD_LENGTH, segments=facets(ROD_RADIUS))))))
 
 def spring_cut():
     cut = grounded_cube([CUT_WIDTH * 2, CUT_LENGTH* 2 * 2, HEIGHT * 2])
@@ -56,7 +63,7 @@ def tilt_back(target):
     return rotate(-ANGLE, [1, 0, 0])(target)
 
 def main():
-    scad_render_to_file(gumball_door(), 'gumball_door.scad')
+    save_variants(gumball_door, VARIANTS)
 
 
 if __name__ == '__main__':
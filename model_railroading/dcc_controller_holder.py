@@ -5,7 +5,8 @@ from geoscad.utilities import grounded_cube
 from solid import scad_render_to_file, cylinder, rotate, cube, mirror, multmatrix, scale
 from solid.utils import up, right, forward, left, back, union, down
 
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.schema import builder
 
 HOLDER_THICKNESS = 5.0 * mm
 
@@ -26,11 +27,14 @@ TOTAL_DEPTH = HOLDER_DEPTH + 2 * HOLDER_THICKNESS
 # Z
 HOLDER_HEIGHT = 0.2 * inches
 
+VARIANTS = {'dcc_controller_holder': dict()}
+
 
 def main():
-    save_as_scad(dcc_contoller_holder(), 'dcc_controller_holder.scad')
+    save_variants(dcc_contoller_holder, VARIANTS)
 
 
+@builder
 def dcc_contoller_holder():
     # return down(0.5 * HOLDER_HEIGHT)(cuts())
     return outer_block() - down(0.5 * HOLDER_HEIGHT)(cuts())
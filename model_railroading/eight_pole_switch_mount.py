@@ -1,8 +1,13 @@
 from geoscad.as_units import mm
 from geoscad.utilities import grounded_cube, rounded_platter
-from solid import scad_render_to_file, cylinder, union, cube, intersection
+from solid import cylinder, union, cube, intersection
 from solid.utils import forward, back, down, up, right, left
 
+from utilities.file_utilities import save_variants
+from utilities.patterns import rectangular_grid
+from utilities.resolution import facets
+from utilities.schema import builder
+
 # X dimensions
 PLATTER_WIDTH = 34 * mm
 TROUGH_WIDTH = 18 * mm
@@ -30,9 +35,14 @@ TROUGH_ELEVATION = PLATTER_HEIGHT - 0.4 * mm
 TROUGH_HEIGHT = PLATTER_HEIGHT
 HOLE_HEIGHT = SLOT_HEIGHT
 
+VARIANTS = {'eight_pole_switch_mount': dict()}
+
 
+def main():
+    save_variants(eight_pole_switch_mount, VARIANTS)
 
 
+@builder
 def eight_pole_switch_mount():
     return mount_base() - trough() - slots() - corner_holes()
 
@@ -47,21 +57,17 @@ def trough():
 def slots():
     slot = single_slot()
 
-    return left(SLOT_OFFSET_X)(
-        back(SLOT_OFFSET_Y)(
-            union()([
-                    right(ix * SLOT_SPACING_X)(forward(iy * SLOT_SPACING_Y)(slot))
-                for ix in range(SLOT_COUNT_X)
-                for iy in range(SLOT_COUNT_Y)
-                ])
-            )
-        )
+    return rectangular_grid(
+        [SLOT_COUNT_X, SLOT_COUNT_Y],
+        [SLOT_SPACING_X, SLOT_SPACING_Y],
+        [-SLOT_OFFSET_X, -SLOT_OFFSET_Y]
+    )(slot)
 
 def single_slot():
     return cube([SLOT_WIDTH, SLOT_LENGTH, SLOT_HEIGHT], center=True)
 
 def corner_holes():
-    hole = down(0.1 * mm)(cylinder(r=CORNER_HOLE_RADIUS, h=HOLE_HEIGHT, segments=16))
+    hole = down(0.1 * mm)(cylinder(r=CORNER_HOLE_RADIUS, h=HOLE_HEIGHT, segments=facets(CORNER_HOLE_RADIUS)))
     return union()([
         right(dx * CORNER_HOLE_X_OFFSET)
         (forward(dy * CORNER_HOLE_Y_OFFSET)
@@ -76,4 +82,4 @@ def corner_holes():
         ]])
 
 if __name__ == '__main__':
-    scad_render_to_file(eight_pole_switch_mount(), 'eight_pole_switch_mount.scad')
\ No newline at end of file
+    main()
\ No newline at end of file
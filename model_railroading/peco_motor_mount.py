@@ -1,9 +1,13 @@
 from geoscad.as_units import mm
 from geoscad.utilities import grounded_cube, rounded_platter
-from solid import scad_render_to_file, cylinder, union, cube, intersection
+from solid import cylinder, union, cube, intersection
 from solid.utils import forward, back, down, up, right, left
 
 from model_railroading.peco_turnout_motor import POLE_HOLE_WIDTH, POLE_HOLE_LENGTH
+from utilities.file_utilities import save_variants
+from utilities.memoize import part_builder
+from utilities.resolution import facets
+from utilities.schema import Text, builder
 
 # X dimensions
 MOUNT_X_CLEARANCE = 22 @ mm
@@ -35,6 +39,32 @@ MOUNT_DEPRESSION = 1 @ mm
 HOLE_EXTENSION = 1 @ mm
 HOLE_HEIGHT = PLATTER_HEIGHT + 2 * HOLE_EXTENSION
 
+VARIANTS = {
+    'peco_motor_mount': dict(part='whole'),
+    'short_peco_motor_mount': dict(part='short'),
+    'narrow_peco_motor_mount': dict(part='narrow'),
+    'top_peco_motor_mount': dict(part='top'),
+    'side_peco_motor_mount': dict(part='side'),
+    'ul_corner_peco_motor_mount': dict(part='ul_corner'),
+    'ur_peco_motor_mount': dict(part='ur_corner'),
+}
+
+
+def main():
+    save_variants(motor_mount, VARIANTS)
+
+
+@builder
+def motor_mount(part: Text):
+    return {
+        'whole': peco_motor_mount,
+        'short': short_peco_motor_mount,
+        'narrow': narrow_peco_motor_mount,
+        'top': top_peco_motor_mount,
+        'side': side_peco_motor_mount,
+        'ul_corner': ul_corner_peco_motor_mount,
+        'ur_corner': ur_corner_peco_motor_mount,
+    }[part]()
 
 
 def narrow_peco_motor_mount():
@@ -99,6 +129,7 @@ def top_peco_motor_mount():
 def top_clipper():
     return back(SHIFTINESS)(grounded_cube([2 * PLATTER_WIDTH, PLATTER_LENGTH, HOLE_HEIGHT]))
 
+@part_builder
 def peco_motor_mount():
     return platter() - mount_depression() - holes()
 
@@ -131,7 +162,7 @@ def corner_holes():
     return union()([
         right(dx * CORNER_HOLE_X_OFFSET)
         (forward(dy * CORNER_HOLE_Y_OFFSET)
-         (cylinder(r=CORNER_HOLE_RADIUS, h=HOLE_HEIGHT, segments=16)))
+         (cylinder(r=CORNER_HOLE_RADIUS, h=HOLE_HEIGHT, segments=facets(CORNER_HOLE_RADIUS))))
         for dx, dy in [
             (-1, -1),
             (-1, -0.6),
@@ -169,10 +200,4 @@ def y_side_slots():
 
 
 if __name__ == '__main__':
-    scad_render_to_file(peco_motor_mount(), 'peco_motor_mount.scad')
-    scad_render_to_file(short_peco_motor_mount(), 'short_peco_motor_mount.scad')
-    scad_render_to_file(narrow_peco_motor_mount(), 'narrow_peco_motor_mount.scad')
-    scad_render_to_file(top_peco_motor_mount(), 'top_peco_motor_mount.scad')
-    scad_render_to_file(side_peco_motor_mount(), 'side_peco_motor_mount.scad')
-    scad_render_to_file(ul_corner_peco_motor_mount(), 'ul_corner_peco_motor_mount.scad')
-    scad_render_to_file(ur_corner_peco_motor_mount(), 'ur_peco_motor_mount.scad')
+    main()
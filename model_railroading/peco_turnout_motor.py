@@ -1,9 +1,12 @@
 from geoscad.as_units import mm, inches
 from geoscad.utilities import grounded_cube, left_right_symmetric, replicate_along_y_axis, rounded_cube, smudge, \
     y_symmetric_union
-from solid import scad_render_to_file, cylinder, rotate, cube, scale, mirror, intersection, union
+from solid import cylinder, rotate, cube, scale, mirror, intersection, union
 from solid.utils import up, right, forward, down
 
+from utilities.file_utilities import save_variants
+from utilities.schema import Text, builder
+
 # X dimensions
 
 CLAMP_TROUGH_WIDTH = 8.75 @ mm
@@ -60,6 +63,28 @@ SOCKET_HOLE_DROP = 2 @ mm
 SOCKET_HOLE_HEIGHT = SWITCH_HOLE_ELEVATION + 0.001
 SLIDER_HOLE_HEIGHT = 3 * SLIDER_HEIGHT
 
+VARIANTS = {
+    'peco_motor_clamp_with_socket_hole': dict(part='socket_clamp'),
+    'peco_motor_clamp_with_switch_hole': dict(part='switch_clamp'),
+    'slider': dict(part='slider'),
+    'smudged_slider': dict(part='smudged_slider'),
+}
+
+
+def main():
+    save_variants(turnout_motor_part, VARIANTS)
+    print(SLIDER_WIDTH, SLIDER_HEIGHT)
+
+
+@builder
+def turnout_motor_part(part: Text):
+    return {
+        'socket_clamp': peco_motor_clamp_with_socket_hole,
+        'switch_clamp': peco_motor_clamp_with_switch_hole,
+        'slider': slider,
+        'smudged_slider': smudged_slider,
+    }[part]()
+
 def peco_motor_clamp_with_socket_hole():
     return peco_motor_clamp_with_switch_hole() - y_symmetric_union(socket_hole())
 
@@ -164,9 +189,9 @@ def slider():
     return rounded_cube(slider_shape, SLIDER_RADIUS) - slider_hole
 
 
+def smudged_slider():
+    return smudge(0.8, slider())
+
+
 if __name__ == '__main__':
-    scad_render_to_file(peco_motor_clamp_with_socket_hole(), 'peco_motor_clamp_with_socket_hole.scad')
-    scad_render_to_file(peco_motor_clamp_with_switch_hole(), 'peco_motor_clamp_with_switch_hole.scad')
-    scad_render_to_file(slider(), 'slider.scad')
-    scad_render_to_file(smudge(0.8, slider()), 'smudged_slider.scad')
-    print(SLIDER_WIDTH, SLIDER_HEIGHT)
+    main()
@@ -5,7 +5,8 @@ from geoscad.utilities import grounded_cube
 from solid import scad_render_to_file, cylinder, rotate, cube, mirror, multmatrix, scale
 from solid.utils import up, right, forward, left, back, union, down
 
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.schema import Flag, builder
 
 ho_scale_inches = AsUnits(1 / 87 * inches, 'ho"') # HO Scale model railroading uses 1:87 scaling ratio.
 
@@ -19,8 +20,14 @@ SEAT_PLANK_COUNT = 2
 LEG_ANGLE_DEGREES = 30
 SEAT_WIDTH_INCHES = 15
 
+VARIANTS = {'picnic_table': dict(add_support=True)}
+
 def main():
-    save_as_scad(picnic_table(add_support=True)(ho_scale_inches), 'picnic_table.scad')
+    save_variants(ho_picnic_table, VARIANTS)
+
+@builder
+def ho_picnic_table(add_support: Flag = False):
+    return picnic_table(add_support=add_support)(ho_scale_inches)
 
 class picnic_table:
     def __init__(
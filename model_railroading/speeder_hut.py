@@ -25,7 +25,18 @@ from solid.utils import up, right, forward, left, back
 # DOOR_BEAM_WIDTH = 6 * nscale_inches
 # DOOR_BEAM_BULGE = 2 * nscale_inches
 #
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.resolution import facets
+from utilities.schema import Flag, Text, builder
+
+VARIANTS = {
+    'speeder_hut': dict(part='hut'),
+    'speeder_hut_roof': dict(part='roof'),
+    'speeder_hut_walls': dict(part='walls'),
+    'speeder_hut_narrow': dict(part='hut', narrow=True),
+    'speeder_hut_roof_narrow': dict(part='roof', narrow=True),
+    'speeder_hut_walls_narrow': dict(part='walls', narrow=True),
+}
 
 
 class SpeederHut:
@@ -115,9 +126,8 @@ class SpeederHut:
         return self.hut_length + self.floor_margin
 
     def scad_ensemble(self):
-        save_as_scad(self.speeder_hut(), f'speeder_hut{self.suffix}.scad')
-        save_as_scad(self.printable_roof(), f'speeder_hut_roof{self.suffix}.scad')
-        save_as_scad(self.printable_walls(), f'speeder_hut_walls{self.suffix}.scad')
+        names = [f'{piece}{self.suffix}' for piece in ['speeder_hut', 'speeder_hut_roof', 'speeder_hut_walls']]
+        save_variants(speeder_hut_part, VARIANTS, names)
 
     def speeder_hut(self):
         return self.walls() + self.raised_roof()
@@ -188,7 +198,7 @@ class SpeederHut:
         return grounded_cube([self.floor_length, self.floor_width, self.floor_thickness])
 
     def posts(self):
-        post = cylinder(r=self.crown_radius, h=self.post_height, segments=16)
+        post = cylinder(r=self.crown_radius, h=self.post_height, segments=facets(self.crown_radius))
         post_pair = forward(self.wall_y_offset)(post) + back(self.wall_y_offset)(post)
         return left(self.wall_x_offset)(post_pair) + right(self.wall_x_offset)(post_pair)
 
@@ -204,7 +214,7 @@ class SpeederHut:
     def crown(self):
         return up(self.crown_radius)(
             rotate(90, [0, 1, 0])(
-                cylinder(r=self.crown_radius, h=self.roof_length, segments=16, center=True)
+                cylinder(r=self.crown_radius, h=self.roof_length, segments=facets(self.crown_radius), center=True)
             )
         )
 
@@ -235,6 +245,15 @@ def main():
     NarrowSpeederHut().scad_ensemble()
 
 
+@builder
+def speeder_hut_part(part: Text, narrow: Flag = False):
+    hut = NarrowSpeederHut() if narrow else SpeederHut()
+    return {
+        'hut': hut.speeder_hut,
+        'roof': hut.printable_roof,
+        'walls': hut.printable_walls,
+    }[part]()
+
 
 if __name__ == '__main__':
     main()
@@ -1,8 +1,11 @@
 from geoscad.as_units import inches
 from geoscad.utilities import thickened_shape, raised_shape
-from solid.utils import right, up, cube, scad_render_to_file, union, left, forward, down, rotate, back
+from solid.utils import right, up, cube, union, left, forward, down, rotate, back
 
 from pegboard.pegs import DEFAULT_PEG_SPACING, solid_peg, DEFAULT_HOLDER_MARGIN
+from utilities.file_utilities import save_variants
+from utilities.patterns import rectangular_grid
+from utilities.schema import Text, builder
 
 DEFAULT_CARD_HOLDER_HEIGHT = 3.0 @ inches
 DEFAULT_CARD_HOLDER_LENGTH = 3.25 @ inches
@@ -22,6 +25,25 @@ DEFAULT_PEN_HOLDER_THICKNESS = DEFAULT_CARD_HOLDER_THICKNESS
 DEFAULT_THIN_WIDTH = 0.8 @ inches
 DEFAULT_FAT_WIDTH = 1.8 @ inches
 
+VARIANTS = {
+    'fat_card_holder': dict(part='fat'),
+    'thin_card_holder': dict(part='thin'),
+    'pen_holder': dict(part='pen'),
+}
+
+
+def main():
+    save_variants(card_holder, VARIANTS)
+
+
+@builder
+def card_holder(part: Text):
+    return {
+        'fat': fat_card_holder,
+        'thin': thin_card_holder,
+        'pen': pen_holder,
+    }[part]()
+
 
 def fat_card_holder(width=DEFAULT_FAT_WIDTH):
     return index_card_holder(width)
@@ -83,7 +105,7 @@ def bottom_pegs(
 ):
     return grid_pegs(
         single_peg,
-        centered_grid(width=shape[0], length=shape[1], margin=margin))
+        centered_pattern(width=shape[0], length=shape[1], margin=margin))
 
 
 def side_pegs(
@@ -94,7 +116,7 @@ def side_pegs(
         rotate([90, 0, 0])(
             grid_pegs(
                 single_peg,
-                centered_grid(width=shape[0], length=shape[2], margin=margin))))
+                centered_pattern(width=shape[0], length=shape[2], margin=margin))))
     half_length = shape[1] / 2
     left_pegs = back(half_length)(peg_set)
     right_pegs = forward(half_length)(peg_set)
@@ -110,18 +132,14 @@ def back_pegs(
         rotate([0, 90, 0])(
             grid_pegs(
                 single_peg,
-                centered_grid(width=shape[2], length=shape[1], margin=margin)))))
+                centered_pattern(width=shape[2], length=shape[1], margin=margin)))))
 
 
 def grid_pegs(
         single_peg,
-        grid
+        pattern
 ):
-    return union()([
-        left(x)(
-            forward(y)(single_peg)
-        ) for (y, x) in grid
-    ])
+    return pattern(single_peg)
 
 
 def open_top_box(
@@ -170,6 +188,20 @@ def centered_grid(
     return [(y, x) for y in y_spacings for x in x_spacings]
 
 
+def centered_pattern(
+        width,
+        length,
+        spacing=DEFAULT_PEG_SPACING,
+        margin=0
+):
+    x_spacings = centered_spacing(width - 2 * margin, spacing)
+    y_spacings = centered_spacing(length - 2 * margin, spacing)
+    return rectangular_grid(
+        [len(x_spacings), len(y_spacings)],
+        [spacing, spacing],
+        [x_spacings[0], y_spacings[0]])
+
+
 def centered_spacing(
         span,
         spacing=DEFAULT_PEG_SPACING
@@ -180,6 +212,4 @@ def centered_spacing(
 
 
 if __name__ == '__main__':
-    scad_render_to_file(fat_card_holder(), 'fat_card_holder.scad')
-    scad_render_to_file(thin_card_holder(), 'thin_card_holder.scad')
-    scad_render_to_file(pen_holder(), 'pen_holder.scad')
+    main()
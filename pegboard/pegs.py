@@ -1,6 +1,11 @@
 from geoscad.as_units import inches
 from solid import cylinder, rotate, cube, union, scale
-from solid.utils import up, scad_render_to_file, left, right, forward, back
+from solid.utils import up, left, right, forward, back
+
+from utilities.file_utilities import save_variants
+from utilities.memoize import part_builder
+from utilities.resolution import facets
+from utilities.schema import Count, Text, builder
 
 DEFAULT_HOLDER_THICKNESS = 0.06 @ inches
 DEFAULT_PEG_DIAMETER = 0.25 @ inches
@@ -10,7 +15,27 @@ DEFAULT_CLEARANCE = DEFAULT_PEGBOARD_CLEARANCE + DEFAULT_CONTAINER_CLEARANCE
 DEFAULT_HOLDER_MARGIN = DEFAULT_PEG_DIAMETER
 DEFAULT_PEG_SPACING = 1.0 * inches  # Not snapped to resolution
 
+VARIANTS = {
+    'slot_peg_holder': dict(peg='slot'),
+    'linch_pin_peg_holder': dict(peg='linch_pin'),
+    'solid_peg_holder': dict(peg='solid'),
+}
+
+
+def main():
+    save_variants(peg_holder_with, VARIANTS)
+
+
+@builder
+def peg_holder_with(peg: Text, peg_count: Count = 3):
+    return peg_holder({
+        'slot': slot_peg_with_catch,
+        'linch_pin': linch_pin_peg,
+        'solid': solid_peg,
+    }[peg](), peg_count)
+
 
+@part_builder
 def solid_peg(
         diameter=DEFAULT_PEG_DIAMETER,
         thickness=DEFAULT_HOLDER_THICKNESS,
@@ -21,7 +46,7 @@ def solid_peg(
         overreach = diameter
     radius = 0.5 * diameter
     height = thickness + clearance + overreach
-    return cylinder(r=radius, h=height, segments=16)
+    return cylinder(r=radius, h=height, segments=facets(radius))
 
 
 def linch_pin_peg(
@@ -60,7 +85,7 @@ def slot_peg_with_catch(
     hole_height = clearance + overreach
     hole_displacement = slot_clearance + thickness + 0.5 * hole_height
     round_hole_bottom = back(0.5 * hole_height)(
-        cylinder(r=0.5 * slot_width, h=2 * diameter, center=True, segments=16))
+        cylinder(r=0.5 * slot_width, h=2 * diameter, center=True, segments=facets(0.5 * slot_width)))
     hole_cutout = cube([slot_width, hole_height, 2 * diameter], center=True)
     hole = up(hole_displacement)(
         rotate([90.0, 0.0, 0.0])(
@@ -97,6 +122,4 @@ def peg_holder(
 
 
 if __name__ == '__main__':
-    scad_render_to_file(peg_holder(slot_peg_with_catch()), 'slot_peg_holder.scad')
-    scad_render_to_file(peg_holder(linch_pin_peg()), 'linch_pin_peg_holder.scad')
-    scad_render_to_file(peg_holder(solid_peg()), 'solid_peg_holder.scad')
+    main()
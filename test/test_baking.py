@@ -0,0 +1,80 @@
+import sys
+
+import pytest
+from solid import cube, scad_render, sphere, translate
+from solid.utils import hole
+
+from utilities.file_utilities import save_as_scad
+from utilities.memoize import part_builder
+from utilities.patterns import baked
+
+# A stand-in for OpenSCAD that logs each render and writes the source into the "STL".
+STAND_IN = """#!{python}
+import os, sys
+if sys.argv[1] == '--version':
+    print('stand-in 1', file=sys.stderr)
+    sys.exit(0)
+with open(os.environ['STAND_IN_LOG'], 'a') as log:
+    log.write(sys.argv[3] + '\\n')
+with open(sys.argv[2], 'w') as stl:
+    stl.write('solid ' + open(sys.argv[3]).read())
+"""
+
+
+@pytest.fixture
+def renderer(tmp_path, monkeypatch):
+    stand_in = tmp_path / 'openscad'
+    stand_in.write_text(STAND_IN.format(python=sys.executable))
+    stand_in.chmod(0o755)
+    monkeypatch.setenv('OPENSCAD', str(stand_in))
+    monkeypatch.setenv('SCAD_CACHE', str(tmp_path / 'cache'))
+    monkeypatch.setenv('STAND_IN_LOG', str(tmp_path / 'renders.log'))
+    (tmp_path / 'out').mkdir()
+    return lambda: len((tmp_path / 'renders.log').read_text().splitlines())
+
+
+def test_baked_subtrees_are_imported_once(tmp_path, renderer):
+    knob = baked()(sphere(3, segments=8))
+    part = cube(10) + translate([5, 0, 0])(knob) + translate([-5, 0, 0])(knob)
+    save_as_scad(part, 'part.scad', str(tmp_path / 'out'), bake=True)
+    text = (tmp_path / 'out' / 'part.scad').read_text()
+    assert 2 == text.count('import(') and 'sphere' not in text
+    [stl] = (tmp_path / 'out' / 'baked').iterdir()
+    assert f'file = "baked/{stl.name}"' in text
+    assert 'sphere' in stl.read_text()
+    save_as_scad(part, 'other.scad', str(tmp_path / 'out'), bake=True)
+    assert 1 == renderer()
+    # A different subtree is baked afresh, and the STL is cached for other directories.
+    save_as_scad(baked()(sphere(4, segments=8)), 'bigger.scad', str(tmp_path / 'out'), bake=True)
+    (tmp_path / 'moved').mkdir()
+    save_as_scad(part, 'part.scad', str(tmp_path / 'moved'), bake=True)
+    assert 2 == renderer()
+    assert stl.read_text() == (tmp_path / 'moved' / 'baked' / stl.name).read_text()
+
+
+def test_unbaked_output_keeps_the_subtree(tmp_path, renderer):
+    save_as_scad(cube(10) + baked()(sphere(3)), 'part.scad', str(tmp_path / 'out'), bake=False)
+    assert 'sphere' in (tmp_path / 'out' / 'part.scad').read_text()
+
+
+def test_unbaked_marking_leaves_the_text_alone():
+    knob = translate([5, 0, 0])(sphere(3))
+    assert scad_render(cube(10) + knob) == scad_render(cube(10) + baked()(knob))
+
+
+def test_holes_cannot_be_baked(tmp_path, renderer):
+    with pytest.raises(ValueError):
+        save_as_scad(cube(10) + baked()(hole()(sphere(3))), 'part.scad', str(tmp_path / 'out'), bake=True)
+
+
+def test_library_modules_find_baked_files(tmp_path, renderer):
+    @part_builder
+    def knobbed(size):
+        return cube(size) + translate([size, 0, 0])(baked()(sphere(3, segments=8)))
+
+    save_as_scad(translate([0, 0, 5])(knobbed(10)), 'part.scad', str(tmp_path / 'out'), bake=True, library=True)
+    [library] = (tmp_path / 'out' / 'lib').iterdir()
+    [stl] = (tmp_path / 'out' / 'baked').iterdir()
+    # import() paths are relative to the file they appear in.
+    assert f'file = "../baked/{stl.name}"' in library.read_text()
+    assert 'import(' not in (tmp_path / 'out' / 'part.scad').read_text()
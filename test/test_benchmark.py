@@ -0,0 +1,54 @@
+from utilities.benchmark import (
+    METRICS, BenchmarkResult, benchmark_design, benchmark_settings, load_history, regressions, run_record,
+    save_history,
+)
+
+DESIGN = """
+from solid import cube, translate
+
+from utilities.file_utilities import save_as_scad
+
+if __name__ == '__main__':
+    block = cube(10)
+    save_as_scad(block + translate([20, 0, 0])(block), 'pair.scad')
+"""
+
+SETTINGS = {'deduplicate': False, 'passes': [], 'resolution': {}}
+
+
+def result(**metrics):
+    return BenchmarkResult('design', 1.0, metrics={**dict.fromkeys(METRICS, 1000), **metrics})
+
+
+def test_benchmark_design(tmp_path):
+    (tmp_path / 'design.py').write_text(DESIGN)
+    benchmark = benchmark_design('design', str(tmp_path / 'design.py'), repeat=2, settings=benchmark_settings())
+    assert benchmark.ok, benchmark.error
+    assert sorted(benchmark.metrics) == sorted(METRICS)
+    assert (benchmark.metrics['nodes'], benchmark.metrics['tree_nodes']) == (3, 4)
+    assert benchmark.metrics['output_bytes'] > 0
+    assert benchmark.metrics['peak_bytes'] > 0
+
+
+def test_history_round_trip(tmp_path):
+    filename = str(tmp_path / 'history.json')
+    assert load_history(filename) == []
+    save_history([run_record([result()], SETTINGS)], filename)
+    record, = load_history(filename)
+    assert record['results']['design']['nodes'] == 1000
+    assert record['settings'] == SETTINGS
+
+
+def test_regressions_against_the_median_of_recent_runs():
+    history = [run_record([result(build_seconds=seconds)], SETTINGS) for seconds in [9.0, 1.0, 1.1, 0.9, 1.0, 1.2]]
+    assert regressions(history, [result(build_seconds=1.2)], SETTINGS) == []
+    assert regressions(history, [result(build_seconds=1.5, nodes=1300)], SETTINGS) == [
+        'design: build_seconds 1.5, baseline 1 (+50%)',
+        'design: nodes 1300, baseline 1000 (+30%)',
+    ]
+
+
+def test_regressions_ignore_other_settings_and_noise():
+    history = [run_record([result(render_seconds=0.01)], SETTINGS)]
+    assert regressions(history, [result(render_seconds=0.04)], SETTINGS) == []
+    assert regressions(history, [result(nodes=5000)], {**SETTINGS, 'passes': ['fold']}) == []
@@ -0,0 +1,55 @@
+import os
+
+from utilities.build import build_designs, discover_designs, select_designs
+
+GOOD_DESIGN = """
+with open('good.scad', 'w') as output:
+    output.write('cube();')
+
+if __name__ == '__main__':
+    pass
+"""
+
+BAD_DESIGN = """
+if __name__ == '__main__':
+    raise ValueError('broken design')
+"""
+
+
+def make_designs(root):
+    os.makedirs(root / 'parts')
+    os.makedirs(root / 'utilities')
+    (root / 'parts' / 'good.py').write_text(GOOD_DESIGN)
+    (root / 'parts' / 'bad.py').write_text(BAD_DESIGN)
+    (root / 'parts' / 'library.py').write_text('VALUE = 1\n')
+    (root / 'utilities' / 'helper.py').write_text(BAD_DESIGN)
+
+
+def test_discover_designs(tmp_path):
+    make_designs(tmp_path)
+    assert ['parts/bad', 'parts/good'] == sorted(discover_designs(tmp_path))
+
+
+def test_discover_repository_designs():
+    designs = discover_designs()
+    assert 'woodworking/router_plate' in designs
+    assert 'utility_objects/connector block' in designs
+    assert not any(name.startswith('utilities/') for name in designs)
+
+
+def test_select_designs(tmp_path):
+    make_designs(tmp_path)
+    assert ['parts/good'] == list(select_designs(discover_designs(tmp_path), ['good']))
+
+
+def test_build_designs_isolates_failures(tmp_path):
+    make_designs(tmp_path)
+    output = tmp_path / 'output'
+    results = {
+        result.design: result
+        for result in build_designs(discover_designs(tmp_path), str(output), jobs=2, root=str(tmp_path))
+    }
+    assert results['parts/good'].ok
+    assert not results['parts/bad'].ok
+    assert 'broken design' in results['parts/bad'].error
+    assert (output / 'good.scad').exists()
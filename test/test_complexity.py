@@ -0,0 +1,55 @@
+import pytest
+from solid import cube, cylinder, difference, linear_extrude, minkowski, sphere, square, text, translate
+
+from utilities.complexity import (
+    DEFAULT_MODEL, FEATURES, MIN_SAMPLES, Complexity, PartComplexity, complexity, fit_model, fragments, predict,
+    warnings,
+)
+
+
+def test_fragments_follow_openscad():
+    assert 16 == fragments(5, 16)
+    assert 5 == fragments(1)  # $fs bound, at least five
+    assert 30 == fragments(100)  # $fa bound
+
+
+def test_complexity_of_a_plate_with_holes():
+    hole = cylinder(r=1, h=10, segments=8)
+    plate = difference()(cube([20, 20, 2]), translate([5, 5, 0])(hole), translate([15, 5, 0])(hole))
+    measures = complexity(plate)
+    assert 3 == measures.primitives
+    assert 6 + 2 * 10 == measures.facets
+    assert 2 == measures.difference_operands
+    assert 1 == measures.boolean_depth
+    assert measures.facets == measures.boolean_facets
+    assert 0 == measures.minkowski
+
+
+def test_complexity_charges_minkowski_and_text():
+    plate = linear_extrude(2)(square(10))
+    smudged = minkowski()(plate, sphere(1, segments=4))
+    measures = complexity(smudged + linear_extrude(1)(text('ab')))
+    assert 1 == measures.minkowski
+    assert 1 == measures.text
+    assert (4 + 2) * 4 * 2 == measures.minkowski_work
+    assert 2 == measures.boolean_depth
+
+
+def test_fit_recovers_a_linear_model():
+    true = {'intercept': 0.5, 'primitives': 0.01, 'boolean_facets': 0.001, 'minkowski_work': 0.0}
+    samples = []
+    for index in range(MIN_SAMPLES + 4):
+        measures = Complexity(primitives=index * 3 + 1, boolean_facets=(index % 5) * 400, minkowski_work=index % 2)
+        samples.append(dict(measures._asdict(), seconds=predict(measures, true)))
+    model = fit_model(samples)
+    for name in ['intercept'] + FEATURES:
+        assert model[name] == pytest.approx(true[name], abs=1e-6)
+
+
+def test_fit_needs_enough_samples():
+    assert DEFAULT_MODEL == fit_model([{'seconds': 1.0, 'primitives': 1}])
+
+
+def test_warnings_flag_slow_parts():
+    part = PartComplexity('part.scad', Complexity(minkowski=1), 90.0)
+    assert ['predicted 90s over the 60s limit', '1 minkowski'] == warnings(part, 60)
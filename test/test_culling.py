@@ -0,0 +1,54 @@
+from solid import cube, cylinder, rotate, scad_render, sphere, translate
+from solid.utils import hole
+
+from utilities.bounds import bounds, overlaps
+from utilities.culling import cull_booleans
+
+
+def test_primitive_and_transform_bounds():
+    box = bounds(translate([10, 0, 0])(cube([2, 4, 6], center=True)))
+    assert [9, -2, -3] == box.low
+    assert [11, 2, 3] == box.high
+    assert [-1, -1, 0] == bounds(cylinder(d=2, h=5)).low
+    turned = bounds(rotate([0, 0, 90])(cube([4, 2, 1])))
+    assert [-2, 0, 0] == [round(value, 9) for value in turned.low]
+
+
+def test_difference_bounds_are_the_base():
+    assert [1, 1, 1] == bounds(cube(1) - sphere(5)).high
+
+
+def test_touching_boxes_do_not_overlap():
+    assert not overlaps(bounds(cube(1)), bounds(translate([1, 0, 0])(cube(1))))
+    assert overlaps(bounds(cube(1)), bounds(translate([0.5, 0, 0])(cube(1))))
+
+
+def test_missed_cuts_are_dropped():
+    culled = cull_booleans(cube(10) - translate([20, 0, 0])(cube(1)) - translate([5, 5, 5])(sphere(1)))
+    assert ['cube', 'translate'] == [child.name for child in culled.children]
+
+
+def test_difference_with_no_useful_cuts_is_its_base():
+    assert 'cube' == cull_booleans(cube(10) - translate([20, 0, 0])(cube(1))).name
+
+
+def test_oversized_cutter_is_shrunk():
+    culled = cull_booleans(cube(10) - translate([5, -500, -500])(cube(1000)))
+    cutter = bounds(culled.children[1])
+    assert cutter.low[0] == 5
+    assert cutter.high[1] < 11 and cutter.low[1] > -1
+
+
+def test_containing_intersection_operand_is_dropped():
+    culled = cull_booleans(sphere(5) * cube(100, center=True))
+    assert 'sphere' == culled.name
+
+
+def test_disjoint_intersection_is_empty():
+    culled = cull_booleans(cube(1) * translate([5, 0, 0])(cube(1)))
+    assert 'union' == culled.name and not culled.children
+
+
+def test_holes_are_kept():
+    thing = cube(10) - hole()(translate([20, 0, 0])(cube(1)))
+    assert scad_render(thing) == scad_render(cull_booleans(thing))
@@ -0,0 +1,46 @@
+import os
+import threading
+
+from utilities.disk_cache import DiskCache, size, write_atomically
+
+
+def test_entries_are_stored_and_fetched(tmp_path):
+    cache = DiskCache(str(tmp_path / 'cache'))
+    assert cache.get('abc') is None
+    assert not cache.fetch('abc', str(tmp_path / 'out.stl'), '.stl')
+    source = tmp_path / 'part.stl'
+    source.write_text('solid part')
+    cache.put_file('abc', str(source), '.stl')
+    assert cache.fetch('abc', str(tmp_path / 'out.stl'), '.stl')
+    assert 'solid part' == (tmp_path / 'out.stl').read_text()
+    assert cache.get('abc') is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path / 'cache'), limit=250)
+    for age, key in enumerate(['aa', 'bb', 'cc']):
+        os.utime(cache.put(key, 'x' * 100), (age, age))
+    # Two of the three fit, so putting the third already evicted the oldest.
+    assert cache.get('aa') is None
+    os.utime(cache.path('cc'), (0, 0))
+    cache.get('bb')
+    cache.put('dd', 'x' * 100)
+    assert [None, 'bb', 'dd'] == [cache.get(key) and key for key in ['cc', 'bb', 'dd']]
+    assert 200 == sum(length for _, length, _ in cache.scan()[0])
+
+
+def test_concurrent_writers_leave_whole_files(tmp_path):
+    path = str(tmp_path / 'part.scad')
+    contents = [str(index) * 100000 for index in range(8)]
+    threads = [threading.Thread(target=write_atomically, args=(path, content)) for content in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (tmp_path / 'part.scad').read_text() in contents
+    assert ['part.scad'] == os.listdir(tmp_path)
+
+
+def test_sizes():
+    assert 1536 == size('1.5k')
+    assert 2 * 2 ** 30 == size('2GB')
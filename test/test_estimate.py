@@ -0,0 +1,63 @@
+import math
+
+import numpy as np
+import pytest
+from solid import cube, cylinder, scale, sphere, translate
+
+from utilities.estimate import estimate_design, estimate_volume, sampled_volume
+
+DESIGN = """
+from solid import cube, minkowski, scad_render_to_file, translate
+
+from utilities.file_utilities import save_as_scad
+
+if __name__ == '__main__':
+    save_as_scad(cube(10), 'block.scad')
+    scad_render_to_file(cube(10) + translate([5, 0, 0])(cube(10)), 'pair.scad')
+    save_as_scad(minkowski()(cube(1), cube(1)), 'smudged.scad')
+"""
+
+
+def test_disjoint_operands_are_exact():
+    thing = scale(2)(cube(1) + translate([3, 0, 0])(cylinder(r=1, h=1)))
+    volume = estimate_volume(thing)
+    assert volume.error == 0
+    assert volume.value == pytest.approx(8 * (1 + math.pi))
+
+
+def test_analytic_and_sampled_volumes_agree():
+    # Both measure round solids as true circles, whatever their facet count.
+    thing = cylinder(r1=2, r2=1, h=3, segments=4)
+    sampled = sampled_volume(thing, 400000, np.random.default_rng(0))
+    assert estimate_volume(thing) == (pytest.approx(7 * math.pi), 0)
+    assert abs(sampled.value - 7 * math.pi) < 2 * sampled.error
+
+
+def test_missed_cuts_keep_the_base_volume():
+    assert estimate_volume(cube(10) - translate([20, 0, 0])(sphere(2))) == (1000, 0)
+
+
+def test_overlaps_are_sampled_within_the_stated_error():
+    thing = cube(10) - translate([5, 5, -1])(cylinder(r=2, h=12))
+    volume = estimate_volume(thing)
+    assert 0 < volume.error < 10
+    assert abs(volume.value - (1000 - math.pi * 40)) < 2 * volume.error
+
+
+def test_sampling_error_shrinks_with_more_samples():
+    thing = sphere(5)
+    rng = np.random.default_rng(0)
+    assert sampled_volume(thing, 400000, rng).error < sampled_volume(thing, 10000, rng).error / 4
+
+
+def test_unsupported_parts_are_reported(tmp_path):
+    (tmp_path / 'design.py').write_text(DESIGN)
+    result = estimate_design('design', str(tmp_path / 'design.py'))
+    assert result.ok, result.error
+    block, pair, smudged = result.parts
+    assert ('block.scad', 1000) == (block.output, block.volume)
+    assert block.mass == pytest.approx(1.24)
+    assert (15, 10, 10) == pair.size
+    assert pair.volume == pytest.approx(1500, abs=3 * pair.error + 1e-9)
+    assert 'minkowski' in smudged.problem
+    assert not list(tmp_path.glob('*.scad'))
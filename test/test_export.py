@@ -0,0 +1,95 @@
+import os
+import sys
+
+from utilities.disk_cache import DiskCache
+from utilities.export import Renderer, export_stls
+
+# A stand-in for OpenSCAD: copies the .scad text into the "STL", logs every render,
+# and sleeps or fails when the source asks it to.
+STAND_IN = """#!{python}
+import os, sys, time
+if sys.argv[1] == '--version':
+    print('stand-in ' + os.environ.get('STAND_IN_VERSION', '1'), file=sys.stderr)
+    sys.exit(0)
+target, source = sys.argv[2], sys.argv[3]
+with open(os.environ['STAND_IN_LOG'], 'a') as log:
+    log.write(source + '\\n')
+text = open(source).read()
+if 'sleep' in text:
+    time.sleep(10)
+if 'fail' in text:
+    print('ERROR: broken', file=sys.stderr)
+    sys.exit(1)
+with open(target, 'w') as stl:
+    stl.write('solid ' + text)
+"""
+
+
+def setup(tmp_path, monkeypatch, sources):
+    stand_in = tmp_path / 'openscad'
+    stand_in.write_text(STAND_IN.format(python=sys.executable))
+    stand_in.chmod(0o755)
+    monkeypatch.setenv('STAND_IN_LOG', str(tmp_path / 'renders.log'))
+    paths = []
+    for name, text in sources.items():
+        (tmp_path / name).write_text(text)
+        paths.append(str(tmp_path / name))
+    return str(stand_in), paths
+
+
+def renders(tmp_path):
+    log = tmp_path / 'renders.log'
+    return log.read_text().splitlines() if log.exists() else []
+
+
+def test_export_caches_on_text_and_version(tmp_path, monkeypatch):
+    binary, sources = setup(tmp_path, monkeypatch, {'a.scad': 'cube(1);', 'b.scad': 'cube(2);'})
+    cache = DiskCache(str(tmp_path / 'cache'))
+    results = list(export_stls(sources, str(tmp_path / 'stl'), 2, Renderer(binary), cache))
+    assert all(result.ok and not result.cached for result in results)
+    assert 'solid cube(1);' == (tmp_path / 'stl' / 'a.stl').read_text()
+    results = list(export_stls(sources, str(tmp_path / 'stl'), 2, Renderer(binary), cache))
+    assert all(result.cached for result in results)
+    assert 2 == len(renders(tmp_path))
+    monkeypatch.setenv('STAND_IN_VERSION', '2')
+    results = list(export_stls(sources[:1], str(tmp_path / 'stl'), 2, Renderer(binary), cache))
+    assert not results[0].cached
+    assert 3 == len(renders(tmp_path))
+
+
+def test_export_cache_covers_included_files(tmp_path, monkeypatch):
+    binary, sources = setup(tmp_path, monkeypatch, {'part.scad': 'use <lib/knob.scad>\nknob();'})
+    (tmp_path / 'lib').mkdir()
+    (tmp_path / 'lib' / 'knob.scad').write_text('module knob() { import(file = "../baked/knob.stl"); }')
+    (tmp_path / 'baked').mkdir()
+    (tmp_path / 'baked' / 'knob.stl').write_text('solid knob')
+    cache = DiskCache(str(tmp_path / 'cache'))
+    for edit in [None, 'lib/knob.scad', 'baked/knob.stl', None]:
+        if edit:
+            (tmp_path / edit).write_text((tmp_path / edit).read_text() + '\n')
+        [result] = export_stls(sources, str(tmp_path / 'stl'), 1, Renderer(binary), cache)
+        assert result.ok
+    # Editing the library or the STL it imports renders again; the last run is cached.
+    assert 3 == len(renders(tmp_path)) and result.cached
+
+
+def test_failures_are_retried_and_reported(tmp_path, monkeypatch):
+    binary, sources = setup(tmp_path, monkeypatch, {'bad.scad': 'fail();', 'slow.scad': 'sleep();'})
+    renderer = Renderer(binary, timeout=0.5, retries=1)
+    results = {os.path.basename(result.source): result
+               for result in export_stls(sources, None, 2, renderer, DiskCache(str(tmp_path / 'cache')))}
+    assert 'ERROR: broken' == results['bad.scad'].error
+    assert 2 == results['bad.scad'].attempts
+    assert results['slow.scad'].error.startswith('timed out')
+    assert not (tmp_path / 'bad.stl').exists()
+    assert [] == [path for path in (tmp_path / 'cache').rglob('*') if path.is_file() and path.name != '.lock']
+
+
+def test_cancelled_renders_stop(tmp_path, monkeypatch):
+    binary, sources = setup(tmp_path, monkeypatch, {'slow.scad': 'sleep();', 'b.scad': 'cube(2);'})
+    renderer = Renderer(binary, retries=3)
+    renderer.version()
+    renderer.cancel()
+    results = list(export_stls(sources, None, 1, renderer, DiskCache(str(tmp_path / 'cache'))))
+    assert ['cancelled', 'cancelled'] == [result.error for result in results]
+    assert [] == renders(tmp_path)
@@ -0,0 +1,54 @@
+import os
+
+from solid import cube, cylinder
+from solid.utils import right, up
+
+from utilities.file_utilities import change_summary, reset_change_summary, save_as_scad
+
+
+def test_save_as_scad_skips_unchanged_output(tmp_path):
+    reset_change_summary()
+    assert save_as_scad(cube(2), 'part.scad', str(tmp_path))
+    output_file = tmp_path / 'part.scad'
+    os.utime(output_file, (0, 0))
+    assert not save_as_scad(cube(2), 'part.scad', str(tmp_path))
+    assert 0 == output_file.stat().st_mtime
+    changed, unchanged = change_summary()
+    assert [str(output_file)] == changed
+    assert [str(output_file)] == unchanged
+
+
+def test_save_as_scad_rewrites_changed_output(tmp_path):
+    save_as_scad(cube(2), 'part.scad', str(tmp_path))
+    assert save_as_scad(cylinder(r=1, h=2), 'part.scad', str(tmp_path))
+    assert 'cylinder' in (tmp_path / 'part.scad').read_text()
+
+
+def test_save_as_scad_rewrites_when_parameters_change(tmp_path):
+    save_as_scad(cube(2), 'part.scad', str(tmp_path), parameters={'size': 2})
+    assert not save_as_scad(cube(2), 'part.scad', str(tmp_path), parameters={'size': 2})
+    assert save_as_scad(cube(2), 'part.scad', str(tmp_path), parameters={'size': 3})
+
+
+def test_save_as_scad_rewrites_missing_output(tmp_path):
+    save_as_scad(cube(2), 'part.scad', str(tmp_path))
+    os.remove(tmp_path / 'part.scad')
+    assert save_as_scad(cube(2), 'part.scad', str(tmp_path))
+
+
+def test_save_as_scad_leaves_one_lock_per_directory(tmp_path):
+    save_as_scad(cube(2), 'part.scad', str(tmp_path))
+    save_as_scad(cube(3), 'other.scad', str(tmp_path))
+    assert ['.lock', 'other.scad.json', 'part.scad.json'] == sorted(os.listdir(tmp_path / '.manifest'))
+
+
+def test_save_as_scad_writes_shared_libraries(tmp_path):
+    peg = up(1)(cylinder(r=1, h=2))
+    part = right(1)(peg) + right(2)(peg)
+    save_as_scad(part, 'part.scad', str(tmp_path), library=True)
+    [library] = os.listdir(tmp_path / 'lib')
+    os.remove(tmp_path / 'lib' / library)
+    # Unchanged outputs still get their libraries back.
+    assert not save_as_scad(part, 'part.scad', str(tmp_path), library=True)
+    assert f'use <lib/{library}>' in (tmp_path / 'part.scad').read_text()
+    assert 'cylinder' in (tmp_path / 'lib' / library).read_text()
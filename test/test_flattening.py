@@ -0,0 +1,44 @@
+from solid import cube, scad_render, union
+
+from utilities.flattening import flatten_booleans
+from utilities.optimize import optimize
+
+
+def sizes(node):
+    return [child.params['size'] for child in node.children]
+
+
+def test_union_chain_becomes_one_union():
+    flattened = flatten_booleans(cube(1) + cube(2) + cube(3) + cube(4))
+    assert 'union' == flattened.name
+    assert [1, 2, 3, 4] == sizes(flattened)
+
+
+def test_intersection_chain_becomes_one_intersection():
+    flattened = flatten_booleans(cube(1) * cube(2) * cube(3))
+    assert [1, 2, 3] == sizes(flattened)
+
+
+def test_difference_chain_becomes_one_difference():
+    flattened = flatten_booleans(cube(1) - cube(2) - cube(3) - (cube(4) + cube(5)))
+    assert 'difference' == flattened.name
+    assert [1, 2, 3, 4, 5] == sizes(flattened)
+
+
+def test_union_as_difference_base_is_kept():
+    flattened = flatten_booleans((cube(1) + cube(2)) - cube(3))
+    assert ['union', 'cube'] == [child.name for child in flattened.children]
+
+
+def test_modified_nodes_are_not_spliced():
+    marked = (cube(1) + cube(2)).set_modifier('#')
+    flattened = flatten_booleans(union()(marked, cube(3)))
+    assert 2 == len(flattened.children)
+
+
+def test_deep_chain_renders_without_recursion_limit():
+    thing = cube(1)
+    for size in range(2, 1200):
+        thing = thing + cube(size)
+    rendered = scad_render(optimize(thing, 'flatten'))
+    assert 1 == rendered.count('union')
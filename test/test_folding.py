@@ -0,0 +1,45 @@
+import pytest
+from solid import cube, cylinder, rotate, scad_render
+from solid.utils import back, down, forward, right, up
+
+from utilities.folding import fold_transforms
+from utilities.matrices import euler_rotation, multiply, node_matrix, transform_point
+from utilities.optimize import optimize
+
+
+def test_translation_chain_folds_to_one_translate():
+    folded = fold_transforms(back(1)(up(2)(right(3)(cube(1)))))
+    assert 'translate' == folded.name
+    assert [3, -1, 2] == pytest.approx(folded.params['v'])
+    assert 'cube' == folded.children[0].name
+
+
+def test_identity_rotation_is_removed():
+    folded = fold_transforms(rotate(0, [0, 0, 1])(rotate(90, [1, 0, 0])(cube(2))))
+    assert 'rotate' == folded.name
+    assert 90 == folded.params['a']
+
+
+def test_mixed_chain_folds_to_multmatrix():
+    thing = up(1)(rotate(90, [1, 0, 0])(cube(2)))
+    folded = fold_transforms(thing)
+    assert 'multmatrix' == folded.name
+    expected = multiply(node_matrix(thing), node_matrix(thing.children[0]))
+    assert transform_point(expected, [1, 2, 3]) == pytest.approx(transform_point(folded.params['m'], [1, 2, 3]))
+
+
+def test_transform_with_several_children_ends_the_chain():
+    folded = fold_transforms(down(1)(forward(2)(cube(1), cylinder(r=1, h=1))))
+    assert 'translate' == folded.name
+    assert 2 == len(folded.children)
+
+
+def test_euler_rotation_matches_openscad_order():
+    assert [0, 0, 1] == pytest.approx(transform_point(euler_rotation([90, 0, 90]), [0, 1, 0]))
+
+
+def test_fold_pass_by_name():
+    thing = down(1)(forward(2)(cube(1)))
+    assert 1 == scad_render(optimize(thing, 'fold')).count('translate')
+    with pytest.raises(ValueError):
+        optimize(thing, 'no_such_pass')
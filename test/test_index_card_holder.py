@@ -1,6 +1,6 @@
 import pytest
 
-from pegboard.index_card_holder import centered_spacing, centered_grid
+from pegboard.index_card_holder import centered_spacing, centered_grid, centered_pattern
 
 
 def test_centered_spacing():
@@ -24,3 +24,13 @@ def test_centered_grid_with_margin():
         (0.5, -1.0), (0.5, 0.0), (0.5, 1.0),
     ]
     assert expected == result
+
+
+def test_centered_pattern():
+    pattern = centered_pattern(3.25, 2.2, 1.0, 0.5)
+    expected = [
+        [-1.0, -0.5, 0], [-1.0, 0.5, 0],
+        [0.0, -0.5, 0], [0.0, 0.5, 0],
+        [1.0, -0.5, 0], [1.0, 0.5, 0],
+    ]
+    assert [pytest.approx(offset) for offset in expected] == pattern.offsets()
@@ -0,0 +1,43 @@
+import pytest
+from solid import cube, cylinder, minkowski, sphere, translate
+
+from utilities.bounds import Box
+from utilities.interference import candidate_pairs, check_interference, violations
+
+
+def test_candidate_pairs_use_the_margin():
+    boxes = [Box([0, 0, 0], [1, 1, 1]), Box([1.5, 0, 0], [2, 1, 1]), Box([10, 0, 0], [11, 1, 1]), None]
+    assert candidate_pairs(boxes, margin=1) == [(0, 1), (0, 3), (1, 3), (2, 3)]
+    assert candidate_pairs(boxes[:3], margin=0.1) == []
+
+
+def test_overlap_volume():
+    finding, = check_interference({'block': cube(10), 'post': translate([8, 8, -5])(cube([4, 4, 20]))})
+    assert finding.clearance == 0
+    assert abs(finding.overlap - 40) <= finding.error
+    assert violations([finding]) == ['block / post: overlap %.2f ± %.2f mm3' % finding[2:4]]
+
+
+def test_clearance_between_separate_parts():
+    parts = {'ball': translate([0, 0, 10])(sphere(5)), 'peg': cylinder(r=2, h=4.7), 'far': translate([50, 0, 0])(cube(1))}
+    finding, = check_interference(parts)
+    assert (finding.first, finding.second, finding.overlap) == ('ball', 'peg', 0)
+    assert finding.clearance == pytest.approx(0.3, abs=0.01)
+    assert violations([finding], minimum_clearance=0.2) == []
+    assert violations([finding], minimum_clearance=0.5) == ['ball / peg: clearance 0.300 mm, needs 0.500']
+
+
+def test_expected_overlaps():
+    parts = {'block': cube(10), 'tab': translate([9, 0, 0])(cube(10)), 'lid': translate([0, 0, 20])(cube(10))}
+    findings = check_interference(parts)
+    assert violations(findings, expected={('tab', 'block'): 100}) == []
+    assert violations(findings, expected={('block', 'tab'): 200, ('block', 'lid'): 5}) == [
+        'block / tab: overlap 100.00 ± 0.00 mm3, expected 200.00',
+        'block / lid: no overlap, expected 5.00',
+    ]
+
+
+def test_unsupported_parts_are_reported():
+    finding, = check_interference({'block': cube(1), 'smudge': minkowski()(cube(1), sphere(1))})
+    assert 'minkowski' in finding.problem
+    assert violations([finding]) == [f'block / smudge: not checked, {finding.problem}']
@@ -0,0 +1,96 @@
+from geoscad.as_units import inches, mm
+from solid import cube, cylinder, scad_render
+from solid.utils import hole, right
+
+from pegboard.pegs import solid_peg
+from utilities.memoize import cache_statistics, part_builder
+
+
+def test_equal_arguments_share_one_subtree():
+    calls = []
+
+    @part_builder
+    def peg(diameter, height=10):
+        calls.append(diameter)
+        return cylinder(d=diameter, h=height)
+
+    peg(1 @ inches)
+    peg(25.4 @ mm, height=10.0)
+    peg(2)
+    peg(3)
+    assert [1 @ inches, 2, 3] == calls
+    info = peg.cache_info()
+    assert (1, 3, 3) == (info.hits, info.misses, info.currsize)
+
+
+def test_least_recently_used_entry_is_evicted():
+    calls = []
+
+    @part_builder(maxsize=2)
+    def block(size):
+        calls.append(size)
+        return cylinder(r=size, h=size)
+
+    block(1)
+    block(2)
+    block(1)
+    block(3)
+    block(1)
+    block(2)
+    assert [1, 2, 3, 2] == calls
+    info = block.cache_info()
+    assert (2, 4, 2) == (info.hits, info.misses, info.currsize)
+
+
+def test_unhashable_arguments_bypass_the_cache():
+    @part_builder
+    def holder(options):
+        return cylinder(r=1, h=1)
+
+    holder({'a': [1]})
+    holder({'a': [1]})
+    holder({1, 2})
+    holder({1, 2})
+    assert (1, 1) == holder.cache_info()[:2]
+
+
+def test_flags_and_numbers_get_separate_entries():
+    @part_builder
+    def post(rounded):
+        return cylinder(r=1, h=rounded + 1)
+
+    post(True)
+    post(1)
+    post(1.0)
+    assert (1, 2) == post.cache_info()[:2]
+
+
+def test_design_builders_are_registered():
+    solid_peg()
+    assert any(name.endswith('pegs.solid_peg') for name in cache_statistics())
+
+
+def test_results_are_named_after_their_builder():
+    @part_builder
+    def block():
+        return cube(4) - cylinder(r=1, h=5)
+
+    # The difference's operands outlive it once something is subtracted from it.
+    part = block() - cube(1)
+    assert ['block', 'block', None] == [getattr(child, 'part_name', None) for child in part.children]
+
+
+def test_callers_cannot_change_the_cached_part():
+    @part_builder
+    def plate():
+        return cube(4) + hole()(cylinder(r=1, h=5, segments=8))
+
+    expected = scad_render(plate.__wrapped__())
+    first = plate()
+    right(10)(first)
+    first.set_modifier('#')
+    scad_render(first)
+    # A fresh root, with holes cut at it, over the same children.
+    second = plate()
+    assert second is not first and second.children == first.children
+    assert expected == scad_render(second)
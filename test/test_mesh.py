@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from solid import cube, cylinder, mirror, rotate, sphere, text, translate
+from solid.utils import hole
+
+from utilities.file_utilities import change_summary, reset_change_summary, save_as_scad
+from utilities.mesh import mesh, save_as_stl, supported
+from utilities.primitives import UnsupportedGeometry
+
+
+def volume(triangles):
+    return np.einsum('ij,ij->i', triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])).sum() / 6
+
+
+def test_box_booleans_are_exact():
+    triangles, normals = mesh(cube(10) - translate([2, 2, -1])(cube([3, 3, 12])) + translate([8, 0, 0])(cube(4)))
+    assert volume(triangles) == pytest.approx(1000 - 90 + 64 - 32)
+    assert np.all(np.abs(normals).sum(axis=1) == 1)
+
+
+def test_every_edge_is_shared_by_two_faces():
+    for thing in [cube(10) - translate([2, 2, 2])(cube(3)), cylinder(r=5, h=10) - cube(4)]:
+        triangles, _ = mesh(thing)
+        edges = {}
+        for triangle in triangles.round(9):
+            for start, end in [(0, 1), (1, 2), (2, 0)]:
+                edge = (tuple(triangle[start]), tuple(triangle[end]))
+                edges[edge] = edges.get(edge, 0) + 1
+        assert all(edges.get((end, start)) == count for (start, end), count in edges.items())
+
+
+def test_round_solids_are_faceted_like_openscad():
+    # 16 sides for r=5 by $fs, and 30 for r=49.5 by $fa, unless segments says otherwise.
+    triangles, _ = mesh(cylinder(r=5, h=10))
+    assert 16 * 2 + 2 * 14 == len(triangles)
+    assert volume(triangles) == pytest.approx(8 * 25 * np.sin(np.pi / 8) * 10)
+    assert 30 * 2 + 2 * 28 == len(mesh(cylinder(r=49.5, h=6))[0])
+    assert volume(mesh(cylinder(r=1, h=1, segments=4))[0]) == pytest.approx(2)
+    # Eight rings of 16, the outermost capped flat.
+    triangles, _ = mesh(sphere(5))
+    assert 7 * 16 * 2 + 2 * 14 == len(triangles)
+    assert 0.9 < volume(triangles) / (4 / 3 * np.pi * 125) < 1
+
+
+def test_tilted_and_mirrored_solids_are_exact():
+    triangles, normals = mesh(rotate([0, 45, 0])(cube(10, center=True)))
+    assert (12, 1000) == (len(triangles), pytest.approx(volume(triangles)))
+    triangles, normals = mesh(mirror([1, 0, 0])(cube([1, 2, 3])))
+    assert volume(triangles) == pytest.approx(6)
+    winding = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    assert np.all(np.einsum('ij,ij->i', winding, normals) > 0)
+
+
+def test_holes_are_cut_at_the_root():
+    thing = cube(10) + hole()(translate([2, 2, -1])(cube([3, 3, 12])))
+    assert volume(mesh(thing)[0]) == pytest.approx(910)
+
+
+def test_unsupported_geometry():
+    assert not supported(text('hi'))
+    with pytest.raises(UnsupportedGeometry):
+        mesh(cube(1) + text('hi'))
+    with pytest.raises(UnsupportedGeometry):
+        mesh(sphere(50), max_triangles=500)
+
+
+def test_binary_stl(tmp_path):
+    save_as_stl(cube(1), 'cube.stl', directory=tmp_path)
+    data = (tmp_path / 'cube.stl').read_bytes()
+    count = int.from_bytes(data[80:84], 'little')
+    assert 12 == count
+    assert 84 + 50 * count == len(data)
+
+
+def test_save_as_scad_writes_stl_when_asked(tmp_path, monkeypatch):
+    monkeypatch.setenv('SCAD_CACHE', str(tmp_path / 'cache'))
+    save_as_scad(cube(1), 'cube.scad', directory=tmp_path, stl=True)
+    save_as_scad(text('hi'), 'text.scad', directory=tmp_path, stl=True)
+    assert (tmp_path / 'cube.stl').exists()
+    assert not (tmp_path / 'text.stl').exists()
+    # A second copy of the same part comes from the cache rather than the mesher.
+    monkeypatch.setattr('utilities.mesh.save_as_stl', None)
+    (tmp_path / 'elsewhere').mkdir()
+    save_as_scad(cube(1), 'cube.scad', directory=tmp_path / 'elsewhere', stl=True)
+    assert (tmp_path / 'cube.stl').read_bytes() == (tmp_path / 'elsewhere' / 'cube.stl').read_bytes()
+
+
+def test_saved_stl_keeps_the_facet_count(tmp_path, monkeypatch):
+    # scad_render renames segments to $fn in the tree it is given, before the STL is meshed.
+    monkeypatch.setenv('SCAD_CACHE', str(tmp_path / 'cache'))
+    save_as_scad(cylinder(r=5, h=10, segments=64) - cube(3), 'part.scad', directory=tmp_path, stl=True)
+    data = (tmp_path / 'part.stl').read_bytes()
+    triangles, _ = mesh(cylinder(r=5, h=10, segments=64) - cube(3))
+    assert len(triangles) == int.from_bytes(data[80:84], 'little')
+
+
+def test_unchanged_output_with_unsupported_stl_counts_as_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setenv('SCAD_CACHE', str(tmp_path / 'cache'))
+    save_as_scad(text('hi'), 'text.scad', directory=tmp_path, stl=False)
+    reset_change_summary()
+    save_as_scad(text('hi'), 'text.scad', directory=tmp_path, stl=True)
+    assert ([], [str(tmp_path / 'text.scad')]) == change_summary()
+
+
+def test_unsupported_stl_is_not_retried(tmp_path, monkeypatch):
+    monkeypatch.setenv('SCAD_CACHE', str(tmp_path / 'cache'))
+    assert save_as_scad(text('hi'), 'text.scad', directory=tmp_path, stl=True)
+    monkeypatch.setattr('utilities.mesh.save_as_stl', None)
+    assert not save_as_scad(text('hi'), 'text.scad', directory=tmp_path, stl=True)
+    assert save_as_scad(text('ho'), 'text.scad', directory=tmp_path, stl=False)
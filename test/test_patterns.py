@@ -0,0 +1,34 @@
+import pytest
+from solid import cube, scad_render
+
+from utilities.patterns import expand_patterns, linear_grid, polar_array, rectangular_grid
+
+
+def test_rectangular_grid_offsets():
+    grid = rectangular_grid([2, 3], [5, 4], [-2.5, -4])
+    expected = [
+        [-2.5, -4, 0], [-2.5, 0, 0], [-2.5, 4, 0],
+        [2.5, -4, 0], [2.5, 0, 0], [2.5, 4, 0],
+    ]
+    assert expected == grid.offsets()
+
+
+def test_linear_grid_offsets():
+    assert [[1, 0, 0], [1, 2, 0], [1, 4, 0]] == linear_grid(3, [0, 2], [1, 0]).offsets()
+
+
+def test_polar_array_angles():
+    assert [10, 55, 100] == polar_array(3, 45, start_angle=10).angles()
+
+
+def test_pattern_renders_a_single_loop_around_one_child():
+    rendered = scad_render(rectangular_grid([40, 30], [1, 1])(cube(1)))
+    assert 1 == rendered.count('cube(')
+    assert 'for (ix = [0 : 39], iy = [0 : 29], iz = [0 : 0])' in rendered
+
+
+def test_expand_patterns():
+    rendered = scad_render(expand_patterns(cube(10) - polar_array(4, 90)(cube(1))))
+    assert 5 == rendered.count('cube(')
+    assert 'for' not in rendered
+    assert 4 == rendered.count('rotate(')
@@ -0,0 +1,73 @@
+import os
+
+from solid import cube, union
+from solid.solidpython import OpenSCADObject
+
+from utilities.build import build_designs, discover_designs
+from utilities.profiling import Profiler
+
+PROFILED_DESIGN = """
+from solid import cube, union
+
+
+def post(size):
+    return cube(size)
+
+
+def frame(count):
+    return union()(*[post(i + 1) for i in range(count)])
+
+
+if __name__ == '__main__':
+    frame(3)
+"""
+
+
+def rack(count):
+    if count == 0:
+        return cube(1)
+    return union()(cube(count), rack(count - 1))
+
+
+TEST_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_profiler_attributes_nodes():
+    # Rooted at test/ itself, this module counts as a design.
+    with Profiler(TEST_DIRECTORY) as profiler:
+        rack(2)
+    functions = {key.split(':')[-1]: record for key, record in profiler.functions.items()}
+    calls, seconds, self_seconds, nodes, self_nodes = functions['rack']
+    assert calls == 3
+    assert nodes == 5  # recursion is not counted twice
+    assert self_nodes == 5
+    assert seconds >= 0 and self_seconds <= seconds + 1e-9
+
+
+def test_folded_stacks_nest_callers():
+    with Profiler(TEST_DIRECTORY) as profiler:
+        rack(1)
+    stacks = [line.rsplit(' ', 1)[0].split(';') for line in profiler.folded()]
+    assert any(len(stack) == 2 and all(key.endswith(':rack') for key in stack) for stack in stacks)
+    assert all(int(line.rsplit(' ', 1)[1]) > 0 for line in profiler.folded())
+
+
+def test_profiling_restores_node_constructor():
+    original = OpenSCADObject.__init__
+    with Profiler(TEST_DIRECTORY) as profiler:
+        cube(1)
+    cube(1)
+    assert profiler.nodes == 1
+    assert OpenSCADObject.__init__ is original
+
+
+def test_build_writes_profiles(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / 'parts')
+    (tmp_path / 'parts' / 'frame.py').write_text(PROFILED_DESIGN)
+    monkeypatch.setenv('SCAD_PROFILE', str(tmp_path / 'profile'))
+    [result] = build_designs(discover_designs(tmp_path), str(tmp_path / 'output'), jobs=1, root=str(tmp_path))
+    assert result.ok
+    assert any(line.endswith('parts/frame:post') and line.split()[0] == '3' for line in result.profile)
+    folded = (tmp_path / 'profile' / 'parts.frame.folded').read_text()
+    assert 'parts/frame:<module>;parts/frame:frame;parts/frame:post ' in folded
+    assert (tmp_path / 'profile' / 'parts.frame.txt').exists()
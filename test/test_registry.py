@@ -0,0 +1,68 @@
+import subprocess
+import sys
+
+from utilities.registry import REPO_ROOT, discover_designs, inspect_design, load_builder, select_designs
+
+DESIGN = """
+from geoscad.as_units import inches, mm
+
+WIDE = True
+WIDTH = 2 * inches if WIDE else 1 * inches
+MARGIN = 0.5 * mm
+INNER = WIDTH - 2 * MARGIN
+CORNERS = [WIDTH, INNER] @ mm
+PLACES = [i for i in sorted(range(3))]
+
+
+def main():
+    save_as_scad(plate(WIDTH), 'plate.scad')
+
+
+def plate(width, thickness=2):
+    return width * thickness
+
+
+if __name__ == '__main__':
+    main()
+"""
+
+
+def test_inspect_design_evaluates_parameters(tmp_path):
+    path = tmp_path / 'plate.py'
+    path.write_text(DESIGN)
+    info = inspect_design('parts/plate', str(path))
+    values = {parameter.name: parameter.value for parameter in info.parameters}
+    assert values['WIDTH'] == 50.8
+    assert values['INNER'] == 49.8
+    assert values['CORNERS'] == [50.8, 49.8]
+    assert values['PLACES'] is None  # needs running
+    assert ['plate'] == [builder.name for builder in info.builders]
+    assert 'width, thickness=2' == info.builders[0].arguments
+    assert ('plate.scad',) == info.outputs
+
+
+def test_select_designs_by_module_path():
+    designs = discover_designs()
+    assert ['utility_objects/washers'] == list(select_designs(designs, ['utility_objects.washers']))
+
+
+def test_every_design_declares_its_variants():
+    for name, path in discover_designs().items():
+        info = inspect_design(name, path)
+        assert info.builder and info.variants, name
+
+
+def test_load_builder_imports_on_first_use(tmp_path):
+    path = tmp_path / 'plate.py'
+    path.write_text('def plate(width, thickness=2):\n    return width * thickness\n')
+    assert 20 == load_builder(str(path), 'plate')(10)
+
+
+def test_listing_imports_nothing_heavy():
+    check = (
+        'import sys; from utilities import cli; cli.main(["list"]); '
+        'assert not {"solid", "numpy", "geoscad"} & set(sys.modules), sorted(sys.modules)'
+    )
+    result = subprocess.run([sys.executable, '-c', check], cwd=REPO_ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert 'utility_objects/washers' in result.stdout
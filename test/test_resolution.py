@@ -0,0 +1,45 @@
+import pytest
+
+from pegboard.pegs import solid_peg
+from utilities.resolution import PROFILES, Profile, facets, resolution
+
+
+def test_facets_grow_with_radius():
+    counts = [facets(radius, 'production') for radius in [0.5, 2, 10, 50]]
+    assert counts == sorted(counts)
+    assert counts[0] < counts[-1]
+
+
+def test_facets_are_multiples_of_four_and_capped():
+    for radius in [0.1, 1, 3.3, 1000]:
+        count = facets(radius, 'production')
+        assert 0 == count % 4
+        assert PROFILES['production'].min_segments <= count <= 360 / PROFILES['production'].min_angle
+
+
+def test_draft_uses_fewer_facets():
+    assert facets(25, 'draft') < facets(25, 'production')
+
+
+def test_environment_selects_profile(monkeypatch):
+    monkeypatch.setenv('SCAD_RESOLUTION', 'draft')
+    assert facets(25) == facets(25, 'draft')
+    monkeypatch.setenv('SCAD_RESOLUTION', 'bogus')
+    with pytest.raises(ValueError):
+        facets(25)
+
+
+def test_override_for_one_part():
+    coarse = Profile(chord_error=1, min_angle=30, min_size=5, min_segments=3)
+    with resolution(coarse):
+        assert 4 == facets(1)
+        with resolution('production'):
+            assert facets(25) == facets(25, 'production')
+    assert facets(25) == facets(25, 'production')
+
+
+def test_memoised_builders_follow_the_profile():
+    with resolution('draft'):
+        draft = solid_peg()
+    assert draft is not solid_peg()
+    assert draft.params['segments'] < solid_peg().params['segments']
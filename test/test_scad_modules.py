@@ -0,0 +1,61 @@
+from solid import cube, cylinder, scad_render, union
+from solid.utils import forward, right, up
+
+from utilities.memoize import part_builder
+from utilities.scad_modules import extract_modules, render_with_library, render_with_modules
+
+
+def peg_grid():
+    peg = up(1)(cylinder(r=1, h=2, segments=16))
+    return cube(10) - union()([right(x)(peg) for x in range(4)])
+
+
+def test_repeated_subtree_is_emitted_once():
+    rendered = render_with_modules(peg_grid())
+    assert 1 == rendered.count('cylinder(')
+    assert 1 == rendered.count('module subtree_')
+    assert 4 == rendered.count('subtree_') - rendered.count('module subtree_')
+
+
+def test_unique_tree_is_unchanged():
+    thing = cube(10) - up(1)(cylinder(r=1, h=2))
+    root, modules = extract_modules(thing)
+    assert {} == modules
+    assert scad_render(thing) == scad_render(root)
+
+
+def test_nested_repeats_only_extract_what_repeats_more_than_its_container():
+    peg = up(1)(cylinder(r=1, h=2))
+    pair = right(1)(peg) + right(2)(peg)
+    thing = forward(1)(pair) + forward(2)(pair)
+    root, modules = extract_modules(thing)
+    assert 2 == len(modules)
+
+
+def test_original_tree_is_not_modified():
+    thing = peg_grid()
+    before = scad_render(thing)
+    render_with_modules(thing)
+    assert before == scad_render(thing)
+
+
+def test_library_shares_parts_between_files():
+    @part_builder
+    def peg():
+        return up(1)(cylinder(r=1, h=2, segments=16))
+
+    first, first_libraries = render_with_library(cube(10) - right(3)(peg()))
+    second, second_libraries = render_with_library(cube(12) + forward(3)(peg()))
+    [name] = first_libraries
+    assert name.startswith('peg_') and first_libraries == second_libraries
+    assert f'use <lib/{name}>' in first and f'use <lib/{name}>' in second
+    assert 'cylinder' not in first + second
+
+
+def test_library_modules_use_each_other():
+    peg = up(1)(cylinder(r=1, h=2))
+    pair = right(1)(peg) + right(2)(peg)
+    text, libraries = render_with_library(forward(1)(pair) + forward(2)(pair))
+    assert 2 == len(libraries)
+    [outer] = [body for body in libraries.values() if 'use <' in body]
+    assert 1 == text.count('use <lib/') and 'cylinder' not in outer
@@ -0,0 +1,78 @@
+import pytest
+
+from utilities.build import make_designs
+from utilities.registry import discover_designs, inspect_design, select_variants
+from utilities.schema import Angle, Count, Flag, Length, builder, parse_overrides
+
+DESIGN = """
+from solid import cube
+
+from utilities.file_utilities import save_variants
+from utilities.schema import Count, Length, builder
+
+SIZES = [1, 2]
+VARIANTS = {f'block_{size}': dict(size=size * 10) for size in SIZES}
+
+
+def main():
+    save_variants(block, VARIANTS)
+
+
+@builder
+def block(size: Length, copies: Count = 1, hollow=False):
+    return cube(size)
+
+
+if __name__ == '__main__':
+    main()
+"""
+
+
+def test_lengths_take_units():
+    assert 3.0 == Length.parse('3')
+    assert 3.0 == Length.parse('3mm')
+    assert 6.35 == pytest.approx(Length.parse('1/4 in'))
+    assert 25.0 == Length.parse('2.5cm')
+    assert 90.0 == Angle.parse('90deg')
+    assert 4 == Count.parse('4')
+    assert Flag.parse('yes') is True
+    with pytest.raises(ValueError):
+        Length.parse('3ft')
+
+
+def test_parse_overrides_uses_annotations_and_defaults():
+    @builder
+    def plate(width: Length, holes: Count = 2, rounded=False, name='plate'):
+        pass
+
+    arguments = parse_overrides(plate, {'width': '1in', 'holes': '4', 'rounded': 'true', 'other': '1'})
+    assert {'width': 25.4, 'holes': 4, 'rounded': True} == arguments
+
+
+def test_select_variants():
+    variants = ['router_plate_8', 'router_plate_10', 'router_plate_11']
+    design = 'woodworking/router_plate'
+    assert ['router_plate_10', 'router_plate_11'] == select_variants(design, variants, ['router_plate_1?'])
+    assert ['router_plate_8'] == select_variants(design, variants, ['woodworking.router_plate/*_8'])
+    assert variants == select_variants(design, variants, ['router'])
+
+
+def test_registry_reads_variants_and_fields(tmp_path):
+    path = tmp_path / 'blocks.py'
+    path.write_text(DESIGN)
+    info = inspect_design('parts/blocks', str(path))
+    assert 'block' == info.builder
+    assert {'block_1': {'size': 10}, 'block_2': {'size': 20}} == info.variants
+    assert [('size', 'Length'), ('copies', 'Count'), ('hollow', 'Flag')] == [
+        (field.name, field.kind) for field in info.fields]
+    assert ('block_1.scad', 'block_2.scad') == info.outputs
+
+
+def test_make_builds_selected_variants_with_overrides(tmp_path):
+    (tmp_path / 'parts').mkdir()
+    (tmp_path / 'parts' / 'blocks.py').write_text(DESIGN)
+    output = tmp_path / 'output'
+    [result] = make_designs(discover_designs(tmp_path), str(output), ['block_2'], {'size': '1in'}, root=str(tmp_path))
+    assert result.ok, result.error
+    assert [str(output / 'block_2.scad')] == list(result.changed)
+    assert 'cube(size = 25.4000000000)' in (output / 'block_2.scad').read_text()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from solid import cube, cylinder, rotate, scale, sphere, text, translate
+from solid.utils import hole
+
+from utilities.primitives import UnsupportedGeometry
+from utilities.sdf import contains, signed_distance
+
+
+def test_primitive_distances():
+    points = [[0, 0, 0], [3, 0, 0], [0, 0, 4]]
+    assert signed_distance(cube(2, center=True), points) == pytest.approx([-1, 2, 3])
+    assert signed_distance(sphere(1), points) == pytest.approx([-1, 2, 3])
+    assert signed_distance(cylinder(r=1, h=2, center=True), points) == pytest.approx([-1, 2, 3])
+
+
+def test_cone_side_distance():
+    cone = cylinder(r1=1, r2=0, h=1)
+    assert signed_distance(cone, [[1, 0, 1]]) == pytest.approx([np.sqrt(0.5)])
+
+
+def test_booleans_and_transforms():
+    thing = translate([10, 0, 0])(cube(4, center=True) - sphere(1)) + rotate([0, 0, 90])(cube([1, 5, 1]))
+    inside = contains(thing, [[10, 0, 0], [11.5, 0, 0], [-3, 0.5, 0.5], [5, 0, 0]])
+    assert [False, True, True, False] == list(inside)
+
+
+def test_scaling_gives_a_lower_bound():
+    distance = signed_distance(scale([2, 1, 1])(sphere(1)), [[5, 0, 0], [0, 5, 0]])
+    assert distance[0] <= 3
+    assert distance[1] == pytest.approx(4)
+
+
+def test_holes_are_subtracted():
+    thing = cube(2, center=True) + hole()(sphere(0.5))
+    assert [False, True] == list(contains(thing, [[0, 0, 0], [0.8, 0.8, 0.8]]))
+
+
+def test_matches_analytic_membership_over_many_points():
+    thing = cube(10) - translate([5, 5, -1])(cylinder(r=3, h=12)) + translate([0, 0, 10])(sphere(2))
+    points = np.random.default_rng(0).uniform(-3, 13, (200000, 3))
+    x, y, z = points.T
+    expected = (
+        np.all((points >= 0) & (points <= 10), axis=1) & ((x - 5) ** 2 + (y - 5) ** 2 > 9)
+        | (x ** 2 + y ** 2 + (z - 10) ** 2 <= 4)
+    )
+    assert np.array_equal(expected, contains(thing, points))
+
+
+def test_unsupported_geometry():
+    with pytest.raises(UnsupportedGeometry):
+        signed_distance(text('hi'), [[0, 0, 0]])
@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+import pytest
+from solid import cube, cylinder, sphere, translate
+
+from utilities.cli import main
+from utilities.primitives import UnsupportedGeometry
+from utilities.slices import cross_sections, load_slices, write_svg
+
+
+def area(loop):
+    return 0.5 * np.sum(loop[:, 0] * np.roll(loop[:, 1], -1) - np.roll(loop[:, 0], -1) * loop[:, 1])
+
+
+def test_box_section_is_one_counter_clockwise_loop():
+    slices = cross_sections(translate([0.05, 0.05, 0])(cube([10, 5, 1])), layer=0.25, pixel=0.1)
+    assert list(slices.heights) == pytest.approx([0.125, 0.375, 0.625, 0.875])
+    assert list(slices.layers) == [0, 1, 2, 3]
+    loop, = slices.layer(2)
+    # Straight runs collapse to their ends; corners are cut by at most a pixel.
+    assert len(loop) <= 8
+    assert area(loop) == pytest.approx(50, abs=0.1)
+
+
+def test_holes_run_clockwise():
+    ring = cylinder(r=10, h=2) - translate([0, 0, -1])(cylinder(r=4, h=4))
+    outer, inner = sorted(cross_sections(ring, layer=1, pixel=0.1).layer(0), key=area, reverse=True)
+    assert area(outer) == pytest.approx(math.pi * 100, rel=1e-3)
+    assert area(inner) == pytest.approx(-math.pi * 16, rel=1e-3)
+
+
+def test_every_layer_of_a_sphere():
+    slices = cross_sections(sphere(5), layer=1, pixel=0.05)
+    areas = [sum(area(loop) for loop in slices.layer(index)) for index in range(len(slices.heights))]
+    assert areas == pytest.approx([math.pi * (25 - z * z) for z in slices.heights], rel=1e-3)
+
+
+def test_outputs(tmp_path):
+    slices = cross_sections(cube(4) + translate([6, 0, 0])(cube(2)), layer=1)
+    slices.save(tmp_path / 'part.npz')
+    loaded = load_slices(tmp_path / 'part.npz')
+    assert all(np.array_equal(a, b) for a, b in zip(loaded, slices))
+    write_svg(slices, tmp_path / 'part.svg')
+    svg = (tmp_path / 'part.svg').read_text()
+    assert svg.count('<path') == 4
+    assert svg.count(' Z') == 6
+
+
+def test_node_limit():
+    with pytest.raises(UnsupportedGeometry):
+        cross_sections(cube([1000, 1000, 1]), pixel=0.1)
+
+
+def test_unknown_formats_are_refused(capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(['slice', '--format', 'svg,svgz'])
+    assert 2 == exit.value.code
+    assert 'unknown format svgz' in capsys.readouterr().err
@@ -0,0 +1,37 @@
+import numpy as np
+from solid import cube, cylinder, sphere, translate
+from solid.utils import hole
+
+from utilities.sdf import contains
+from utilities.voxels import centres, voxelize
+
+
+def reference_grid(thing, voxels):
+    axes = [centres(voxels.origin[axis], voxels.size, 0, voxels.grid.shape[axis]) for axis in range(3)]
+    points = np.stack([axis.ravel() for axis in np.meshgrid(*axes, indexing='ij')], axis=1)
+    return contains(thing, points).reshape(voxels.grid.shape)
+
+
+def test_box_is_filled_exactly():
+    voxels = voxelize(cube([10, 20, 5]), 0.5, jobs=1)
+    assert voxels.grid.shape == (20, 40, 10)
+    assert voxels.grid.all()
+    assert voxels.origin == (0, 0, 0)
+    assert voxels.volume == 1000
+
+
+def test_matches_pointwise_evaluation():
+    thing = cube(40, center=True) - sphere(19) + translate([0, 0, 20])(cylinder(r=5, h=10)) + hole()(cylinder(r=3, h=60))
+    voxels = voxelize(thing, 0.5, jobs=1)
+    assert np.array_equal(voxels.grid, reference_grid(thing, voxels))
+    assert voxels.filled == np.count_nonzero(voxels.grid)
+
+
+def test_memory_mapped_parallel_output(tmp_path):
+    thing = cylinder(r=20, h=4) - translate([0, 0, -1])(cylinder(r=12, h=6))
+    serial = voxelize(thing, 0.25, dtype=np.uint8, jobs=1)
+    mapped = voxelize(thing, 0.25, str(tmp_path / 'ring.npy'), dtype=np.uint8, jobs=2)
+    assert isinstance(mapped.grid, np.memmap)
+    assert mapped.grid.dtype == np.uint8
+    assert np.array_equal(np.load(tmp_path / 'ring.npy'), serial.grid)
+    assert mapped.filled == serial.filled
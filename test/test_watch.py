@@ -0,0 +1,63 @@
+import os
+
+from utilities.registry import REPO_ROOT
+from utilities.watch import affected_designs, dependencies, import_graph, source_files, watch
+
+DESIGN = """
+from parts.shared import SIZE
+
+with open('{name}.scad', 'w') as output:
+    output.write(f'cube({{SIZE}});')
+
+if __name__ == '__main__':
+    pass
+"""
+
+
+def make_designs(root):
+    (root / 'parts').mkdir()
+    (root / 'parts' / '__init__.py').write_text('')
+    (root / 'parts' / 'shared.py').write_text('SIZE = 1\n')
+    (root / 'parts' / 'uses_shared.py').write_text(DESIGN.format(name='uses_shared'))
+    (root / 'parts' / 'alone.py').write_text("if __name__ == '__main__':\n    pass\n")
+    (root / 'parts' / 'relative.py').write_text('from .shared import SIZE\n')
+
+
+def test_repository_import_graph():
+    graph = import_graph(source_files())
+
+    def depends(design, module):
+        return os.path.join(REPO_ROOT, module) in dependencies(graph, os.path.join(REPO_ROOT, design))
+
+    assert depends('circuit_board_enclosures/jack_panel.py', 'circuit_board_enclosures/keystone.py')
+    assert depends('pegboard/index_card_holder.py', 'pegboard/pegs.py')
+    assert depends('model_railroading/peco_motor_mount.py', 'model_railroading/peco_turnout_motor.py')
+    assert depends('model_railroading/peco_motor_mount.py', 'utilities/resolution.py')
+    assert not depends('circuit_board_enclosures/keystone.py', 'circuit_board_enclosures/jack_panel.py')
+
+
+def test_affected_designs_follow_imports(tmp_path):
+    make_designs(tmp_path)
+    root = str(tmp_path)
+    graph = import_graph(source_files(root), root)
+    shared = os.path.join(root, 'parts', 'shared.py')
+    assert {shared, os.path.join(root, 'parts', '__init__.py')} == graph[os.path.join(root, 'parts', 'relative.py')]
+    designs = {'parts/uses_shared': os.path.join(root, 'parts', 'uses_shared.py'),
+               'parts/alone': os.path.join(root, 'parts', 'alone.py')}
+    assert ['parts/uses_shared'] == list(affected_designs(designs, graph, [shared]))
+
+
+def test_watch_rebuilds_dependents(tmp_path):
+    make_designs(tmp_path)
+    output = tmp_path / 'output'
+    rebuilds = watch([], str(output), jobs=1, interval=0.01, root=str(tmp_path), rounds=3)
+    changed, results = next(rebuilds)
+    assert ['parts/alone', 'parts/uses_shared'] == sorted(result.design for result in results)
+    shared = tmp_path / 'parts' / 'shared.py'
+    shared.write_text('SIZE = 2\n')
+    stat = os.stat(shared)
+    os.utime(shared, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    changed, results = next(rebuilds)
+    assert {str(shared)} == changed
+    assert ['parts/uses_shared'] == [result.design for result in results]
+    assert 'cube(2);' == (output / 'uses_shared.scad').read_text()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+
+from solid import import_stl, scad_render
+
+from utilities.export import Renderer, RenderError, cache_key, export_file, openscad_binary
+from utilities.patterns import baked
+from utilities.tree_utilities import copy_node, nodes_with_holes, unique_nodes
+
+# Baked subtrees.  A subtree wrapped in baked() is rendered to STL by OpenSCAD on its own
+# and the saved file import()s the STL in its place, so CGAL evaluates the subtree once
+# rather than in every file and at every placement.  STLs are kept in the disk cache,
+# keyed on the subtree's SCAD text and the renderer's version, so changing anything that
+# shapes the subtree (parameters, resolution) bakes it afresh.  Each output directory
+# gets its own copies under baked/, referenced by relative paths, so the directory can
+# be moved as a whole.
+
+BAKED_DIRECTORY = 'baked'
+
+renderers = {}
+
+
+def default_renderer():
+    # One per process and binary, so each asks for its version once.
+    binary = openscad_binary()
+    if binary not in renderers:
+        renderers[binary] = Renderer(binary)
+    return renderers[binary]
+
+
+def bake(node, directory, renderer=None, cache=None):
+    # The import() standing in for a baked node, rendering its STL if need be.
+    renderer = renderer or default_renderer()
+    text = scad_render(node)
+    key = cache_key(text, renderer.version())
+    target = os.path.join(directory, BAKED_DIRECTORY, key + '.stl')
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with tempfile.TemporaryDirectory() as scratch:
+            source = os.path.join(scratch, 'baked.scad')
+            with open(source, 'w') as output:
+                output.write(text)
+            result = export_file(renderer, source, target, cache)
+        if not result.ok:
+            raise RenderError(f'baking failed: {result.error}')
+    imported = import_stl(f'{BAKED_DIRECTORY}/{key}.stl')
+    imported.modifier = node.modifier
+    return imported
+
+
+def outer_nodes(root):
+    # Ids of the nodes reached from root without passing through a baked node.
+    reached, stack = set(), [root]
+    while stack:
+        node = stack.pop()
+        if id(node) in reached:
+            continue
+        reached.add(id(node))
+        if not isinstance(node, baked):
+            stack.extend(node.children)
+    return reached
+
+
+def bake_tree(root, directory, renderer=None, cache=None):
+    # Copy of root with its outermost baked subtrees replaced by imports; bakes inside
+    # those are rendered inline as part of them.
+    order = unique_nodes(root)
+    holey = nodes_with_holes(order)
+    reached = outer_nodes(root)
+    replaced = {}
+    for node in order:
+        if id(node) not in reached:
+            continue
+        if isinstance(node, baked):
+            if id(node) in holey:
+                raise ValueError('baked subtrees cannot contain holes, which are cut at the top of the part')
+            replaced[id(node)] = bake(node, directory, renderer, cache)
+            continue
+        children = [replaced[id(child)] for child in node.children]
+        if any(new is not old for new, old in zip(children, node.children)):
+            replaced[id(node)] = copy_node(node, children)
+        else:
+            replaced[id(node)] = node
+    return replaced[id(root)]
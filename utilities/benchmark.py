@@ -0,0 +1,154 @@
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import time
+import traceback
+import tracemalloc
+from typing import NamedTuple, Optional
+
+from utilities import file_utilities, memoize
+from utilities.build import REPO_ROOT, design_outputs
+from utilities.disk_cache import write_atomically
+from utilities.optimize import optimize, requested_passes
+from utilities.resolution import current_profile
+from utilities.tree_utilities import multiplicities, unique_nodes
+
+# Per-design benchmarks of the build: the time to run the design and build its trees,
+# the time to optimise and render them to SCAD, the rendered size, node counts and the
+# peak Python heap.  Runs are appended to a JSON history and compared against the
+# median of the last few runs made with the same settings.
+
+HISTORY_FILE = os.path.join(REPO_ROOT, '.benchmarks', 'history.json')
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 3
+BASELINE_RUNS = 5
+MIN_SECONDS = 0.05  # timings below this are mostly noise
+METRICS = ['build_seconds', 'render_seconds', 'output_bytes', 'nodes', 'tree_nodes', 'peak_bytes']
+
+
+class BenchmarkResult(NamedTuple):
+    design: str
+    seconds: float
+    error: Optional[str] = None
+    metrics: Optional[dict] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def benchmark_settings(deduplicate=None, passes=None):
+    if deduplicate is None:
+        deduplicate = bool(os.environ.get('SCAD_DEDUPLICATE'))
+    return {
+        'deduplicate': deduplicate,
+        'passes': requested_passes(passes),
+        'resolution': current_profile()._asdict(),
+    }
+
+
+def measure(path, settings):
+    memoize.clear_caches()
+    start = time.perf_counter()
+    outputs = design_outputs(path)
+    metrics = dict.fromkeys(METRICS, 0)
+    metrics['build_seconds'] = time.perf_counter() - start
+    for _, thing in outputs:
+        start = time.perf_counter()
+        rendered = file_utilities.render_scad(optimize(thing, settings['passes']), settings['deduplicate'])
+        metrics['render_seconds'] += time.perf_counter() - start
+        metrics['output_bytes'] += len(rendered.encode())
+        order = unique_nodes(thing)
+        metrics['nodes'] += len(order)
+        metrics['tree_nodes'] += sum(multiplicities(thing, order).values())
+    return metrics
+
+
+def benchmark_design(name, path, repeat=DEFAULT_REPEAT, settings=None):
+    # Timings are the best of repeat runs; the heap is traced in a run of its own, since
+    # tracing slows everything down.
+    start = time.perf_counter()
+    settings = settings or benchmark_settings()
+    try:
+        runs = [measure(path, settings) for _ in range(max(repeat, 1))]
+        metrics = dict(runs[0])
+        for metric in ['build_seconds', 'render_seconds']:
+            metrics[metric] = min(run[metric] for run in runs)
+        tracemalloc.start()
+        try:
+            measure(path, settings)
+            metrics['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    except BaseException:
+        return BenchmarkResult(name, time.perf_counter() - start, traceback.format_exc())
+    return BenchmarkResult(name, time.perf_counter() - start, metrics=metrics)
+
+
+def git_commit(root=REPO_ROOT):
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(filename=HISTORY_FILE):
+    try:
+        with open(filename) as history:
+            return json.load(history)
+    except (OSError, ValueError):
+        return []
+
+
+def save_history(history, filename=HISTORY_FILE):
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    write_atomically(filename, json.dumps(history, indent=1, sort_keys=True))
+
+
+def run_record(results, settings):
+    return {
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'settings': settings,
+        'results': {result.design: result.metrics for result in results if result.ok},
+    }
+
+
+def baseline(history, design, metric, settings, runs=BASELINE_RUNS):
+    values = [
+        record['results'][design][metric]
+        for record in history
+        if record.get('settings') == settings and metric in record['results'].get(design, {})
+    ]
+    return statistics.median(values[-runs:]) if values else None
+
+
+def regressions(history, results, settings, threshold=DEFAULT_THRESHOLD):
+    messages = []
+    for result in results:
+        if not result.ok:
+            continue
+        for metric in METRICS:
+            value = result.metrics[metric]
+            base = baseline(history, result.design, metric, settings)
+            if base is None or metric.endswith('_seconds') and max(value, base) < MIN_SECONDS:
+                continue
+            if value > base * (1 + threshold):
+                change = f'+{(value / base - 1) * 100:.0f}%' if base else 'new'
+                messages.append(f'{result.design}: {metric} {value:.4g}, baseline {base:.4g} ({change})')
+    return messages
+
+
+def report_line(result):
+    if not result.ok:
+        return f'{result.design:50} FAILED: ' + result.error.strip().splitlines()[-1]
+    metrics = result.metrics
+    return (
+        f'{result.design:50} build {metrics["build_seconds"]:7.3f}s  render {metrics["render_seconds"]:7.3f}s  '
+        f'{metrics["output_bytes"] / 1024:9.1f} KiB  {metrics["nodes"]:7} nodes  {metrics["tree_nodes"]:8} tree  '
+        f'{metrics["peak_bytes"] / 2 ** 20:7.1f} MiB'
+    )
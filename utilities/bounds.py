@@ -0,0 +1,222 @@
+import math
+from typing import List, NamedTuple
+
+from utilities.matrices import node_matrix, transform_point
+from utilities.patterns import PATTERN_CLASSES
+from utilities.tree_utilities import unique_nodes
+
+# Axis-aligned bounding boxes computed analytically from the CSG tree.  None stands for
+# "unknown" (text, imports, ...) and must be treated as unbounded by callers.
+
+
+class Box(NamedTuple):
+    low: List[float]
+    high: List[float]
+
+    @property
+    def empty(self):
+        return any(low > high for low, high in zip(self.low, self.high))
+
+    @property
+    def size(self):
+        return [high - low for low, high in zip(self.low, self.high)]
+
+    @property
+    def center(self):
+        return [(low + high) / 2 for low, high in zip(self.low, self.high)]
+
+    @property
+    def volume(self):
+        return 0.0 if self.empty else math.prod(self.size)
+
+    def corners(self):
+        return [
+            [x, y, z]
+            for x in (self.low[0], self.high[0])
+            for y in (self.low[1], self.high[1])
+            for z in (self.low[2], self.high[2])
+        ]
+
+    def expanded(self, margin):
+        return Box([low - margin for low in self.low], [high + margin for high in self.high])
+
+    def contains(self, other):
+        return other.empty or all(
+            low <= other_low and other_high <= high
+            for low, high, other_low, other_high in zip(self.low, self.high, other.low, other.high)
+        )
+
+
+EMPTY = Box([math.inf] * 3, [-math.inf] * 3)
+
+
+def box_union(boxes):
+    boxes = list(boxes)
+    if any(box is None for box in boxes):
+        return None
+    boxes = [box for box in boxes if not box.empty]
+    if not boxes:
+        return EMPTY
+    return Box(
+        [min(box.low[axis] for box in boxes) for axis in range(3)],
+        [max(box.high[axis] for box in boxes) for axis in range(3)],
+    )
+
+
+def box_intersection(boxes):
+    boxes = [box for box in boxes if box is not None]
+    if not boxes:
+        return None
+    result = Box(
+        [max(box.low[axis] for box in boxes) for axis in range(3)],
+        [min(box.high[axis] for box in boxes) for axis in range(3)],
+    )
+    return EMPTY if result.empty else result
+
+
+def overlaps(a, b):
+    # Strict overlap: boxes that only share a face can't change each other's volume.
+    if a is None or b is None:
+        return True
+    if a.empty or b.empty:
+        return False
+    return all(
+        a.low[axis] < b.high[axis] and b.low[axis] < a.high[axis]
+        or a.low[axis] == a.high[axis] == b.low[axis] == b.high[axis]  # flat 2D shapes
+        for axis in range(3)
+    )
+
+
+def transformed(box, matrix):
+    if box is None or box.empty:
+        return box
+    points = [transform_point(matrix, corner) for corner in box.corners()]
+    return Box([min(p[axis] for p in points) for axis in range(3)], [max(p[axis] for p in points) for axis in range(3)])
+
+
+def vector3(value, default):
+    if value is None:
+        value = default
+    if isinstance(value, (int, float)):
+        return [value] * 3
+    value = list(value)
+    return value + [0] * (3 - len(value))
+
+
+def first_given(params, names, default):
+    for name, factor in names:
+        if params.get(name) is not None:
+            return params[name] * factor
+    return default
+
+
+def cube_box(params):
+    size = vector3(params.get('size'), 1)
+    if params.get('center'):
+        return Box([-s / 2 for s in size], [s / 2 for s in size])
+    return Box([0, 0, 0], size)
+
+
+def cylinder_box(params):
+    r = first_given(params, [('r', 1), ('d', 0.5)], 1)
+    r1 = first_given(params, [('r1', 1), ('d1', 0.5)], r)
+    r2 = first_given(params, [('r2', 1), ('d2', 0.5)], r)
+    radius = max(r1, r2)
+    height = params.get('h') if params.get('h') is not None else 1
+    z = -height / 2 if params.get('center') else 0
+    return Box([-radius, -radius, z], [radius, radius, z + height])
+
+
+def sphere_box(params):
+    radius = first_given(params, [('r', 1), ('d', 0.5)], 1)
+    return Box([-radius] * 3, [radius] * 3)
+
+
+def points_box(points):
+    points = [vector3(point, 0) for point in points]
+    if not points:
+        return EMPTY
+    return Box([min(p[axis] for p in points) for axis in range(3)], [max(p[axis] for p in points) for axis in range(3)])
+
+
+def square_box(params):
+    x, y = vector3(params.get('size'), 1)[:2]
+    if params.get('center'):
+        return Box([-x / 2, -y / 2, 0], [x / 2, y / 2, 0])
+    return Box([0, 0, 0], [x, y, 0])
+
+
+def circle_box(params):
+    radius = first_given(params, [('r', 1), ('d', 0.5)], 1)
+    return Box([-radius, -radius, 0], [radius, radius, 0])
+
+
+def linear_extrude_box(params, child_box):
+    if child_box is None or child_box.empty:
+        return child_box
+    height = params.get('height') if params.get('height') is not None else 100
+    scale = max(vector3(params.get('scale'), 1)[:2]) if params.get('scale') is not None else 1
+    z = -height / 2 if params.get('center') else 0
+    low, high = child_box.low, child_box.high
+    if params.get('twist') or scale != 1:
+        reach = max(abs(value) for value in low[:2] + high[:2]) * max(scale, 1)
+        if params.get('twist'):
+            reach *= math.sqrt(2)
+        return Box([-reach, -reach, z], [reach, reach, z + height])
+    return Box([low[0], low[1], z], [high[0], high[1], z + height])
+
+
+PRIMITIVE_BOXES = {
+    'cube': cube_box,
+    'cylinder': cylinder_box,
+    'sphere': sphere_box,
+    'square': square_box,
+    'circle': circle_box,
+    'polyhedron': lambda params: points_box(params.get('points') or []),
+    'polygon': lambda params: points_box(params.get('points') or []),
+}
+PASS_THROUGH = ['union', 'hull', 'render', 'color', 'part']
+
+
+def node_box(node, child_boxes):
+    if node.modifier in ['%', '*'] or node.is_hole:
+        return EMPTY
+    if node.name in PRIMITIVE_BOXES:
+        return PRIMITIVE_BOXES[node.name](node.params)
+    if isinstance(node, PATTERN_CLASSES):
+        return bounds(node.expand())
+    matrix = node_matrix(node)
+    if matrix is not None:
+        return transformed(box_union(child_boxes), matrix)
+    if node.name in PASS_THROUGH:
+        return box_union(child_boxes)
+    if node.name == 'intersection':
+        return box_intersection(child_boxes)
+    if node.name == 'difference':
+        return child_boxes[0] if child_boxes else EMPTY
+    if node.name == 'minkowski':
+        if any(box is None for box in child_boxes):
+            return None
+        boxes = [box for box in child_boxes if not box.empty]
+        if not boxes:
+            return EMPTY
+        return Box([sum(box.low[axis] for box in boxes) for axis in range(3)],
+                   [sum(box.high[axis] for box in boxes) for axis in range(3)])
+    if node.name == 'linear_extrude':
+        return linear_extrude_box(node.params, box_union(child_boxes))
+    if node.name == 'rotate_extrude':
+        profile = box_union(child_boxes)
+        if profile is None or profile.empty:
+            return profile
+        reach = max(abs(profile.low[0]), abs(profile.high[0]))
+        return Box([-reach, -reach, profile.low[1]], [reach, reach, profile.high[1]])
+    return None
+
+
+def bounds(root, cache=None):
+    if cache is None:
+        cache = {}
+    for node in unique_nodes(root):
+        if id(node) not in cache:
+            cache[id(node)] = node_box(node, [cache[id(child)] for child in node.children])
+    return cache[id(root)]
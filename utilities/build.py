@@ -0,0 +1,175 @@
+import contextlib
+import io
+import os
+import runpy
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple, Optional, Tuple
+
+from utilities import file_utilities, memoize
+from utilities.profiling import Profiler
+from utilities.registry import REPO_ROOT, discover_designs, load_design, select_designs, select_variants
+from utilities.schema import parse_overrides
+
+
+class BuildResult(NamedTuple):
+    design: str
+    seconds: float
+    error: Optional[str] = None
+    changed: Tuple[str, ...] = ()
+    unchanged: Tuple[str, ...] = ()
+    cache_hits: int = 0
+    cache_misses: int = 0
+    profile: Tuple[str, ...] = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def run_design(path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        runpy.run_path(path, run_name='__main__')
+
+
+def design_outputs(path):
+    # (filename, thing) for everything the design saves, without writing any of it.  The
+    # working directory and SCAD_DIRECTORY point at a scratch directory meanwhile, in case
+    # the design writes anything else.
+    directory, scad_directory = os.getcwd(), os.environ.get('SCAD_DIRECTORY')
+    try:
+        with tempfile.TemporaryDirectory() as scratch, file_utilities.capturing_outputs() as outputs:
+            os.environ['SCAD_DIRECTORY'] = scratch
+            os.chdir(scratch)
+            run_design(path)
+    finally:
+        os.chdir(directory)
+        if scad_directory is None:
+            os.environ.pop('SCAD_DIRECTORY', None)
+        else:
+            os.environ['SCAD_DIRECTORY'] = scad_directory
+    return outputs
+
+
+def build_design(name, path, output_directory):
+    # Designs either call save_as_scad (SCAD_DIRECTORY) or scad_render_to_file with a bare
+    # filename (current directory), so point both at the output directory.  With
+    # SCAD_PROFILE set to a directory the build is profiled, and the folded stacks and
+    # table are written there as <design>.folded and <design>.txt.
+    start = time.perf_counter()
+    error = None
+    file_utilities.reset_change_summary()
+    hits, misses = memoize.totals['hits'], memoize.totals['misses']
+    profile_directory = os.environ.get('SCAD_PROFILE')
+    profiler = Profiler(os.path.dirname(os.path.dirname(os.path.abspath(path))))
+    try:
+        os.environ['SCAD_DIRECTORY'] = output_directory
+        os.chdir(output_directory)
+        with profiler if profile_directory else contextlib.nullcontext():
+            run_design(path)
+    except BaseException:
+        error = traceback.format_exc()
+    changed, unchanged = file_utilities.change_summary()
+    profile = ()
+    if profile_directory:
+        os.makedirs(profile_directory, exist_ok=True)
+        profiler.write(os.path.join(profile_directory, name.replace('/', '.')))
+        profile = tuple(profiler.table())
+    return BuildResult(
+        name, time.perf_counter() - start, error, tuple(changed), tuple(unchanged),
+        memoize.totals['hits'] - hits, memoize.totals['misses'] - misses, profile,
+    )
+
+
+def design_builder(module):
+    # The @builder function defined in a design module itself.
+    for value in vars(module).values():
+        if getattr(value, 'is_builder', False) and getattr(value, '__module__', None) == module.__name__:
+            return value
+    raise ValueError(f'{module.__file__} declares no @builder')
+
+
+def make_design(name, path, output_directory, patterns=(), overrides=None):
+    # Build the design's VARIANTS matching patterns, with name=text argument overrides.
+    start = time.perf_counter()
+    error = None
+    file_utilities.reset_change_summary()
+    hits, misses = memoize.totals['hits'], memoize.totals['misses']
+    try:
+        os.environ['SCAD_DIRECTORY'] = output_directory
+        os.chdir(output_directory)
+        with contextlib.redirect_stdout(io.StringIO()):
+            module = load_design(path)
+            builder = design_builder(module)
+            names = select_variants(name, module.VARIANTS, patterns)
+            file_utilities.save_variants(builder, module.VARIANTS, names, parse_overrides(builder, overrides or {}))
+    except BaseException:
+        error = traceback.format_exc()
+    changed, unchanged = file_utilities.change_summary()
+    return BuildResult(
+        name, time.perf_counter() - start, error, tuple(changed), tuple(unchanged),
+        memoize.totals['hits'] - hits, memoize.totals['misses'] - misses,
+    )
+
+
+def _initialize_worker(root):
+    if root not in sys.path:
+        sys.path.insert(0, root)
+
+
+@contextlib.contextmanager
+def preserved_process_state():
+    directory, environment = os.getcwd(), dict(os.environ)
+    try:
+        yield
+    finally:
+        os.chdir(directory)
+        os.environ.clear()
+        os.environ.update(environment)
+
+
+def run_designs(worker, designs, jobs=None, root=REPO_ROOT, *args, isolated=False):
+    # Yield worker(name, path, *args) for every design as the worker processes finish them.
+    # A single design runs in this process, saving the pool's startup, unless isolated:
+    # then nothing the design imports stays loaded here.
+    if len(designs) == 1 and jobs in (None, 1) and not isolated:
+        _initialize_worker(root)
+        [(name, path)] = designs.items()
+        with preserved_process_state():
+            result = worker(name, path, *args)
+        yield result
+        return
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_initialize_worker, initargs=(root,)) as executor:
+        futures = [
+            executor.submit(worker, name, path, *args)
+            for name, path in designs.items()
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def build_designs(designs, output_directory, jobs=None, root=REPO_ROOT, isolated=False):
+    output_directory = os.path.abspath(output_directory)
+    os.makedirs(output_directory, exist_ok=True)
+    yield from run_designs(build_design, designs, jobs, root, output_directory, isolated=isolated)
+
+
+def make_designs(designs, output_directory, patterns=(), overrides=None, jobs=None, root=REPO_ROOT):
+    output_directory = os.path.abspath(output_directory)
+    os.makedirs(output_directory, exist_ok=True)
+    yield from run_designs(make_design, designs, jobs, root, output_directory, patterns, overrides)
+
+
+def report_line(result):
+    if result.ok:
+        status = f'ok ({len(result.changed)} changed, {len(result.unchanged)} unchanged)'
+        if result.cache_hits or result.cache_misses:
+            status += f', parts cache {result.cache_hits} hits / {result.cache_misses} misses'
+    else:
+        status = 'FAILED: ' + result.error.strip().splitlines()[-1]
+    return f'{result.design:50} {result.seconds:8.2f}s  {status}'
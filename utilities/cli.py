@@ -0,0 +1,518 @@
+import argparse
+import json
+import os
+import sys
+import traceback
+
+from utilities.registry import REPO_ROOT, discover_designs, inspect_design, select_designs, select_variants
+from utilities.resolution import PROFILES
+
+# Commands import what they need when they run, so that listing designs, inspecting
+# them and --help stay quick: the building, meshing and NumPy modules take far longer
+# to import than these paths take to run.  Option defaults that live in those modules
+# are filled in by the commands for the same reason; the help repeats their values.
+
+SLICE_FORMATS = ['svg', 'npz']  # those utilities/slices.py writes
+
+
+def slice_formats(text):
+    formats = text.split(',')
+    unknown = sorted(set(formats) - set(SLICE_FORMATS))
+    if unknown:
+        raise argparse.ArgumentTypeError(f'unknown format {", ".join(unknown)}; choose from {", ".join(SLICE_FORMATS)}')
+    return formats
+
+
+def shown_value(value):
+    if isinstance(value, float):
+        return f'{value:.6g}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(shown_value(element) for element in value) + ']'
+    return repr(value)
+
+
+def list_command(args):
+    for name, path in select_designs(discover_designs(), args.designs).items():
+        if args.outputs:
+            print(f'{name:50} ' + ' '.join(inspect_design(name, path).outputs))
+        else:
+            print(name)
+    return 0
+
+
+def show_command(args):
+    designs = select_designs(discover_designs(), args.designs)
+    for name, path in designs.items():
+        info = inspect_design(name, path)
+        print(name)
+        if info.error:
+            print(f'  unreadable: {info.error}')
+            continue
+        print('  outputs: ' + (' '.join(info.outputs) or '-'))
+        print('  parameters:')
+        for parameter in info.parameters:
+            value = '' if parameter.value is None else shown_value(parameter.value)
+            print(f'    {parameter.name} = {parameter.source}' + (f'  ({value})' if value not in ['', parameter.source] else ''))
+        print('  builders:')
+        for builder in info.builders:
+            marker = '  @builder' if builder.name == info.builder else ''
+            print(f'    {builder.name}({builder.arguments})  line {builder.line}{marker}')
+        if info.builder:
+            print('  variants:' + ('' if info.variants is not None else ' (not known without running the design)'))
+            for variant, arguments in (info.variants or {}).items():
+                print(f'    {variant:30} ' + ' '.join(f'{key}={shown_value(value)}' for key, value in arguments.items()))
+    return 0 if designs else 1
+
+
+def apply_build_options(args):
+    from utilities.optimize import requested_passes
+
+    if args.deduplicate:
+        os.environ['SCAD_DEDUPLICATE'] = '1'
+    if args.passes:
+        os.environ['SCAD_PASSES'] = ','.join(requested_passes(args.passes))
+    if args.stl:
+        os.environ['SCAD_STL'] = '1'
+    if args.bake:
+        os.environ['SCAD_BAKE'] = '1'
+    if args.library:
+        os.environ['SCAD_LIBRARY'] = '1'
+    if args.resolution:
+        os.environ['SCAD_RESOLUTION'] = args.resolution
+
+
+def report_built(results, count, noun, outputs=None):
+    # Prints the results; the .scad files they wrote or kept are added to outputs.
+    from utilities.build import report_line
+
+    failures = 0
+    changed = []
+    for result in results:
+        print(report_line(result), flush=True)
+        for line in result.profile:
+            print(f'    {line}')
+        changed += result.changed
+        if outputs is not None:
+            outputs += [filename for filename in result.changed + result.unchanged if filename.endswith('.scad')]
+        if not result.ok:
+            failures += 1
+    print(f'{count - failures} of {count} {noun} built')
+    print(f'{len(changed)} files changed')
+    for filename in sorted(changed):
+        print(f'  {filename}')
+    return 1 if failures else 0
+
+
+def build_command(args):
+    from utilities.build import build_designs
+
+    designs = select_designs(discover_designs(), args.designs)
+    output_directory = args.output or os.environ.get('SCAD_DIRECTORY', '.')
+    apply_build_options(args)
+    if args.profile:
+        os.environ['SCAD_PROFILE'] = args.profile
+    if os.environ.get('SCAD_PROFILE'):
+        # Workers change directory between designs.
+        os.environ['SCAD_PROFILE'] = os.path.abspath(os.environ['SCAD_PROFILE'])
+    if args.cache:
+        os.environ['SCAD_CACHE'] = os.path.abspath(args.cache)
+    outputs = []
+    status = report_built(build_designs(designs, output_directory, jobs=args.jobs), len(designs), 'designs', outputs)
+    if args.export:
+        status = max(status, export_outputs(sorted(outputs), None, args))
+    return status
+
+
+def export_outputs(sources, output_directory, args):
+    from utilities import export
+    from utilities.disk_cache import DiskCache
+
+    renderer = export.Renderer(
+        args.renderer,
+        export.DEFAULT_TIMEOUT if args.timeout is None else args.timeout,
+        export.DEFAULT_RETRIES if args.retries is None else args.retries,
+    )
+    failures = cached = 0
+    for result in export.export_stls(sources, output_directory, args.jobs, renderer, DiskCache(args.cache)):
+        print(export.report_line(result, os.getcwd()), flush=True)
+        failures += not result.ok
+        cached += result.cached
+    print(f'{len(sources) - failures} of {len(sources)} STLs exported, {cached} from the cache')
+    return 1 if failures else 0
+
+
+def export_command(args):
+    sources = []
+    for path in args.paths or [os.environ.get('SCAD_DIRECTORY', '.')]:
+        if os.path.isdir(path):
+            sources += sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.scad'))
+        else:
+            sources.append(path)
+    return export_outputs(sources, args.output, args)
+
+
+def cache_command(args):
+    from utilities.disk_cache import DiskCache, size
+
+    try:
+        cache = DiskCache(args.cache, size(args.limit) if args.limit else None)
+    except ValueError as problem:
+        print(f'--limit: {problem}', file=sys.stderr)
+        return 2
+    if args.clear:
+        cache.clear()
+    elif args.limit:
+        print(f'{cache.evict()} entries evicted')
+    entries, _ = cache.scan()
+    total = sum(length for _, length, _ in entries)
+    print(f'{cache.directory}: {len(entries)} entries, {total / 2 ** 20:.1f} of {cache.limit / 2 ** 20:.1f} MB')
+    return 0
+
+
+def watch_command(args):
+    from utilities.build import report_line
+    from utilities.watch import watch
+
+    output_directory = args.output or os.environ.get('SCAD_DIRECTORY', '.')
+    apply_build_options(args)
+    try:
+        for changed, results in watch(args.designs, output_directory, args.jobs, args.interval, initial=args.initial):
+            for path in sorted(changed):
+                print(f'changed {os.path.relpath(path, REPO_ROOT)}')
+            count = failures = 0
+            for result in results:
+                print(report_line(result), flush=True)
+                for filename in result.changed:
+                    print(f'  {filename}')
+                count += 1
+                failures += not result.ok
+            print(f'{count - failures} of {count} designs rebuilt; watching for changes', flush=True)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def make_command(args):
+    # Only designs declaring an @builder and VARIANTS take part.  Overrides are checked
+    # against the builders' arguments here; their values are parsed by the workers.
+    from utilities.build import make_designs
+
+    overrides = {}
+    for setting in args.set:
+        name, equals, value = setting.partition('=')
+        if not equals:
+            print(f'--set {setting}: expected NAME=VALUE', file=sys.stderr)
+            return 2
+        overrides[name.strip()] = value.strip()
+    designs, fields, variants = {}, set(), 0
+    for name, path in discover_designs().items():
+        info = inspect_design(name, path)
+        if info.builder is None:
+            continue
+        if info.variants is not None:
+            selected = select_variants(name, info.variants, args.variants)
+            if not selected:
+                continue
+            variants += len(selected)
+        designs[name] = path
+        fields.update(field.name for field in info.fields)
+    unknown = sorted(set(overrides) - fields)
+    if unknown:
+        print(f'no selected builder takes {", ".join(unknown)}', file=sys.stderr)
+        return 2
+    if not designs:
+        print('no variants match', file=sys.stderr)
+        return 1
+    output_directory = args.output or os.environ.get('SCAD_DIRECTORY', '.')
+    apply_build_options(args)
+    results = make_designs(designs, output_directory, args.variants, overrides, jobs=args.jobs)
+    return report_built(results, len(designs), f'designs ({variants} variants)')
+
+
+def estimate_command(args):
+    from utilities import estimate
+    from utilities.build import run_designs
+
+    density = args.density if args.density is not None else estimate.DEFAULT_DENSITY
+    samples = args.samples if args.samples is not None else estimate.DEFAULT_SAMPLES
+    designs = select_designs(discover_designs(), args.designs)
+    if args.resolution:
+        os.environ['SCAD_RESOLUTION'] = args.resolution
+    failures = 0
+    total_mass = 0.0
+    for result in run_designs(estimate.estimate_design, designs, args.jobs, REPO_ROOT, density, samples):
+        for line in estimate.report_lines(result):
+            print(line, flush=True)
+        total_mass += sum(part.mass for part in result.parts)
+        if not result.ok:
+            failures += 1
+    print(f'{total_mass:.1f} g of filament at {density} g/cm3 for {len(designs) - failures} designs')
+    return 1 if failures else 0
+
+
+def voxelize_command(args):
+    # Designs run one at a time here; the parallelism is across blocks of each grid.
+    from utilities.build import design_outputs
+    from utilities.primitives import UnsupportedGeometry
+    from utilities.voxels import DEFAULT_VOXEL, voxelize
+
+    size = args.voxel if args.voxel is not None else DEFAULT_VOXEL
+    designs = select_designs(discover_designs(), args.designs)
+    output_directory = os.path.abspath(args.output or os.environ.get('SCAD_DIRECTORY', '.'))
+    os.makedirs(output_directory, exist_ok=True)
+    if args.resolution:
+        os.environ['SCAD_RESOLUTION'] = args.resolution
+    failures = 0
+    for name, path in designs.items():
+        try:
+            outputs = design_outputs(path)
+        except BaseException:
+            print(f'{name:50} FAILED: ' + traceback.format_exc().strip().splitlines()[-1], flush=True)
+            failures += 1
+            continue
+        for output, thing in outputs:
+            label = f'{name}/{output}'
+            stem = os.path.join(output_directory, os.path.splitext(output)[0])
+            try:
+                voxels = voxelize(thing, size, stem + '.npy', args.dtype, args.jobs)
+            except UnsupportedGeometry as problem:
+                print(f'{label:64} skipped: {problem}', flush=True)
+                continue
+            with open(stem + '.json', 'w') as description:
+                json.dump({'origin': voxels.origin, 'size': voxels.size}, description)
+            shape = ' x '.join(str(n) for n in voxels.grid.shape)
+            print(f'{label:64} {shape:>20} voxels  {voxels.volume / 1000:10.2f} cm3', flush=True)
+    return 1 if failures else 0
+
+
+def slice_command(args):
+    from utilities import slices
+    from utilities.build import run_designs
+
+    layer = args.layer if args.layer is not None else slices.DEFAULT_LAYER
+    pixel = args.pixel if args.pixel is not None else slices.DEFAULT_PIXEL
+    designs = select_designs(discover_designs(), args.designs)
+    output_directory = os.path.abspath(args.output or os.environ.get('SCAD_DIRECTORY', '.'))
+    os.makedirs(output_directory, exist_ok=True)
+    if args.resolution:
+        os.environ['SCAD_RESOLUTION'] = args.resolution
+    formats = args.format
+    failures = 0
+    for result in run_designs(slices.slice_design, designs, args.jobs, REPO_ROOT, output_directory, layer, pixel,
+                              formats):
+        for line in slices.report_lines(result):
+            print(line, flush=True)
+        if not result.ok:
+            failures += 1
+    print(f'{len(designs) - failures} of {len(designs)} designs sliced')
+    return 1 if failures else 0
+
+
+def bench_command(args):
+    from utilities import benchmark
+    from utilities.build import run_designs
+
+    repeat = args.repeat if args.repeat is not None else benchmark.DEFAULT_REPEAT
+    threshold = args.threshold if args.threshold is not None else benchmark.DEFAULT_THRESHOLD
+    history_file = args.history or benchmark.HISTORY_FILE
+    designs = select_designs(discover_designs(), args.designs)
+    if args.resolution:
+        os.environ['SCAD_RESOLUTION'] = args.resolution
+    settings = benchmark.benchmark_settings(args.deduplicate, args.passes)
+    results = []
+    for result in run_designs(benchmark.benchmark_design, designs, args.jobs, REPO_ROOT, repeat, settings):
+        print(benchmark.report_line(result), flush=True)
+        results.append(result)
+    history = benchmark.load_history(history_file)
+    problems = benchmark.regressions(history, results, settings, threshold)
+    if args.save:
+        benchmark.save_history(history + [benchmark.run_record(results, settings)], history_file)
+    failures = [result for result in results if not result.ok]
+    for problem in problems:
+        print(f'REGRESSION {problem}')
+    print(f'{len(results) - len(failures)} of {len(designs)} designs benchmarked, {len(problems)} regressions')
+    return 1 if failures or problems else 0
+
+
+def complexity_command(args):
+    from utilities import complexity
+    from utilities.build import run_designs
+
+    limit = args.limit if args.limit is not None else complexity.DEFAULT_LIMIT
+    costs_file = args.costs or complexity.COSTS_FILE
+    designs = select_designs(discover_designs(), args.designs)
+    if args.resolution:
+        os.environ['SCAD_RESOLUTION'] = args.resolution
+    samples = complexity.load_samples(costs_file)
+    model = complexity.fit_model(samples)
+    # Recorded timings are only comparable one render at a time.
+    jobs = args.jobs if args.jobs is not None or not args.record else 1
+    failures = 0
+    flagged = 0
+    results = []
+    for result in run_designs(complexity.analyse_design, designs, jobs, REPO_ROOT, model, args.record):
+        for line in complexity.report_lines(result, limit):
+            print(line, flush=True)
+        flagged += sum(part.predicted > limit for part in result.parts)
+        results.append(result)
+        if not result.ok:
+            failures += 1
+    if args.record:
+        recorded = complexity.cost_samples(results)
+        complexity.save_samples(samples + recorded, costs_file)
+        print(f'{len(recorded)} render timings recorded, {len(samples) + len(recorded)} in total')
+    print(f'{len(designs) - failures} of {len(designs)} designs analysed, {flagged} parts over {limit:.0f}s')
+    return 1 if failures or flagged else 0
+
+
+def add_build_options(parser):
+    parser.add_argument('-o', '--output', default=None, help='output directory (default: $SCAD_DIRECTORY)')
+    parser.add_argument('--deduplicate', action='store_true', help='emit repeated subtrees as SCAD modules')
+    parser.add_argument('--library', action='store_true',
+                        help='write shared and repeated subtrees once to lib/*.scad files that outputs use<>')
+    parser.add_argument('--passes', default=None, help='comma separated optimisation passes, e.g. fold,flatten,cull')
+    parser.add_argument('--stl', action='store_true',
+                        help='also write binary STL with the NumPy mesh engine where the design allows')
+    parser.add_argument('--bake', action='store_true',
+                        help='render baked() subtrees once to cached STLs with OpenSCAD and import() them')
+    parser.add_argument('--resolution', choices=sorted(PROFILES), default=None,
+                        help='facet resolution profile (default: $SCAD_RESOLUTION or production)')
+
+
+def add_export_options(parser):
+    parser.add_argument('--renderer', default=None, help='OpenSCAD binary (default: $OPENSCAD or openscad)')
+    parser.add_argument('--timeout', type=float, default=None, help='seconds per render attempt (default: 600)')
+    parser.add_argument('--retries', type=int, default=None, help='extra attempts after a failed render (default: 1)')
+    parser.add_argument('--cache', default=None, help='cache directory (default: $SCAD_CACHE or .cache)')
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog='print3d')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help='list the designs without importing them')
+    list_parser.add_argument('designs', nargs='*', help='only list designs whose name contains one of these')
+    list_parser.add_argument('--outputs', action='store_true', help='also list the files each design saves')
+    list_parser.set_defaults(func=list_command)
+
+    show_parser = subparsers.add_parser('show', help="show designs' parameters, builders and outputs from their source")
+    show_parser.add_argument('designs', nargs='+', help='designs whose name contains one of these')
+    show_parser.set_defaults(func=show_command)
+
+    build_parser = subparsers.add_parser('build', help='render every design module in parallel')
+    build_parser.add_argument('designs', nargs='*', help='only build designs whose name contains one of these')
+    build_parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    add_build_options(build_parser)
+    build_parser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='DIR',
+                              help='profile the part builders, writing folded stacks and a table to DIR '
+                                   '(default: ./profile, or $SCAD_PROFILE)')
+    build_parser.add_argument('--export', action='store_true', help='also export every output to STL with OpenSCAD')
+    add_export_options(build_parser)
+    build_parser.set_defaults(func=build_command)
+
+    export_parser = subparsers.add_parser('export', help='render .scad files to STL with a pool of OpenSCAD processes')
+    export_parser.add_argument('paths', nargs='*', help='.scad files or directories of them (default: $SCAD_DIRECTORY)')
+    export_parser.add_argument('-j', '--jobs', type=int, default=None, help='renderer processes (default: cpu count)')
+    export_parser.add_argument('-o', '--output', default=None, help='STL directory (default: next to each .scad)')
+    add_export_options(export_parser)
+    export_parser.set_defaults(func=export_command)
+
+    cache_parser = subparsers.add_parser('cache', help='show the size of the render cache, shrink or clear it')
+    cache_parser.add_argument('--cache', default=None, help='cache directory (default: $SCAD_CACHE or .cache)')
+    cache_parser.add_argument('--limit', default=None,
+                              help='evict down to this size, e.g. 500M (default: $SCAD_CACHE_LIMIT or 2G)')
+    cache_parser.add_argument('--clear', action='store_true', help='delete every entry')
+    cache_parser.set_defaults(func=cache_command)
+
+    watch_parser = subparsers.add_parser('watch', help='rebuild designs whenever they or anything they import change')
+    watch_parser.add_argument('designs', nargs='*', help='only watch designs whose name contains one of these')
+    watch_parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    watch_parser.add_argument('--interval', type=float, default=0.5, help='seconds between polls (default: 0.5)')
+    watch_parser.add_argument('--no-initial', dest='initial', action='store_false',
+                              help='skip the full build on start and only build what changes')
+    add_build_options(watch_parser)
+    watch_parser.set_defaults(func=watch_command)
+
+    variants_parser = subparsers.add_parser('make', help='build declared design variants, with argument overrides')
+    variants_parser.add_argument('variants', nargs='*',
+                                 help='design/variant names: globs match whole names, anything else substrings')
+    variants_parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                                 help='override a builder argument, e.g. thickness=3mm or opening_diameter=1/4in')
+    variants_parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    add_build_options(variants_parser)
+    variants_parser.set_defaults(func=make_command)
+
+    estimate_parser = subparsers.add_parser('estimate', help='estimate volume, filament mass and size of every output')
+    estimate_parser.add_argument('designs', nargs='*', help='only estimate designs whose name contains one of these')
+    estimate_parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    estimate_parser.add_argument('--density', type=float, default=None,
+                                 help='filament density in g/cm3 (default: 1.24, PLA)')
+    estimate_parser.add_argument('--samples', type=int, default=None,
+                                 help='Monte-Carlo samples where boolean operands overlap')
+    estimate_parser.add_argument('--resolution', choices=sorted(PROFILES), default=None,
+                                 help='facet resolution profile used when building the parts')
+    estimate_parser.set_defaults(func=estimate_command)
+
+    slice_parser = subparsers.add_parser('slice', help='write layer cross-sections of every output')
+    slice_parser.add_argument('designs', nargs='*', help='only slice designs whose name contains one of these')
+    slice_parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    slice_parser.add_argument('-o', '--output', default=None, help='output directory (default: $SCAD_DIRECTORY)')
+    slice_parser.add_argument('--layer', type=float, default=None,
+                              help='layer thickness in mm (default: 0.2)')
+    slice_parser.add_argument('--pixel', type=float, default=None,
+                              help='contour sampling step in mm (default: 0.2)')
+    slice_parser.add_argument('--format', type=slice_formats, default=['svg'],
+                              help='comma separated output formats: svg, npz')
+    slice_parser.add_argument('--resolution', choices=sorted(PROFILES), default=None,
+                              help='facet resolution profile used when building the parts')
+    slice_parser.set_defaults(func=slice_command)
+
+    bench_parser = subparsers.add_parser('bench', help='benchmark every design and check for regressions')
+    bench_parser.add_argument('designs', nargs='*', help='only benchmark designs whose name contains one of these')
+    bench_parser.add_argument('-j', '--jobs', type=int, default=1,
+                              help='worker processes (default: 1, parallel runs disturb the timings)')
+    bench_parser.add_argument('--repeat', type=int, default=None, help='timing runs per design, best kept (default: 3)')
+    bench_parser.add_argument('--threshold', type=float, default=None,
+                              help='fail when a metric grows by more than this fraction of its baseline (default: 0.25)')
+    bench_parser.add_argument('--history', default=None, help='JSON history file (default: .benchmarks/history.json)')
+    bench_parser.add_argument('--no-save', dest='save', action='store_false', help='do not add this run to the history')
+    bench_parser.add_argument('--deduplicate', action='store_true', default=None,
+                              help='render repeated subtrees as SCAD modules')
+    bench_parser.add_argument('--passes', default=None, help='comma separated optimisation passes')
+    bench_parser.add_argument('--resolution', choices=sorted(PROFILES), default=None,
+                              help='facet resolution profile (default: $SCAD_RESOLUTION or production)')
+    bench_parser.set_defaults(func=bench_command)
+
+    complexity_parser = subparsers.add_parser('complexity', help='report CSG complexity and predicted render time')
+    complexity_parser.add_argument('designs', nargs='*', help='only analyse designs whose name contains one of these')
+    complexity_parser.add_argument('-j', '--jobs', type=int, default=None,
+                                   help='worker processes (default: cpu count, 1 with --record)')
+    complexity_parser.add_argument('--limit', type=float, default=None,
+                                   help='fail parts predicted to take longer than this many seconds (default: 60)')
+    complexity_parser.add_argument('--record', action='store_true',
+                                   help='also render every part with $OPENSCAD and record the timings for the fit')
+    complexity_parser.add_argument('--costs', default=None,
+                                   help='JSON file of recorded timings (default: .benchmarks/render_costs.json)')
+    complexity_parser.add_argument('--resolution', choices=sorted(PROFILES), default=None,
+                                   help='facet resolution profile used when building the parts')
+    complexity_parser.set_defaults(func=complexity_command)
+
+    voxelize_parser = subparsers.add_parser('voxelize', help='write a .npy voxel grid of every output')
+    voxelize_parser.add_argument('designs', nargs='*', help='only voxelize designs whose name contains one of these')
+    voxelize_parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    voxelize_parser.add_argument('-o', '--output', default=None, help='output directory (default: $SCAD_DIRECTORY)')
+    voxelize_parser.add_argument('--voxel', type=float, default=None, help='voxel edge in mm (default: 0.5)')
+    voxelize_parser.add_argument('--dtype', choices=['bool', 'uint8'], default='bool', help='grid element type')
+    voxelize_parser.add_argument('--resolution', choices=sorted(PROFILES), default=None,
+                                 help='facet resolution profile used when building the parts')
+    voxelize_parser.set_defaults(func=voxelize_command)
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
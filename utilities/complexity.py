@@ -0,0 +1,249 @@
+import math
+import os
+import subprocess
+import tempfile
+import time
+import traceback
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utilities import file_utilities
+from utilities.benchmark import load_history, save_history
+from utilities.build import REPO_ROOT, design_outputs
+from utilities.export import openscad_binary
+from utilities.patterns import expand_patterns
+from utilities.primitives import DEFAULT_FA, fragments, radii, segments
+from utilities.tree_utilities import unique_nodes
+
+# Static render cost of a CSG tree.  Facet counts follow OpenSCAD: an explicit segments
+# ($fn) wins, otherwise $fa/$fs defaults decide from the radius.  2D shapes count their
+# edges, which the extrusions turn into faces.  CGAL's booleans cost roughly the facets
+# they take in, so every boolean charges the facets under it (deep trees pay for each
+# level), and a minkowski charges the product of its operands.  Predicted seconds are a
+# linear model of those features, fitted to OpenSCAD timings recorded with --record.
+
+COSTS_FILE = os.path.join(REPO_ROOT, '.benchmarks', 'render_costs.json')
+DEFAULT_LIMIT = 60.0  # seconds
+DEFAULT_TIMEOUT = 1800.0
+GLYPH_EDGES = 40  # outline edges per character of text
+BOOLEANS = ['union', 'intersection', 'difference']
+FEATURES = ['primitives', 'boolean_facets', 'minkowski_work']
+# Rough CGAL figures, used until enough timings are recorded to fit our own.
+DEFAULT_MODEL = {'intercept': 0.1, 'primitives': 0.002, 'boolean_facets': 2e-4, 'minkowski_work': 2e-3}
+MIN_SAMPLES = 2 * (len(FEATURES) + 1)
+
+
+class Complexity(NamedTuple):
+    primitives: int = 0
+    tree_nodes: int = 0
+    boolean_depth: int = 0
+    difference_operands: int = 0
+    facets: int = 0
+    boolean_facets: int = 0
+    minkowski_work: int = 0
+    minkowski: int = 0
+    hull: int = 0
+    text: int = 0
+
+
+class PartComplexity(NamedTuple):
+    output: str
+    complexity: Complexity
+    predicted: float
+    rendered: Optional[float] = None
+    problem: Optional[str] = None
+
+
+class ComplexityResult(NamedTuple):
+    design: str
+    seconds: float
+    error: Optional[str] = None
+    parts: Tuple[PartComplexity, ...] = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def primitive_facets(node):
+    # Faces of a 3D primitive or edges of a 2D one; None for anything else.
+    params = node.params
+    if node.name == 'cube':
+        return 6
+    if node.name == 'cylinder':
+        return fragments(max(radii(params)), segments(params)) + 2
+    if node.name == 'sphere':
+        count = fragments(radii(params)[0], segments(params))
+        return count * ((count + 1) // 2)
+    if node.name == 'circle':
+        return fragments(radii(params)[0], segments(params))
+    if node.name == 'square':
+        return 4
+    if node.name == 'polygon':
+        return len(params.get('points') or [])
+    if node.name == 'polyhedron':
+        return len(params.get('faces') or params.get('triangles') or [])
+    if node.name == 'text':
+        return GLYPH_EDGES * len(str(params.get('text') or ''))
+    return None
+
+
+def complexity(thing):
+    thing = expand_patterns(thing)
+    order = unique_nodes(thing)
+    # Per distinct node: primitives, facets and boolean depth of its subtree, and the
+    # boolean, minkowski and counted-node totals charged inside it.
+    below = {}
+    for node in order:
+        children = [below[id(child)] for child in node.children]
+        if node.modifier in ['%', '*']:
+            below[id(node)] = Complexity()
+            continue
+        totals = Complexity(*(sum(values) for values in zip(Complexity(), *children)))
+        facets = primitive_facets(node)
+        if facets is not None:
+            totals = totals._replace(primitives=totals.primitives + 1, facets=totals.facets + facets)
+        elif node.name == 'linear_extrude':
+            slices = node.params.get('slices') or 1
+            totals = totals._replace(facets=totals.facets * slices + 2 * totals.primitives)
+        elif node.name == 'rotate_extrude':
+            totals = totals._replace(facets=totals.facets * fragments(0, segments(node.params) or 360 // DEFAULT_FA))
+        counted = [child for child in node.children if below[id(child)].facets]
+        depth = max([child.boolean_depth for child in children], default=0)
+        if node.name in BOOLEANS + ['minkowski'] and len(counted) > 1:
+            depth += 1
+            totals = totals._replace(boolean_facets=totals.boolean_facets + totals.facets)
+        if node.name == 'difference':
+            totals = totals._replace(difference_operands=totals.difference_operands + max(len(counted) - 1, 0))
+        if node.is_hole:
+            totals = totals._replace(difference_operands=totals.difference_operands + 1)
+        if node.name == 'minkowski':
+            work = math.prod(below[id(child)].facets for child in counted) if len(counted) > 1 else 0
+            totals = totals._replace(minkowski=totals.minkowski + 1, minkowski_work=totals.minkowski_work + work)
+        if node.name == 'hull':
+            totals = totals._replace(hull=totals.hull + 1)
+        if node.name == 'text':
+            totals = totals._replace(text=totals.text + 1)
+        below[id(node)] = totals._replace(tree_nodes=totals.tree_nodes + 1, boolean_depth=depth)
+    return below[id(thing)]
+
+
+def features(measures):
+    return [1.0] + [float(getattr(measures, name)) for name in FEATURES]
+
+
+def predict(measures, model=None):
+    model = model or DEFAULT_MODEL
+    return sum(model[name] * value for name, value in zip(['intercept'] + FEATURES, features(measures)))
+
+
+def fit_model(samples):
+    # Least squares on relative error, since timings span milliseconds to minutes, with
+    # negative coefficients dropped and the rest refitted so costs never go down as a
+    # tree grows.  Falls back to DEFAULT_MODEL without enough samples.
+    samples = [sample for sample in samples if sample.get('seconds', 0) > 0]
+    if len(samples) < MIN_SAMPLES:
+        return dict(DEFAULT_MODEL)
+    names = ['intercept'] + FEATURES
+    matrix = np.array([features(Complexity(**{name: sample.get(name, 0) for name in FEATURES})) for sample in samples])
+    seconds = np.array([sample['seconds'] for sample in samples])
+    weights = 1 / np.maximum(seconds, 0.1)
+    active = np.ones(len(names), dtype=bool)
+    coefficients = np.zeros(len(names))
+    while active.any():
+        columns = matrix[:, active] * weights[:, None]
+        scale = np.maximum(np.abs(columns).max(axis=0), 1e-12)
+        solution = np.linalg.lstsq(columns / scale, seconds * weights, rcond=None)[0] / scale
+        coefficients[:] = 0
+        coefficients[active] = solution
+        if (solution >= 0).all():
+            break
+        active[np.flatnonzero(active)[solution < 0]] = False
+    return dict(zip(names, coefficients.tolist()))
+
+
+def time_render(thing, binary=None, timeout=DEFAULT_TIMEOUT):
+    # Wall time for OpenSCAD to render thing to STL.
+    with tempfile.TemporaryDirectory() as scratch:
+        source = os.path.join(scratch, 'part.scad')
+        with open(source, 'w') as output:
+            output.write(file_utilities.render_scad(thing))
+        start = time.perf_counter()
+        subprocess.run(
+            [binary or openscad_binary(), '-o', os.path.join(scratch, 'part.stl'), source],
+            check=True, capture_output=True, timeout=timeout,
+        )
+        return time.perf_counter() - start
+
+
+def analyse_part(output, thing, model=None, record=False, binary=None, timeout=DEFAULT_TIMEOUT):
+    measures = complexity(thing)
+    part = PartComplexity(output, measures, predict(measures, model))
+    if record:
+        try:
+            part = part._replace(rendered=time_render(thing, binary, timeout))
+        except (OSError, subprocess.SubprocessError) as problem:
+            part = part._replace(problem=f'render failed: {problem}')
+    return part
+
+
+def analyse_design(name, path, model=None, record=False, binary=None, timeout=DEFAULT_TIMEOUT):
+    start = time.perf_counter()
+    error = None
+    parts = []
+    try:
+        parts = [analyse_part(output, thing, model, record, binary, timeout) for output, thing in design_outputs(path)]
+    except BaseException:
+        error = traceback.format_exc()
+    return ComplexityResult(name, time.perf_counter() - start, error, tuple(parts))
+
+
+def cost_samples(results):
+    return [
+        dict(part.complexity._asdict(), design=result.design, output=part.output, seconds=part.rendered)
+        for result in results
+        for part in result.parts
+        if part.rendered is not None
+    ]
+
+
+def load_samples(filename=COSTS_FILE):
+    return load_history(filename)
+
+
+def save_samples(samples, filename=COSTS_FILE):
+    save_history(samples, filename)
+
+
+def warnings(part, limit=DEFAULT_LIMIT):
+    messages = []
+    if part.predicted > limit:
+        messages.append(f'predicted {part.predicted:.0f}s over the {limit:.0f}s limit')
+    if part.complexity.minkowski:
+        messages.append(f'{part.complexity.minkowski} minkowski')
+    if part.complexity.text:
+        messages.append(f'{part.complexity.text} text')
+    if part.problem:
+        messages.append(part.problem)
+    return messages
+
+
+def report_lines(result, limit=DEFAULT_LIMIT):
+    if not result.ok:
+        return [f'{result.design:50} FAILED: ' + result.error.strip().splitlines()[-1]]
+    lines = []
+    for part in result.parts:
+        label = f'{result.design}/{part.output}'
+        measures = part.complexity
+        line = (
+            f'{label:64} {measures.primitives:6} prims {measures.facets:9} facets  depth {measures.boolean_depth:3}  '
+            f'{measures.difference_operands:5} cut  ~{part.predicted:8.2f}s'
+        )
+        if part.rendered is not None:
+            line += f' (took {part.rendered:.2f}s)'
+        messages = warnings(part, limit)
+        if messages:
+            line += '  ' + ', '.join(messages)
+        lines.append(line)
+    return lines
@@ -0,0 +1,102 @@
+from solid import cube, translate, union
+
+from utilities.bounds import bounds, box_intersection, overlaps
+from utilities.matrices import node_matrix
+from utilities.tree_utilities import copy_node, nodes_with_holes, unique_nodes
+
+# Shrunk cutters keep this fraction of the target's size as clearance around it, so their
+# faces never land on the target's own surfaces.
+SHRINK_MARGIN = 0.01
+
+
+def axis_aligned_box(node, cache):
+    # World box of a cube under translate and scale only, or None for anything else.
+    top = node
+    while node.children:
+        if len(node.children) != 1 or node.modifier or node.is_hole:
+            return None
+        matrix = node_matrix(node)
+        if matrix is None or any(matrix[row][column] for row in range(3) for column in range(3) if row != column):
+            return None
+        node = node.children[0]
+    if node.name != 'cube' or node.modifier or node.is_hole:
+        return None
+    return bounds(top, cache)
+
+
+def shrunk(node, target, cache):
+    box = axis_aligned_box(node, cache)
+    if box is None or target is None or target.empty:
+        return node
+    margin = SHRINK_MARGIN * max(target.size) + 0.01
+    clipped = box_intersection([box, target.expanded(margin)])
+    if clipped.empty or clipped.size == box.size:
+        return node
+    return translate(clipped.low)(cube(clipped.size))
+
+
+def useful_cuts(cuts, target, cache, holey):
+    result = []
+    for cut in cuts:
+        if cut.modifier or id(cut) in holey:
+            result.append(cut)
+            continue
+        if cut.name == 'union':
+            kept = [child for child in cut.children if overlaps(target, bounds(child, cache))]
+            if not kept:
+                continue
+            if len(kept) < len(cut.children):
+                cut = union()(kept)
+        if overlaps(target, bounds(cut, cache)):
+            result.append(shrunk(cut, target, cache))
+    return result
+
+
+def culled_intersection(node, children, cache):
+    boxes = {id(child): bounds(child, cache) for child in children}
+    region = box_intersection(boxes.values())
+    if region is not None and region.empty:
+        return union()
+    kept = list(children)
+    for child in children:
+        others = box_intersection(boxes[id(other)] for other in kept if other is not child)
+        box = axis_aligned_box(child, cache)
+        if box is not None and others is not None and box.contains(others):
+            kept.remove(child)
+    if not kept:
+        return children[0]
+    kept = [
+        shrunk(child, box_intersection(boxes[id(other)] for other in kept if other is not child), cache)
+        for child in kept
+    ]
+    return kept[0] if len(kept) == 1 else copy_node(node, kept)
+
+
+def cull_booleans(root):
+    # Bounding boxes let us drop difference cutters that miss the target entirely and
+    # intersection operands that contain everything else, and trim oversized box cutters.
+    # Subtrees holding holes or parts are left alone since they're rendered at the root.
+    order = unique_nodes(root)
+    holey_originals = nodes_with_holes(order)
+    cache = {}
+    holey = set()
+    rebuilt = {}
+    for node in order:
+        if not node.children:
+            result = node
+        else:
+            children = [rebuilt[id(child)] for child in node.children]
+            if node.modifier or node.is_hole or node.is_part_root or (
+                    id(node) in holey_originals and node.name != 'difference'):
+                result = copy_node(node, children)
+            elif node.name == 'difference':
+                cuts = useful_cuts(children[1:], bounds(children[0], cache), cache, holey)
+                result = copy_node(node, [children[0]] + cuts) if cuts else children[0]
+            elif node.name == 'intersection':
+                result = culled_intersection(node, children, cache)
+            else:
+                result = copy_node(node, children)
+        if id(node) in holey_originals:
+            holey.add(id(result))
+        rebuilt[id(node)] = result
+    return rebuilt[id(root)]
@@ -0,0 +1,172 @@
+import contextlib
+import os
+import shutil
+import threading
+import time
+
+from utilities.registry import REPO_ROOT
+from utilities.schema import number
+
+try:
+    import fcntl
+except ImportError:  # no flock on Windows; writes are still atomic, just not serialised
+    fcntl = None
+
+# One content-addressed cache on disk for the expensive things builds and exports
+# produce, shared by every process on the machine.  An entry is a file named after its
+# key, a hash of everything that decides its contents.  Entries are written under a
+# temporary name and renamed into place, so readers only ever see whole files.  Reading
+# an entry refreshes its modification time, and whenever the cache grows past its limit
+# the least recently used entries are deleted.
+
+CACHE_DIRECTORY = os.path.join(REPO_ROOT, '.cache')
+DEFAULT_LIMIT = 2 * 2 ** 30  # bytes
+SIZE_SUFFIXES = {
+    '': 1, 'b': 1, 'k': 2 ** 10, 'kb': 2 ** 10, 'm': 2 ** 20, 'mb': 2 ** 20, 'g': 2 ** 30, 'gb': 2 ** 30,
+}
+LOCK_FILE = '.lock'
+TEMPORARY = '.tmp'
+STALE_TEMPORARY = 3600  # seconds before an abandoned temporary file is removed
+
+
+def size(text):
+    return int(number(text, SIZE_SUFFIXES))
+
+
+def temporary_name(path):
+    # Unique per thread, keeping the extension for tools that go by it.
+    stem, extension = os.path.splitext(path)
+    return f'{stem}.{os.getpid()}.{threading.get_ident()}{TEMPORARY}{extension}'
+
+
+@contextlib.contextmanager
+def locked(path):
+    # Exclusive lock on the file at path, held across processes until the block ends.
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+@contextlib.contextmanager
+def replacing(path):
+    # Yields a temporary name to write; it replaces path when the block succeeds.
+    temporary = temporary_name(path)
+    try:
+        yield temporary
+        os.replace(temporary, path)
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(temporary)
+
+
+def write_atomically(path, content):
+    with replacing(path) as temporary:
+        with open(temporary, 'wb' if isinstance(content, bytes) else 'w') as output:
+            output.write(content)
+
+
+def copy_atomically(source, target):
+    with replacing(target) as temporary:
+        shutil.copyfile(source, temporary)
+
+
+class DiskCache:
+
+    def __init__(self, directory=None, limit=None):
+        self.directory = directory or os.environ.get('SCAD_CACHE') or CACHE_DIRECTORY
+        if limit is None:
+            limit = size(os.environ['SCAD_CACHE_LIMIT']) if os.environ.get('SCAD_CACHE_LIMIT') else DEFAULT_LIMIT
+        self.limit = limit
+
+    def path(self, key, suffix=''):
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def temporary(self, key, suffix=''):
+        # Somewhere to build an entry before put_file(..., move=True).
+        path = self.path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return temporary_name(path)
+
+    def get(self, key, suffix=''):
+        # Path of the entry, or None.  A hit counts as a use.
+        path = self.path(key, suffix)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def fetch(self, key, target, suffix=''):
+        # Copy the entry to target, returning False on a miss.
+        path = self.get(key, suffix)
+        if path is None:
+            return False
+        try:
+            copy_atomically(path, target)
+        except FileNotFoundError:  # evicted meanwhile
+            return False
+        return True
+
+    def put(self, key, content, suffix=''):
+        path = self.path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomically(path, content)
+        self.evict()
+        return path
+
+    def put_file(self, key, source, suffix='', move=False):
+        # move renames source into the cache, so it must be on the same filesystem.
+        path = self.path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if move:
+            os.replace(source, path)
+        else:
+            copy_atomically(source, path)
+        self.evict()
+        return path
+
+    def scan(self):
+        # (last use, size, path) of every entry, least recently used first, and the
+        # paths of temporary files nobody has touched for a while.
+        entries, stale = [], []
+        cutoff = time.time_ns() - STALE_TEMPORARY * 10 ** 9
+        for directory, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                path = os.path.join(directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                if TEMPORARY in name:
+                    if status.st_mtime_ns < cutoff:
+                        stale.append(path)
+                elif name != LOCK_FILE:
+                    entries.append((status.st_mtime_ns, status.st_size, path))
+        return sorted(entries), stale
+
+    def evict(self):
+        # Delete least recently used entries until the cache fits its limit.  Returns
+        # the number deleted.
+        if not os.path.isdir(self.directory):
+            return 0
+        with locked(os.path.join(self.directory, LOCK_FILE)):
+            entries, stale = self.scan()
+            total = sum(length for _, length, _ in entries)
+            deleted = 0
+            for path in stale:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+            for _, length, path in entries:
+                if total <= self.limit:
+                    break
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+                    deleted += 1
+                total -= length
+        return deleted
+
+    def clear(self):
+        with contextlib.suppress(OSError):
+            shutil.rmtree(self.directory)
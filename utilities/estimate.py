@@ -0,0 +1,178 @@
+import math
+import time
+import traceback
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utilities.bounds import bounds, box_intersection, overlaps
+from utilities.build import design_outputs
+from utilities.flattening import flatten_booleans
+from utilities.matrices import node_matrix
+from utilities.patterns import expand_patterns
+from utilities.primitives import PASS_THROUGH, UnsupportedGeometry, radii
+from utilities.sdf import chunked, compile_tree
+from utilities.tree_utilities import nodes_with_holes, unique_nodes
+
+# Part volume straight from the CSG tree: analytic wherever boolean operands can't
+# overlap, Monte-Carlo sampling of the signed distance function where they might.
+# Volumes are in mm^3, masses in grams.
+
+DEFAULT_DENSITY = 1.24  # g/cm^3, PLA
+DEFAULT_SAMPLES = 200000
+Z_SCORE = 1.96  # errors are stated at 95% confidence
+
+
+class Volume(NamedTuple):
+    value: float
+    error: float = 0.0
+
+
+class PartEstimate(NamedTuple):
+    output: str
+    volume: float = 0.0
+    error: float = 0.0
+    mass: float = 0.0
+    size: Tuple[float, ...] = ()
+    problem: Optional[str] = None
+
+
+class EstimateResult(NamedTuple):
+    design: str
+    seconds: float
+    error: Optional[str] = None
+    parts: Tuple[PartEstimate, ...] = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def primitive_volume(node):
+    # Round solids are measured as true circles, as the sampled signed distance sees
+    # them, so a part's volume doesn't depend on which path measured it.
+    params = node.params
+    if node.name == 'cube':
+        size = params['size'] if params.get('size') is not None else 1
+        return math.prod(size) if isinstance(size, (list, tuple)) else size ** 3
+    if node.name == 'cylinder':
+        r1, r2 = radii(params)
+        height = params['h'] if params.get('h') is not None else 1
+        return math.pi * height / 3 * (r1 * r1 + r1 * r2 + r2 * r2)
+    if node.name == 'sphere':
+        return 4 / 3 * math.pi * radii(params)[0] ** 3
+    return None
+
+
+def disjoint(boxes):
+    # True when no two of the boxes overlap in volume.  None boxes are unknown.
+    if any(box is None for box in boxes):
+        return False
+    boxes = [box for box in boxes if not box.empty]
+    if len(boxes) < 2:
+        return True
+    low = np.array([box.low for box in boxes])
+    high = np.array([box.high for box in boxes])
+    overlapping = np.all((low[:, None] < high[None, :]) & (low[None, :] < high[:, None]), axis=2)
+    np.fill_diagonal(overlapping, False)
+    return not overlapping.any()
+
+
+def sampled_volume(node, samples, rng):
+    box = bounds(node)
+    if box is None:
+        raise UnsupportedGeometry(f'no bounding box for {node.name}() to sample in')
+    if box.empty or box.volume == 0:
+        return Volume(0.0)
+    points = rng.uniform(box.low, box.high, (samples, 3))
+    fraction = np.count_nonzero(chunked(compile_tree(node), points) <= 0) / samples
+    spread = math.sqrt(max(fraction * (1 - fraction), 1 / samples) / samples)
+    return Volume(fraction * box.volume, Z_SCORE * spread * box.volume)
+
+
+def summed(volumes):
+    volumes = list(volumes)
+    return Volume(sum(volume.value for volume in volumes), math.sqrt(sum(volume.error ** 2 for volume in volumes)))
+
+
+def node_volume(node, samples, rng, cache, boxes):
+    key = id(node)
+    if key in cache:
+        return cache[key]
+    if node.modifier in ['%', '*']:
+        result = Volume(0.0)
+    elif primitive_volume(node) is not None:
+        result = Volume(primitive_volume(node))
+    else:
+        matrix = node_matrix(node)
+        if node.name not in ['union', 'intersection', 'difference'] + PASS_THROUGH and matrix is None:
+            raise UnsupportedGeometry(f'{node.name}() volume can not be estimated')
+        child_boxes = [bounds(child, boxes) for child in node.children]
+        if not node.children:
+            result = Volume(0.0)
+        elif node.name == 'difference':
+            if any(overlaps(child_boxes[0], box) for box in child_boxes[1:]):
+                result = sampled_volume(node, samples, rng)
+            else:
+                result = node_volume(node.children[0], samples, rng, cache, boxes)
+        elif node.name == 'intersection' and len(node.children) > 1:
+            common = box_intersection(child_boxes)
+            if common is not None and common.empty:
+                result = Volume(0.0)
+            else:
+                result = sampled_volume(node, samples, rng)
+        elif disjoint(child_boxes):
+            result = summed(node_volume(child, samples, rng, cache, boxes) for child in node.children)
+            if matrix is not None:
+                # Children were measured in this node's own frame.
+                scale = abs(np.linalg.det(np.array(matrix, dtype=float)[:3, :3]))
+                result = Volume(result.value * scale, result.error * scale)
+        else:
+            result = sampled_volume(node, samples, rng)
+    cache[key] = result
+    return result
+
+
+def estimate_volume(thing, samples=DEFAULT_SAMPLES, seed=0):
+    thing = flatten_booleans(expand_patterns(thing))
+    rng = np.random.default_rng(seed)
+    if nodes_with_holes(unique_nodes(thing)):
+        # Holes are cut at part roots, far from where they sit in the tree.
+        return sampled_volume(thing, samples, rng)
+    return node_volume(thing, samples, rng, {}, {})
+
+
+def estimate_part(output, thing, density=DEFAULT_DENSITY, samples=DEFAULT_SAMPLES):
+    box = bounds(thing)
+    size = tuple(box.size) if box is not None and not box.empty else ()
+    try:
+        volume = estimate_volume(thing, samples)
+    except UnsupportedGeometry as problem:
+        return PartEstimate(output, size=size, problem=str(problem))
+    return PartEstimate(output, volume.value, volume.error, volume.value / 1000 * density, size)
+
+
+def estimate_design(name, path, density=DEFAULT_DENSITY, samples=DEFAULT_SAMPLES):
+    start = time.perf_counter()
+    error = None
+    parts = []
+    try:
+        parts = [estimate_part(output, thing, density, samples) for output, thing in design_outputs(path)]
+    except BaseException:
+        error = traceback.format_exc()
+    return EstimateResult(name, time.perf_counter() - start, error, tuple(parts))
+
+
+def report_lines(result):
+    if not result.ok:
+        return [f'{result.design:50} FAILED: ' + result.error.strip().splitlines()[-1]]
+    lines = []
+    for part in result.parts:
+        label = f'{result.design}/{part.output}'
+        size = ' x '.join(f'{value:.1f}' for value in part.size) or '?'
+        if part.problem:
+            lines.append(f'{label:64} {"":>24} {size:>24} mm  ({part.problem})')
+        else:
+            volume = f'{part.volume / 1000:.2f} ± {part.error / 1000:.2f} cm3'
+            lines.append(f'{label:64} {volume:>24} {part.mass:8.1f} g {size:>24} mm')
+    return lines
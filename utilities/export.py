@@ -0,0 +1,214 @@
+import hashlib
+import os
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple, Optional
+
+from utilities.disk_cache import DiskCache, copy_atomically
+
+# STL export through OpenSCAD.  Each job runs the renderer binary ($OPENSCAD, or any
+# stand-in taking `-o OUTPUT INPUT` and `--version`) as a subprocess, at most `jobs`
+# at a time, with a timeout per attempt and a few retries.  STLs are kept in the disk
+# cache keyed on the SCAD text, the files it pulls in and the renderer's version, so
+# unchanged files are copied from the cache instead of being rendered again.
+
+DEFAULT_TIMEOUT = 600.0  # seconds per attempt
+DEFAULT_RETRIES = 1
+# include<>/use<> of .scad files (library modules) and file = "..." of import() and
+# surface() (baked STLs).
+INCLUDED = re.compile(r'\b(?:include|use)\s*<([^>]+)>')
+IMPORTED = re.compile(r'\bfile\s*=\s*"([^"]+)"')
+
+
+class RenderError(Exception):
+    pass
+
+
+class Cancelled(RenderError):
+    pass
+
+
+class ExportResult(NamedTuple):
+    source: str
+    target: str
+    seconds: float
+    cached: bool = False
+    attempts: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def openscad_binary():
+    return os.environ.get('OPENSCAD', 'openscad')
+
+
+class Renderer:
+
+    def __init__(self, binary=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.binary = binary or openscad_binary()
+        self.timeout = timeout
+        self.retries = retries
+        self.cancelled = threading.Event()
+        self.processes = set()
+        self.lock = threading.Lock()
+        self._version = None
+
+    def version(self):
+        # OpenSCAD prints its version on stderr.
+        if self._version is None:
+            try:
+                completed = subprocess.run([self.binary, '--version'], capture_output=True, text=True, timeout=60)
+            except (OSError, subprocess.SubprocessError) as problem:
+                raise RenderError(f'{self.binary} --version failed: {problem}') from None
+            self._version = (completed.stdout + completed.stderr).strip()
+            if completed.returncode != 0 or not self._version:
+                raise RenderError(f'{self.binary} --version failed: {self._version or completed.returncode}')
+        return self._version
+
+    def render(self, source, target):
+        # One attempt at rendering source to target.
+        if self.cancelled.is_set():
+            raise Cancelled('cancelled')
+        try:
+            process = subprocess.Popen(
+                [self.binary, '-o', target, source],
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+        except OSError as problem:
+            raise RenderError(str(problem)) from None
+        with self.lock:
+            self.processes.add(process)
+            if self.cancelled.is_set():
+                process.kill()
+        try:
+            _, errors = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise RenderError(f'timed out after {self.timeout:g}s') from None
+        finally:
+            with self.lock:
+                self.processes.discard(process)
+        if self.cancelled.is_set():
+            raise Cancelled('cancelled')
+        if process.returncode != 0:
+            lines = errors.strip().splitlines()
+            raise RenderError(lines[-1] if lines else f'exit status {process.returncode}')
+
+    def cancel(self):
+        # Stop everything: running renders are killed and queued ones fail as cancelled.
+        self.cancelled.set()
+        with self.lock:
+            for process in self.processes:
+                process.kill()
+
+
+def cache_key(text, version, references=()):
+    key = hashlib.sha256(version.encode() + b'\0' + text.encode())
+    for name, digest in references:
+        key.update(f'\0{name}\0{digest}'.encode())
+    return key.hexdigest()
+
+
+def referenced_files(source, text):
+    # (name, content digest) of every file source's text pulls in, and the files those
+    # .scad files pull in, named relative to source's directory so a moved directory
+    # keeps its keys.  Paths resolve against the file naming them, as in OpenSCAD; one
+    # that doesn't exist counts as missing, so creating it later changes the key.
+    top = os.path.dirname(os.path.abspath(source))
+    references, seen = [], set()
+    pending = [(top, text)]
+    while pending:
+        directory, text = pending.pop()
+        names = INCLUDED.findall(text) + IMPORTED.findall(text)
+        for path in sorted(os.path.normpath(os.path.join(directory, name)) for name in names):
+            if path in seen:
+                continue
+            seen.add(path)
+            try:
+                with open(path, 'rb') as referenced:
+                    content = referenced.read()
+            except OSError:
+                references.append((os.path.relpath(path, top), 'missing'))
+                continue
+            references.append((os.path.relpath(path, top), hashlib.sha256(content).hexdigest()))
+            if path.endswith('.scad'):
+                pending.append((os.path.dirname(path), content.decode(errors='replace')))
+    return sorted(references)
+
+
+def export_file(renderer, source, target, cache=None):
+    cache = cache or DiskCache()
+    start = time.perf_counter()
+    attempts = 0
+    temporary = None
+    try:
+        with open(source) as scad:
+            text = scad.read()
+        key = cache_key(text, renderer.version(), referenced_files(source, text))
+        if cache.fetch(key, target, '.stl'):
+            return ExportResult(source, target, time.perf_counter() - start, cached=True)
+        # Rendered next to its cache entry, so it can be renamed in.
+        temporary = cache.temporary(key, '.stl')
+        while True:
+            attempts += 1
+            try:
+                renderer.render(source, temporary)
+                break
+            except Cancelled:
+                raise
+            except RenderError:
+                if attempts > renderer.retries:
+                    raise
+        copy_atomically(temporary, target)
+        cache.put_file(key, temporary, '.stl', move=True)
+    except (OSError, RenderError) as problem:
+        if temporary and os.path.exists(temporary):
+            os.remove(temporary)
+        return ExportResult(source, target, time.perf_counter() - start, attempts=attempts, error=str(problem))
+    return ExportResult(source, target, time.perf_counter() - start, attempts=attempts)
+
+
+def stl_target(source, output_directory=None):
+    stem = os.path.splitext(os.path.basename(source))[0] + '.stl'
+    return os.path.join(output_directory or os.path.dirname(source), stem)
+
+
+def export_stls(sources, output_directory=None, jobs=None, renderer=None, cache=None):
+    # Yield an ExportResult per .scad source as renders finish.  Closing the generator
+    # early, or an interrupt, cancels whatever is still queued or running.
+    renderer = renderer or Renderer()
+    cache = cache or DiskCache()
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if output_directory:
+        os.makedirs(output_directory, exist_ok=True)
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        futures = [
+            executor.submit(export_file, renderer, source, stl_target(source, output_directory), cache)
+            for source in sources
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+    except BaseException:
+        renderer.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def report_line(result, root=None):
+    name = os.path.relpath(result.source, root) if root else result.source
+    if not result.ok:
+        return f'{name:60} FAILED: {result.error}'
+    if result.cached:
+        return f'{name:60} cached'
+    retried = f' ({result.attempts} attempts)' if result.attempts > 1 else ''
+    return f'{name:60} rendered in {result.seconds:.2f}s{retried}'
@@ -1,10 +1,193 @@
+import contextlib
+import hashlib
+import inspect
+import json
 import os
 
-from solid import scad_render_to_file
+import solid
+import solid.solidpython
+import solid.utils
+from solid import scad_render
 
-def save_as_scad(thing, filename, directory=None):
+from utilities.baking import bake_tree
+from utilities.disk_cache import LOCK_FILE, DiskCache, locked, replacing, write_atomically
+from utilities.optimize import optimize
+from utilities.scad_modules import LIBRARY_DIRECTORY, render_with_library, render_with_modules
+
+MANIFEST_DIRECTORY = '.manifest'
+MESH_ENGINE = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name) for name in ['mesh.py', 'primitives.py']]
+
+changed_files = []
+unchanged_files = []
+captured_outputs = None
+
+
+def save_as_scad(thing, filename, directory=None, parameters=None, deduplicate=None, passes=None, stl=None,
+                 source_file=None, bake=None, library=None):
     if directory is None:
         directory = os.environ.get('SCAD_DIRECTORY', '.')
+    if deduplicate is None:
+        deduplicate = bool(os.environ.get('SCAD_DEDUPLICATE'))
+    if stl is None:
+        stl = bool(os.environ.get('SCAD_STL'))
+    if bake is None:
+        bake = bool(os.environ.get('SCAD_BAKE'))
+    if library is None:
+        library = bool(os.environ.get('SCAD_LIBRARY'))
+    if captured_outputs is not None:
+        captured_outputs.append((filename, thing))
+        return False
     output_file = os.path.join(directory, filename)
-    scad_render_to_file(thing, output_file)
+    stl_file = os.path.splitext(output_file)[0] + '.stl'
+    thing = optimize(thing, passes)
+    shape = bake_tree(thing, os.path.dirname(output_file)) if bake else thing
+    if library:
+        rendered, libraries = render_with_library(shape)
+        save_libraries(libraries, os.path.join(os.path.dirname(output_file), LIBRARY_DIRECTORY))
+    else:
+        rendered = render_scad(shape, deduplicate)
+    if source_file is None:
+        source_file = inspect.currentframe().f_back.f_globals.get('__file__')
+    entry = manifest_entry(rendered, source_file, parameters)
+    manifest_file = os.path.join(directory, MANIFEST_DIRECTORY, filename + '.json')
+    # Held while comparing and writing, so concurrent builds of the same output take
+    # turns; the writes are atomic, so readers never see a truncated file.  One lock
+    # serves the whole manifest directory rather than leaving a lock file per output.
+    with locked(os.path.join(os.path.dirname(manifest_file), LOCK_FILE)):
+        previous = read_manifest(manifest_file) or {}
+        same = os.path.exists(output_file) and all(previous.get(key) == value for key, value in entry.items())
+        # Geometry the mesher can't handle is recorded as such, so it isn't retried on
+        # every build until the output or the mesher changes.
+        if same and (not stl or os.path.exists(stl_file) or previous.get('stl') == unsupported_stl()):
+            unchanged_files.append(output_file)
+            return False
+        if not same:
+            write_atomically(output_file, rendered)
+            changed_files.append(output_file)
+        if stl:
+            if save_native_stl(thing, stl_file, entry['output']):
+                changed_files.append(stl_file)
+            else:
+                entry['stl'] = unsupported_stl()
+                if same:
+                    unchanged_files.append(output_file)
+        write_manifest(manifest_file, entry)
+    return True
+
+
+def save_variants(builder, variants, names=None, overrides=None, **options):
+    # Save builder(**arguments) as <name>.scad for each named variant, or just those in
+    # names, with overrides replacing the variants' own arguments.
+    source_file = inspect.getsourcefile(inspect.unwrap(builder))
+    for name, arguments in variants.items():
+        if names is None or name in names:
+            arguments = dict(arguments, **(overrides or {}))
+            save_as_scad(builder(**arguments), name + '.scad', parameters=arguments, source_file=source_file, **options)
+
+
+def save_libraries(libraries, directory):
+    # Library files are named after their content, so one that exists is up to date
+    # unless it was edited by hand.
+    for filename, text in libraries.items():
+        path = os.path.join(directory, filename)
+        try:
+            with open(path) as library:
+                if library.read() == text:
+                    continue
+        except OSError:
+            os.makedirs(directory, exist_ok=True)
+        write_atomically(path, text)
+        changed_files.append(path)
+
+
+def render_scad(thing, deduplicate=False):
+    return render_with_modules(thing) if deduplicate else scad_render(thing)
+
+
+def unsupported_stl():
+    return 'unsupported by mesh engine ' + mesh_engine_digest()[:12]
+
+
+def save_native_stl(thing, stl_file, output_digest):
+    # NumPy is only needed when STL output is asked for.  Meshes are cached on the
+    # rendered SCAD's digest and the mesh engine's source.
+    key = digest(f'{output_digest} {mesh_engine_digest()} stl')
+    cache = DiskCache()
+    if cache.fetch(key, stl_file, '.stl'):
+        return True
+    from utilities.mesh import save_as_stl
+    from utilities.primitives import UnsupportedGeometry
+    try:
+        with replacing(stl_file) as temporary:
+            save_as_stl(thing, temporary, directory='')
+            cache.put_file(key, temporary, '.stl')
+    except UnsupportedGeometry:
+        return False
+    return True
+
+
+def mesh_engine_digest():
+    return digest(' '.join(file_digest(path) for path in MESH_ENGINE))
+
+
+def manifest_entry(rendered, source_file=None, parameters=None):
+    return {
+        'output': digest(rendered),
+        'source': file_digest(source_file) if source_file else None,
+        'parameters': digest(repr(sorted(parameters.items()))) if parameters else None,
+    }
+
+
+def digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def file_digest(path):
+    with open(path, 'rb') as source:
+        return hashlib.sha256(source.read()).hexdigest()
+
+
+def read_manifest(manifest_file):
+    try:
+        with open(manifest_file) as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(manifest_file, entry):
+    os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+    write_atomically(manifest_file, json.dumps(entry, indent=1, sort_keys=True))
+
+
+def reset_change_summary():
+    changed_files.clear()
+    unchanged_files.clear()
+
+
+def change_summary():
+    return list(changed_files), list(unchanged_files)
+
+
+@contextlib.contextmanager
+def capturing_outputs():
+    # Collect the (filename, thing) pairs a design would save, without rendering or
+    # writing anything.  Many designs call solid's scad_render_to_file directly, so that
+    # is swapped out for the duration too.
+    global captured_outputs
+    outputs = []
+    modules = [solid, solid.solidpython, solid.utils]
+    originals = [module.scad_render_to_file for module in modules]
+
+    def capture(scad_object, filepath=None, *args, **kwargs):
+        outputs.append((os.path.basename(filepath or 'output.scad'), scad_object))
 
+    captured_outputs = outputs
+    for module in modules:
+        module.scad_render_to_file = capture
+    try:
+        yield outputs
+    finally:
+        captured_outputs = None
+        for module, original in zip(modules, originals):
+            module.scad_render_to_file = original
@@ -0,0 +1,40 @@
+from utilities.tree_utilities import copy_node, unique_nodes
+
+
+def plain(node, name):
+    return node.name == name and not (node.modifier or node.is_hole or node.is_part_root)
+
+
+def spliced(children, name):
+    result = []
+    for child in children:
+        if plain(child, name):
+            result += child.children
+        else:
+            result.append(child)
+    return result
+
+
+def flattened_children(node, children):
+    if node.name in ['union', 'intersection']:
+        return spliced(children, node.name)
+    if node.name == 'difference' and children:
+        # (a - b) - c is a - b - c, and a - (b + c) is a - b - c as well.
+        base, cuts = children[0], children[1:]
+        if plain(base, 'difference') and base.children:
+            base, cuts = base.children[0], base.children[1:] + cuts
+        return [base] + spliced(cuts, 'union')
+    return children
+
+
+def flatten_booleans(root):
+    # Turn the left-deep binary trees built by chains of +, * and - into single n-ary
+    # union, intersection and difference nodes.
+    flattened = {}
+    for node in unique_nodes(root):
+        if not node.children:
+            flattened[id(node)] = node
+            continue
+        children = [flattened[id(child)] for child in node.children]
+        flattened[id(node)] = copy_node(node, flattened_children(node, children))
+    return flattened[id(root)]
@@ -0,0 +1,51 @@
+from solid import multmatrix, translate, union
+
+from utilities.matrices import cleaned, identity, is_identity, is_translation, multiply, node_matrix, translation_part
+from utilities.tree_utilities import copy_node, unique_nodes
+
+
+def foldable(node):
+    return not (node.modifier or node.is_hole or node.is_part_root) and node_matrix(node) is not None
+
+
+def transform_chain(node):
+    # The run of transforms starting at node, following single children.
+    chain = [node]
+    while len(chain[-1].children) == 1 and foldable(chain[-1].children[0]):
+        chain.append(chain[-1].children[0])
+    return chain
+
+
+def compact(value):
+    return int(value) if float(value).is_integer() else value
+
+
+def transform_node(matrix):
+    matrix = [[compact(value) for value in row] for row in cleaned(matrix)]
+    if is_translation(matrix):
+        return translate(translation_part(matrix))
+    return multmatrix(matrix)
+
+
+def fold_transforms(root):
+    # Merge runs of nested translate/rotate/scale/mirror/multmatrix nodes into a single
+    # translate or multmatrix, and drop transforms that do nothing.
+    folded = {}
+    for node in unique_nodes(root):
+        if not foldable(node):
+            folded[id(node)] = copy_node(node, [folded[id(child)] for child in node.children]) \
+                if node.children else node
+            continue
+        chain = transform_chain(node)
+        children = [folded[id(child)] for child in chain[-1].children]
+        effective = [link for link in chain if not is_identity(node_matrix(link))]
+        matrix = identity()
+        for link in effective:
+            matrix = multiply(matrix, node_matrix(link))
+        if not effective or is_identity(matrix):
+            folded[id(node)] = children[0] if len(children) == 1 else union()(children)
+        elif len(effective) == 1:
+            folded[id(node)] = copy_node(effective[0], children)
+        else:
+            folded[id(node)] = transform_node(matrix)(children)
+    return folded[id(root)]
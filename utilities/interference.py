@@ -0,0 +1,141 @@
+import itertools
+import math
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from utilities.bounds import bounds, box_intersection
+from utilities.primitives import UnsupportedGeometry
+from utilities.sdf import chunked, compile_tree
+
+# Interference checks between the parts of an assembly.  Pairs whose bounding boxes
+# come within the clearance margin of each other are sampled with both parts' signed
+# distance functions: points inside both measure the overlap volume, and the smallest
+# summed distance to the two parts measures the gap between them.
+
+DEFAULT_MARGIN = 1.0
+DEFAULT_SAMPLES = 100000
+Z_SCORE = 1.96  # overlap errors are stated at 95% confidence
+REFINE_ROUNDS = 12
+REFINE_POINTS = 64
+REFINE_SPREAD = 32
+
+
+class Interference(NamedTuple):
+    first: str
+    second: str
+    overlap: float = 0.0
+    error: float = 0.0
+    clearance: float = math.inf
+    problem: Optional[str] = None
+
+
+def candidate_pairs(boxes, margin=DEFAULT_MARGIN):
+    # Index pairs whose boxes are closer than margin; unknown (None) boxes pair with all.
+    known = [index for index, box in enumerate(boxes) if box is not None and not box.empty]
+    low = np.array([boxes[index].low for index in known], dtype=float).reshape(-1, 3)
+    high = np.array([boxes[index].high for index in known], dtype=float).reshape(-1, 3)
+    near = np.all((low[:, None] - margin <= high[None, :]) & (low[None, :] - margin <= high[:, None]), axis=2)
+    pairs = {(known[i], known[j]) for i, j in zip(*np.nonzero(np.triu(near, 1)))}
+    unknown = [index for index, box in enumerate(boxes) if box is None]
+    pairs.update(tuple(sorted(pair)) for pair in itertools.product(unknown, range(len(boxes))) if len(set(pair)) == 2)
+    return sorted(pairs)
+
+
+def overlap_volume(first, second, region, samples, rng):
+    if region.empty or region.volume == 0:
+        return 0.0, 0.0
+    points = rng.uniform(region.low, region.high, (samples, 3))
+    fraction = np.count_nonzero((chunked(first, points) <= 0) & (chunked(second, points) <= 0)) / samples
+    spread = math.sqrt(max(fraction * (1 - fraction), 1 / samples) / samples)
+    return fraction * region.volume, Z_SCORE * spread * region.volume
+
+
+def closest_approach(first, second, region, samples, rng):
+    # Smallest d1 + d2 over the region: by the triangle inequality no point can do better
+    # than the true gap, and points on the shortest segment between the parts reach it.
+    # Uniform samples find the neighbourhood, then the best few are refined locally.
+    def gaps(points):
+        return np.maximum(chunked(first, points), 0) + np.maximum(chunked(second, points), 0)
+
+    low, high = np.array(region.low, dtype=float), np.array(region.high, dtype=float)
+    points = rng.uniform(low, high, (samples, 3))
+    values = gaps(points)
+    spread = (high - low) / max(samples ** (1 / 3), 1)
+    for _ in range(REFINE_ROUNDS):
+        best = np.argsort(values)[:REFINE_POINTS]
+        points, values = points[best], values[best]
+        moved = np.clip(points[:, None] + rng.normal(0, 1, (len(points), REFINE_SPREAD, 3)) * spread, low, high)
+        moved = moved.reshape(-1, 3)
+        points = np.concatenate([points, moved])
+        values = np.concatenate([values, gaps(moved)])
+        spread = spread / 2
+    return float(values.min())
+
+
+def pair_interference(first_name, first, second_name, second, margin=DEFAULT_MARGIN,
+                      samples=DEFAULT_SAMPLES, seed=0):
+    rng = np.random.default_rng(seed)
+    try:
+        first_distance, second_distance = compile_tree(first), compile_tree(second)
+        first_box, second_box = bounds(first), bounds(second)
+        if first_box is None or second_box is None:
+            raise UnsupportedGeometry('no bounding box to sample in')
+        common = box_intersection([first_box, second_box])
+        overlap, error = overlap_volume(first_distance, second_distance, common, samples, rng)
+        if overlap > 0:
+            return Interference(first_name, second_name, overlap, error, 0.0)
+        near = box_intersection([first_box.expanded(margin), second_box.expanded(margin)])
+        clearance = closest_approach(first_distance, second_distance, near, samples, rng)
+    except UnsupportedGeometry as problem:
+        return Interference(first_name, second_name, problem=str(problem))
+    return Interference(first_name, second_name, overlap, error, clearance)
+
+
+def check_interference(parts, margin=DEFAULT_MARGIN, samples=DEFAULT_SAMPLES, seed=0):
+    # parts maps names to SolidPython objects placed as assembled.  Returns one finding
+    # for every pair closer than margin, overlapping or not.
+    parts = list(dict(parts).items())
+    boxes = [bounds(thing) for _, thing in parts]
+    return [
+        pair_interference(*parts[i], *parts[j], margin=margin, samples=samples, seed=seed)
+        for i, j in candidate_pairs(boxes, margin)
+    ]
+
+
+def violations(findings, minimum_clearance=0.0, expected=None, tolerance=0.05):
+    # Messages for findings that break the assembly's rules.  Pairs listed in expected
+    # (keyed by name pair, either order) must overlap by that volume, within the sampling
+    # error or the relative tolerance; all other pairs must not overlap and must be at
+    # least minimum_clearance apart.
+    expected = {frozenset(pair): (pair, volume) for pair, volume in (expected or {}).items()}
+    messages = []
+    for finding in findings:
+        pair = f'{finding.first} / {finding.second}'
+        _, target = expected.pop(frozenset([finding.first, finding.second]), (None, None))
+        if finding.problem:
+            messages.append(f'{pair}: not checked, {finding.problem}')
+        elif target is not None:
+            if abs(finding.overlap - target) > max(finding.error, tolerance * target):
+                messages.append(f'{pair}: overlap {finding.overlap:.2f} ± {finding.error:.2f} mm3, expected {target:.2f}')
+        elif finding.overlap > 0:
+            messages.append(f'{pair}: overlap {finding.overlap:.2f} ± {finding.error:.2f} mm3')
+        elif finding.clearance < minimum_clearance:
+            messages.append(f'{pair}: clearance {finding.clearance:.3f} mm, needs {minimum_clearance:.3f}')
+    for (first, second), target in expected.values():
+        if target > 0:
+            messages.append(f'{first} / {second}: no overlap, expected {target:.2f}')
+    return messages
+
+
+def report_lines(findings):
+    lines = []
+    for finding in findings:
+        pair = f'{finding.first} / {finding.second}'
+        if finding.problem:
+            lines.append(f'{pair:40} not checked: {finding.problem}')
+        elif finding.overlap > 0:
+            lines.append(f'{pair:40} overlap {finding.overlap:.2f} ± {finding.error:.2f} mm3')
+        else:
+            lines.append(f'{pair:40} clearance {finding.clearance:.3f} mm')
+    return lines
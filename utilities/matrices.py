@@ -0,0 +1,122 @@
+import math
+
+# Affine transforms as 4x4 nested lists, using the same conventions as OpenSCAD.
+
+TOLERANCE = 1e-9
+TRANSFORM_NAMES = ['translate', 'rotate', 'scale', 'mirror', 'multmatrix']
+
+
+def identity():
+    return [[1.0 if row == column else 0.0 for column in range(4)] for row in range(4)]
+
+
+def multiply(a, b):
+    return [[sum(a[row][k] * b[k][column] for k in range(4)) for column in range(4)] for row in range(4)]
+
+
+def translation(v):
+    x, y, z = vector3(v, 0)
+    return [[1, 0, 0, x], [0, 1, 0, y], [0, 0, 1, z], [0, 0, 0, 1]]
+
+
+def scaling(v):
+    x, y, z = vector3(v, 1)
+    return [[x, 0, 0, 0], [0, y, 0, 0], [0, 0, z, 0], [0, 0, 0, 1]]
+
+
+def axis_rotation(axis, degrees):
+    x, y, z = axis
+    length = math.sqrt(x * x + y * y + z * z)
+    if length == 0:
+        return identity()
+    x, y, z = x / length, y / length, z / length
+    angle = math.radians(degrees)
+    c = math.cos(angle)
+    s = math.sin(angle)
+    t = 1 - c
+    return [
+        [t * x * x + c, t * x * y - s * z, t * x * z + s * y, 0],
+        [t * x * y + s * z, t * y * y + c, t * y * z - s * x, 0],
+        [t * x * z - s * y, t * y * z + s * x, t * z * z + c, 0],
+        [0, 0, 0, 1],
+    ]
+
+
+def euler_rotation(angles):
+    # OpenSCAD rotate([x, y, z]) turns about X first, then Y, then Z.
+    x, y, z = vector3(angles, 0)
+    result = axis_rotation([1, 0, 0], x)
+    result = multiply(axis_rotation([0, 1, 0], y), result)
+    return multiply(axis_rotation([0, 0, 1], z), result)
+
+
+def mirroring(normal):
+    x, y, z = vector3(normal, 0)
+    length_squared = x * x + y * y + z * z
+    if length_squared == 0:
+        return identity()
+    n = [x, y, z]
+    result = identity()
+    for row in range(3):
+        for column in range(3):
+            result[row][column] -= 2 * n[row] * n[column] / length_squared
+    return result
+
+
+def full_matrix(m):
+    rows = [[float(value) for value in row] + [0.0] * (4 - len(row)) for row in m]
+    return rows + identity()[len(rows):]
+
+
+def vector3(v, fill):
+    if isinstance(v, (int, float)):
+        return [v, v, v]
+    v = list(v)
+    return v + [fill] * (3 - len(v))
+
+
+def node_matrix(node):
+    # The matrix a SolidPython transform node applies to its children, or None for any
+    # other kind of node.
+    params = node.params
+    if node.name == 'translate':
+        return translation(params['v'])
+    if node.name == 'scale':
+        return scaling(params['v'])
+    if node.name == 'mirror':
+        return mirroring(params['v'])
+    if node.name == 'multmatrix':
+        return full_matrix(params['m'])
+    if node.name == 'rotate':
+        a = params.get('a')
+        v = params.get('v')
+        if a is None:
+            return identity()
+        if isinstance(a, (int, float)):
+            return axis_rotation(v if v is not None else [0, 0, 1], a)
+        return euler_rotation(a)
+    return None
+
+
+def is_identity(m, tolerance=TOLERANCE):
+    reference = identity()
+    return all(abs(m[row][column] - reference[row][column]) <= tolerance for row in range(4) for column in range(4))
+
+
+def is_translation(m, tolerance=TOLERANCE):
+    reference = identity()
+    return all(abs(m[row][column] - reference[row][column]) <= tolerance for row in range(4) for column in range(3))
+
+
+def translation_part(m):
+    return [m[0][3], m[1][3], m[2][3]]
+
+
+def cleaned(m, tolerance=TOLERANCE):
+    # Drop floating point noise such as the 1e-17 left behind by rotating through 90 degrees.
+    return [[0.0 if abs(value) <= tolerance else value for value in row] for row in m]
+
+
+def transform_point(m, point):
+    x, y, z = point
+    return [m[row][0] * x + m[row][1] * y + m[row][2] * z + m[row][3] for row in range(3)]
@@ -0,0 +1,127 @@
+import functools
+import inspect
+import numbers
+import weakref
+from collections import OrderedDict
+from typing import NamedTuple
+
+from utilities.resolution import current_profile
+from utilities.tree_utilities import copy_node
+
+DEFAULT_CACHE_SIZE = 128
+# Lengths reach builders as millimetre floats (geoscad's `@ mm`, `@ inches`, ...), so
+# rounding away float noise lets 1 @ inches and 25.4 @ mm share a cache entry.
+KEY_DIGITS = 9
+
+builders = weakref.WeakSet()
+totals = {'hits': 0, 'misses': 0}
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def normalized(value):
+    if isinstance(value, bool):
+        # True == 1.0 and they hash alike, so flags need their own tag.
+        return ('bool', value)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, numbers.Integral):
+        return float(value)
+    if isinstance(value, numbers.Real):
+        return round(float(value), KEY_DIGITS)
+    if isinstance(value, (list, tuple)):
+        return tuple(normalized(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, normalized(item)) for key, item in value.items()))
+    return value
+
+
+def cache_key(signature, args, kwargs):
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    # Builders pick facet counts from the active resolution profile, so it's part of the key.
+    return (current_profile(),) + tuple((name, normalized(value)) for name, value in bound.arguments.items())
+
+
+def named(result, name):
+    # Parts know their builder, so shared libraries (utilities/scad_modules.py) can give
+    # them readable module names.  Subtracting from a difference splices its children
+    # into a new one, so the part itself may never appear in a tree; its operands are
+    # named too.
+    try:
+        result.part_name = name
+    except AttributeError:
+        return result
+    if getattr(result, 'name', None) == 'difference':
+        for child in result.children:
+            if not hasattr(child, 'part_name'):
+                child.part_name = name
+    return result
+
+
+def fresh(result):
+    # Each call gets its own root node over the cached children.  SolidPython changes
+    # nodes in place (add() sets the parent, which decides whether holes are cut there,
+    # and set_modifier() and scad_render's segments to $fn rename edit the node), so a
+    # shared root would carry one caller's changes to the next.  The children are
+    # shared; below the root SolidPython only renames segments, which every reader of
+    # the tree accepts (utilities/primitives.py).
+    return copy_node(result, result.children) if hasattr(result, 'children') else result
+
+
+def part_builder(function=None, maxsize=DEFAULT_CACHE_SIZE):
+    # Memoise a pure part builder: calls with equivalent arguments get copies of one
+    # SolidPython subtree, sharing everything below the root, so callers may change the
+    # result they get but must treat its descendants as read only.
+    if function is None:
+        return functools.partial(part_builder, maxsize=maxsize)
+    signature = inspect.signature(function)
+    cache = OrderedDict()
+    stats = {'hits': 0, 'misses': 0}
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        key = cache_key(signature, args, kwargs)
+        try:
+            result = cache[key]
+        except TypeError:
+            return named(function(*args, **kwargs), function.__name__)
+        except KeyError:
+            pass
+        else:
+            cache.move_to_end(key)
+            stats['hits'] += 1
+            totals['hits'] += 1
+            return fresh(result)
+        stats['misses'] += 1
+        totals['misses'] += 1
+        result = cache[key] = named(function(*args, **kwargs), function.__name__)
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+        return fresh(result)
+
+    def cache_info():
+        return CacheInfo(stats['hits'], stats['misses'], maxsize, len(cache))
+
+    def cache_clear():
+        cache.clear()
+        stats['hits'] = stats['misses'] = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    builders.add(wrapper)
+    return wrapper
+
+
+def cache_statistics():
+    return {f'{builder.__module__}.{builder.__qualname__}': builder.cache_info() for builder in builders}
+
+
+def clear_caches():
+    for builder in builders:
+        builder.cache_clear()
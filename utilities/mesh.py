@@ -0,0 +1,522 @@
+import math
+import os
+
+import numpy as np
+
+from utilities.flattening import flatten_booleans
+from utilities.matrices import node_matrix
+from utilities.patterns import expand_patterns
+from utilities.primitives import PASS_THROUGH, UnsupportedGeometry, fragments, radii, segments
+from utilities.tree_utilities import unique_nodes
+
+# In-process mesher for designs built from cubes, cylinders and spheres.  Each primitive
+# becomes the polyhedron OpenSCAD would make of it (facet counts from segments, or the
+# $fa/$fs defaults), and booleans are done exactly on the polygons with BSP trees, as in
+# csg.js.  Operands whose boxes don't touch skip the trees.  Splitting leaves vertices
+# in the middle of neighbouring polygons' edges; those are inserted into the edges at
+# the end, so every edge of the finished mesh is shared by two triangles.
+
+MAX_TRIANGLES = 1 << 20
+EPSILON = 1e-5  # mm; points this close to a plane are on it
+SOLIDS = ['cube', 'cylinder', 'sphere']
+BOOLEANS = ['union', 'intersection', 'difference']
+STL_RECORD = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+COPLANAR, FRONT, BACK, SPANNING = 0, 1, 2, 3
+
+
+def unsupported_nodes(thing):
+    return sorted({
+        node.name
+        for node in unique_nodes(expand_patterns(thing))
+        if node.name not in SOLIDS + BOOLEANS + PASS_THROUGH and node_matrix(node) is None
+    })
+
+
+def supported(thing):
+    return not unsupported_nodes(thing)
+
+
+class Polygon:
+    # Convex planar polygon: vertices counter-clockwise seen from outside, and the plane
+    # (nx, ny, nz, w) with outward unit normal n and n . v = w.  A sphere around the
+    # vertices settles most splits with one distance.
+    __slots__ = ['vertices', 'plane', 'centre', 'radius']
+
+    def __init__(self, vertices, plane=None, centre=None, radius=None):
+        self.vertices = vertices
+        self.plane = plane or newell_plane(vertices)
+        if centre is None:
+            count = len(vertices)
+            centre = (
+                sum(x for x, _, _ in vertices) / count,
+                sum(y for _, y, _ in vertices) / count,
+                sum(z for _, _, z in vertices) / count,
+            )
+            cx, cy, cz = centre
+            radius = math.sqrt(max((x - cx) ** 2 + (y - cy) ** 2 + (z - cz) ** 2 for x, y, z in vertices))
+        self.centre = centre
+        self.radius = radius
+
+    def flipped(self):
+        nx, ny, nz, w = self.plane
+        return Polygon(self.vertices[::-1], (-nx, -ny, -nz, -w), self.centre, self.radius)
+
+
+def newell_plane(vertices):
+    nx = ny = nz = 0.0
+    for (x1, y1, z1), (x2, y2, z2) in zip(vertices, vertices[1:] + vertices[:1]):
+        nx += (y1 - y2) * (z1 + z2)
+        ny += (z1 - z2) * (x1 + x2)
+        nz += (x1 - x2) * (y1 + y2)
+    length = math.sqrt(nx * nx + ny * ny + nz * nz)
+    nx, ny, nz = nx / length, ny / length, nz / length
+    x, y, z = vertices[0]
+    return nx, ny, nz, nx * x + ny * y + nz * z
+
+
+def split_polygon(plane, polygon, coplanar_front, coplanar_back, front, back):
+    nx, ny, nz, w = plane
+    cx, cy, cz = polygon.centre
+    distance = nx * cx + ny * cy + nz * cz - w
+    if distance - polygon.radius > EPSILON:
+        front.append(polygon)
+        return
+    if distance + polygon.radius < -EPSILON:
+        back.append(polygon)
+        return
+    distances = [nx * x + ny * y + nz * z - w for x, y, z in polygon.vertices]
+    # Otherwise the extremes still settle polygons wholly to one side.
+    low, high = min(distances), max(distances)
+    if low >= -EPSILON and high <= EPSILON:
+        px, py, pz, _ = polygon.plane
+        (coplanar_front if nx * px + ny * py + nz * pz > 0 else coplanar_back).append(polygon)
+    elif low >= -EPSILON:
+        front.append(polygon)
+    elif high <= EPSILON:
+        back.append(polygon)
+    else:
+        types = [BACK if distance < -EPSILON else FRONT if distance > EPSILON else COPLANAR for distance in distances]
+        vertices = polygon.vertices
+        count = len(vertices)
+        front_vertices, back_vertices = [], []
+        for i in range(count):
+            j = (i + 1) % count
+            if types[i] != BACK:
+                front_vertices.append(vertices[i])
+            if types[i] != FRONT:
+                back_vertices.append(vertices[i])
+            if types[i] | types[j] == SPANNING:
+                # Always from the lesser end, so polygons sharing the edge agree exactly.
+                a, b, da, db = vertices[i], vertices[j], distances[i], distances[j]
+                if b < a:
+                    a, b, da, db = b, a, db, da
+                t = da / (da - db)
+                point = (a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t, a[2] + (b[2] - a[2]) * t)
+                front_vertices.append(point)
+                back_vertices.append(point)
+        if len(front_vertices) >= 3:
+            front.append(Polygon(front_vertices, polygon.plane))
+        if len(back_vertices) >= 3:
+            back.append(Polygon(back_vertices, polygon.plane))
+
+
+class Node:
+    # BSP tree over a closed set of polygons.  Everything is iterative, since unlucky
+    # splitting planes make deep trees.  The root keeps the solid's box, and whether the
+    # tree has been inverted, so polygons well clear of the box skip the tree when clipped.
+    __slots__ = ['plane', 'front', 'back', 'polygons', 'bounds', 'inverted']
+
+    def __init__(self, polygons=()):
+        self.plane = None
+        self.front = None
+        self.back = None
+        self.polygons = []
+        self.bounds = box(polygons)
+        self.inverted = False
+        self.build(list(polygons))
+
+    def nodes(self):
+        result, stack = [], [self]
+        while stack:
+            node = stack.pop()
+            result.append(node)
+            stack.extend(child for child in (node.front, node.back) if child is not None)
+        return result
+
+    def build(self, polygons):
+        stack = [(self, polygons)]
+        while stack:
+            node, polygons = stack.pop()
+            if not polygons:
+                continue
+            if node.plane is None:
+                node.plane = polygons[0].plane
+            front, back = [], []
+            for polygon in polygons:
+                split_polygon(node.plane, polygon, node.polygons, node.polygons, front, back)
+            if front:
+                node.front = node.front or Node()
+                stack.append((node.front, front))
+            if back:
+                node.back = node.back or Node()
+                stack.append((node.back, back))
+
+    def invert(self):
+        self.inverted = not self.inverted
+        for node in self.nodes():
+            node.polygons = [polygon.flipped() for polygon in node.polygons]
+            if node.plane is not None:
+                nx, ny, nz, w = node.plane
+                node.plane = (-nx, -ny, -nz, -w)
+            node.front, node.back = node.back, node.front
+
+    def clip_polygons(self, polygons):
+        # The parts of polygons outside the solid this tree bounds.
+        result, stack = [], [(self, polygons)]
+        while stack:
+            node, polygons = stack.pop()
+            if node.plane is None:
+                result += polygons
+                continue
+            front, back = [], []
+            for polygon in polygons:
+                split_polygon(node.plane, polygon, front, back, front, back)
+            if front:
+                if node.front is None:
+                    result += front
+                else:
+                    stack.append((node.front, front))
+            if back and node.back is not None:
+                stack.append((node.back, back))
+        return result
+
+    def clip_to(self, other):
+        # Polygons clear of other's box are outside its solid, or inside once inverted.
+        for node in self.nodes():
+            if not node.polygons:
+                continue
+            clear = clear_of(node.polygons, other.bounds)
+            near = [polygon for polygon, away in zip(node.polygons, clear) if not away]
+            kept = [] if other.inverted else [polygon for polygon, away in zip(node.polygons, clear) if away]
+            node.polygons = kept + other.clip_polygons(near)
+
+    def all_polygons(self):
+        return [polygon for node in self.nodes() for polygon in node.polygons]
+
+
+def flipped(polygons):
+    return [polygon.flipped() for polygon in polygons]
+
+
+def box(polygons):
+    if not polygons:
+        return None
+    points = np.array([vertex for polygon in polygons for vertex in polygon.vertices])
+    return points.min(axis=0), points.max(axis=0)
+
+
+def clear_of(polygons, bounds):
+    # For each polygon, whether its sphere is clear of bounds.
+    if bounds is None:
+        return [True] * len(polygons)
+    low, high = (bounds[0] - EPSILON).tolist(), (bounds[1] + EPSILON).tolist()
+    return [
+        any(c - polygon.radius > h or c + polygon.radius < l for c, l, h in zip(polygon.centre, low, high))
+        for polygon in polygons
+    ]
+
+
+def touching(a, b):
+    return a is not None and b is not None and bool(np.all(a[0] <= b[1] + EPSILON) and np.all(b[0] <= a[1] + EPSILON))
+
+
+def union(a, b):
+    if not touching(box(a), box(b)):
+        return a + b
+    a, b = Node(a), Node(b)
+    a.clip_to(b)
+    b.clip_to(a)
+    b.invert()
+    b.clip_to(a)
+    b.invert()
+    return a.all_polygons() + b.all_polygons()
+
+
+def difference(a, b):
+    if not touching(box(a), box(b)):
+        return a
+    a, b = Node(a), Node(b)
+    a.invert()
+    a.clip_to(b)
+    b.clip_to(a)
+    b.invert()
+    b.clip_to(a)
+    b.invert()
+    return flipped(a.all_polygons() + b.all_polygons())
+
+
+def intersection(a, b):
+    if not touching(box(a), box(b)):
+        return []
+    a, b = Node(a), Node(b)
+    a.invert()
+    b.clip_to(a)
+    b.invert()
+    a.clip_to(b)
+    b.clip_to(a)
+    return flipped(a.all_polygons() + b.all_polygons())
+
+
+def union_all(solids):
+    # Solids whose boxes don't touch are united by concatenation, so the trees only
+    # see the operands that meet.
+    groups = []
+    for polygons in solids:
+        bounds = box(polygons)
+        meeting = [group for group in groups if touching(group[1], bounds)]
+        if meeting:
+            groups = [group for group in groups if not any(group is other for other in meeting)]
+            polygons = union([polygon for group in meeting for polygon in group[0]], polygons)
+            bounds = box(polygons)
+        groups.append((polygons, bounds))
+    return [polygon for polygons, _ in groups for polygon in polygons]
+
+
+def circle(radius, count, z):
+    # OpenSCAD's generate_circle, exact at the quarter turns.
+    return [
+        (radius * cos_degrees(360 * i / count), radius * sin_degrees(360 * i / count), z)
+        for i in range(count)
+    ]
+
+
+def cos_degrees(degrees):
+    return sin_degrees(degrees + 90)
+
+
+def sin_degrees(degrees):
+    degrees %= 360
+    if degrees % 90 == 0:
+        return [0.0, 1.0, 0.0, -1.0][int(degrees // 90)]
+    return math.sin(math.radians(degrees))
+
+
+def cube_polygons(params):
+    size = params['size'] if params.get('size') is not None else 1
+    x, y, z = size if isinstance(size, (list, tuple)) else (size, size, size)
+    if min(x, y, z) <= 0:
+        return []
+    low = (-x / 2, -y / 2, -z / 2) if params.get('center') else (0, 0, 0)
+    corners = [(low[0] + i * x, low[1] + j * y, low[2] + k * z) for i in (0, 1) for j in (0, 1) for k in (0, 1)]
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    return [Polygon([corners[index] for index in face]) for face in faces]
+
+
+def cylinder_polygons(params):
+    r1, r2 = radii(params)
+    height = params['h'] if params.get('h') is not None else 1
+    if height <= 0 or max(r1, r2) <= 0 or min(r1, r2) < 0:
+        return []
+    count = fragments(max(r1, r2), segments(params))
+    z = -height / 2 if params.get('center') else 0
+    bottom, top = circle(r1, count, z), circle(r2, count, z + height)
+    polygons = []
+    for i in range(count):
+        j = (i + 1) % count
+        side = [bottom[i], bottom[j]] if r1 > 0 else [bottom[i]]
+        side += [top[j], top[i]] if r2 > 0 else [top[i]]
+        polygons.append(Polygon(side))
+    if r1 > 0:
+        polygons.append(Polygon(bottom[::-1]))
+    if r2 > 0:
+        polygons.append(Polygon(top))
+    return polygons
+
+
+def sphere_polygons(params):
+    # OpenSCAD's rings of latitude, each with the full fragment count, capped top and
+    # bottom by flat polygons.
+    radius = radii(params)[0]
+    if radius <= 0:
+        return []
+    count = fragments(radius, segments(params))
+    latitudes = [180 * (i + 0.5) / ((count + 1) // 2) for i in range((count + 1) // 2)]
+    rings = [circle(radius * sin_degrees(phi), count, radius * cos_degrees(phi)) for phi in latitudes]
+    polygons = [Polygon(rings[0]), Polygon(rings[-1][::-1])]
+    for upper, lower in zip(rings, rings[1:]):
+        for i in range(count):
+            j = (i + 1) % count
+            polygons.append(Polygon([upper[i], lower[i], lower[j], upper[j]]))
+    return polygons
+
+
+def transformed(polygons, matrix):
+    matrix = np.array(matrix, dtype=float)
+    determinant = np.linalg.det(matrix[:3, :3])
+    if not polygons or abs(determinant) < 1e-12:
+        return []
+    points = np.array([vertex for polygon in polygons for vertex in polygon.vertices])
+    points = (points @ matrix[:3, :3].T + matrix[:3, 3]).tolist()
+    normals = np.array([polygon.plane[:3] for polygon in polygons]) @ np.linalg.inv(matrix[:3, :3])
+    normals /= np.linalg.norm(normals, axis=1)[:, None]
+    result = []
+    start = 0
+    for polygon, normal in zip(polygons, normals.tolist()):
+        vertices = [tuple(point) for point in points[start:start + len(polygon.vertices)]]
+        start += len(polygon.vertices)
+        if determinant < 0:
+            # Mirrored: the outward normal is unchanged but the winding turns over.
+            vertices.reverse()
+        x, y, z = vertices[0]
+        result.append(Polygon(vertices, (*normal, normal[0] * x + normal[1] * y + normal[2] * z)))
+    return result
+
+
+def combined(name, solids, max_triangles):
+    if not solids:
+        return []
+    if name == 'intersection':
+        result = solids[0]
+        for solid in solids[1:]:
+            result = intersection(result, solid)
+    elif name == 'difference':
+        # One cut by everything that reaches the base, rather than rebuilding the trees
+        # for each operand.
+        base = box(solids[0])
+        cuts = [solid for solid in solids[1:] if touching(base, box(solid))]
+        result = difference(solids[0], union_all(cuts)) if cuts else solids[0]
+    else:
+        result = union_all(solids)
+    if len(result) > max_triangles:
+        raise UnsupportedGeometry(f'{len(result)} polygons, more than the limit of {max_triangles} triangles')
+    return result
+
+
+def solid_polygons(thing, max_triangles=MAX_TRIANGLES):
+    # Outward-facing polygons bounding thing.  Each node is meshed once in its own frame,
+    # as a (solid, holes) pair so SolidPython holes are cut at part roots and at the top.
+    unsupported = unsupported_nodes(thing)
+    if unsupported:
+        raise UnsupportedGeometry(f'Mesh engine can not handle {unsupported}')
+    thing = flatten_booleans(expand_patterns(thing))
+    meshed = {}
+    for node in unique_nodes(thing):
+        if node.modifier in ['%', '*']:
+            meshed[id(node)] = ([], [])
+            continue
+        holes = []
+        if node.name in SOLIDS:
+            solid = {'cube': cube_polygons, 'cylinder': cylinder_polygons, 'sphere': sphere_polygons}[node.name](
+                node.params)
+        else:
+            children = [meshed[id(child)] for child in node.children]
+            solid = combined(node.name, [child_solid for child_solid, _ in children], max_triangles)
+            holes = combined('union', [child_holes for _, child_holes in children if child_holes], max_triangles)
+            matrix = node_matrix(node)
+            if matrix is not None:
+                solid, holes = transformed(solid, matrix), transformed(holes, matrix)
+        if node.is_hole:
+            solid, holes = [], union(holes, solid)
+        elif node.is_part_root and holes:
+            solid, holes = difference(solid, holes), []
+        meshed[id(node)] = (solid, holes)
+    solid, holes = meshed[id(thing)]
+    return difference(solid, holes) if holes else solid
+
+
+def welded(polygons):
+    # Shared vertex array, and each polygon as a loop of indices into it.
+    if not polygons:
+        return np.zeros((0, 3)), [], np.zeros((0, 3))
+    points = np.array([vertex for polygon in polygons for vertex in polygon.vertices])
+    _, first, inverse = np.unique(np.round(points / EPSILON * 10), axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1).tolist()
+    faces, normals = [], []
+    start = 0
+    for polygon in polygons:
+        loop = inverse[start:start + len(polygon.vertices)]
+        start += len(polygon.vertices)
+        loop = [index for position, index in enumerate(loop) if index != loop[position - 1]]
+        if len(set(loop)) >= 3:
+            faces.append(loop)
+            normals.append(polygon.plane[:3])
+    return points[first], faces, np.array(normals).reshape(-1, 3)
+
+
+def split_edges(points, faces):
+    # Insert into each edge the vertices lying part way along it.  Only edges without a
+    # partner running the other way can have any, and only at the ends of other such
+    # edges, so those are swept along each edge's longest axis.
+    edges = {}
+    for face, loop in enumerate(faces):
+        for position, start in enumerate(loop):
+            edges.setdefault((start, loop[(position + 1) % len(loop)]), []).append(face)
+    lone = [edge for edge in edges if (edge[1], edge[0]) not in edges]
+    if not lone:
+        return faces, set()
+    candidates = np.unique(np.array(lone).reshape(-1))
+    orders = [candidates[np.argsort(points[candidates, axis])] for axis in range(3)]
+    sorted_values = [points[order, axis] for axis, order in enumerate(orders)]
+    inserted = {}
+    for start, stop in lone:
+        direction = points[stop] - points[start]
+        axis = int(np.argmax(np.abs(direction)))
+        low, high = sorted(points[[start, stop], axis])
+        nearby = orders[axis][np.searchsorted(sorted_values[axis], low + EPSILON, 'right'):
+                              np.searchsorted(sorted_values[axis], high - EPSILON, 'left')]
+        if not len(nearby):
+            continue
+        length = math.sqrt(direction @ direction)
+        offsets = points[nearby] - points[start]
+        along = offsets @ direction / length
+        across = np.linalg.norm(offsets - along[:, None] * (direction / length), axis=1)
+        on_edge = (along > EPSILON) & (along < length - EPSILON) & (across < EPSILON)
+        if on_edge.any():
+            inserted[start, stop] = [int(index) for index in nearby[on_edge][np.argsort(along[on_edge])]]
+    changed = {face for edge in inserted for face in edges[edge]}
+    result = list(faces)
+    for face in changed:
+        loop = faces[face]
+        result[face] = []
+        for position, start in enumerate(loop):
+            result[face].append(start)
+            result[face] += inserted.get((start, loop[(position + 1) % len(loop)]), [])
+    return result, changed
+
+
+def mesh(thing, max_triangles=MAX_TRIANGLES):
+    points, faces, normals = welded(solid_polygons(thing, max_triangles))
+    faces, changed = split_edges(points, faces)
+    count = sum(len(loop) if face in changed else len(loop) - 2 for face, loop in enumerate(faces))
+    if count > max_triangles:
+        raise UnsupportedGeometry(f'{count} triangles, more than the limit of {max_triangles}')
+    triangles, triangle_normals = [], []
+    for face, loop in enumerate(faces):
+        if face in changed:
+            # Fanning from the centre keeps triangles from running along the split edges.
+            corners = points[loop]
+            centre = corners.mean(axis=0)
+            triangles += [(centre, corners[i], corners[(i + 1) % len(loop)]) for i in range(len(loop))]
+            triangle_normals += [normals[face]] * len(loop)
+        else:
+            triangles += [(points[loop[0]], points[loop[i]], points[loop[i + 1]]) for i in range(1, len(loop) - 1)]
+            triangle_normals += [normals[face]] * (len(loop) - 2)
+    if not triangles:
+        return np.zeros((0, 3, 3)), np.zeros((0, 3))
+    return np.array(triangles), np.array(triangle_normals)
+
+
+def write_stl(filename, triangles, normals):
+    records = np.zeros(len(triangles), dtype=STL_RECORD)
+    records['normal'] = normals
+    records['vertices'] = triangles
+    with open(filename, 'wb') as output:
+        output.write(b'print3d binary STL'.ljust(80, b' '))
+        output.write(np.uint32(len(records)).tobytes())
+        output.write(records.tobytes())
+
+
+def save_as_stl(thing, filename, directory=None, max_triangles=MAX_TRIANGLES):
+    if directory is None:
+        directory = os.environ.get('SCAD_DIRECTORY', '.')
+    write_stl(os.path.join(directory, filename), *mesh(thing, max_triangles))
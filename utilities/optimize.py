@@ -0,0 +1,28 @@
+import os
+
+from utilities.culling import cull_booleans
+from utilities.flattening import flatten_booleans
+from utilities.folding import fold_transforms
+
+PASSES = {
+    'fold': fold_transforms,
+    'flatten': flatten_booleans,
+    'cull': cull_booleans,
+}
+
+
+def requested_passes(passes=None):
+    if passes is None:
+        passes = os.environ.get('SCAD_PASSES', '')
+    if isinstance(passes, str):
+        passes = [name.strip() for name in passes.split(',') if name.strip()]
+    unknown = [name for name in passes if name not in PASSES]
+    if unknown:
+        raise ValueError(f'Unknown optimisation passes {unknown}; choose from {sorted(PASSES)}')
+    return passes
+
+
+def optimize(thing, passes=None):
+    for name in requested_passes(passes):
+        thing = PASSES[name](thing)
+    return thing
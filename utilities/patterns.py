@@ -0,0 +1,123 @@
+from solid import OpenSCADObject, rotate, translate, union
+from solid.solidpython import py2openscad
+
+from utilities.tree_utilities import copy_node, unique_nodes
+
+
+def padded(values, length, fill):
+    values = list(values)
+    return values + [fill] * (length - len(values))
+
+
+# Symbolic repetition nodes.  Each renders as one OpenSCAD for loop around its children
+# instead of one transformed copy per element.
+
+class linear_grid(OpenSCADObject):
+
+    def __init__(self, count, step, start=(0, 0, 0)):
+        super().__init__('linear_grid', {'count': count, 'step': step, 'start': start})
+
+    def offsets(self):
+        step = padded(self.params['step'], 3, 0)
+        start = padded(self.params['start'], 3, 0)
+        return [
+            [s + index * d for s, d in zip(start, step)]
+            for index in range(self.params['count'])
+        ]
+
+    def expand(self):
+        return union()([translate(offset)(child) for offset in self.offsets() for child in self.children])
+
+    def _render_str_no_children(self):
+        count = self.params['count']
+        step = py2openscad(padded(self.params['step'], 3, 0))
+        start = py2openscad(padded(self.params['start'], 3, 0))
+        return f'\n{self.modifier}for (i = [0 : {count - 1}]) translate({start} + i * {step})'
+
+
+class rectangular_grid(OpenSCADObject):
+
+    def __init__(self, counts, spacing, start=(0, 0, 0)):
+        super().__init__('rectangular_grid', {'counts': counts, 'spacing': spacing, 'start': start})
+
+    def offsets(self):
+        x_count, y_count, z_count = padded(self.params['counts'], 3, 1)
+        dx, dy, dz = padded(self.params['spacing'], 3, 0)
+        sx, sy, sz = padded(self.params['start'], 3, 0)
+        return [
+            [sx + ix * dx, sy + iy * dy, sz + iz * dz]
+            for ix in range(x_count)
+            for iy in range(y_count)
+            for iz in range(z_count)
+        ]
+
+    def expand(self):
+        return union()([translate(offset)(child) for offset in self.offsets() for child in self.children])
+
+    def _render_str_no_children(self):
+        x_count, y_count, z_count = padded(self.params['counts'], 3, 1)
+        dx, dy, dz = [py2openscad(d) for d in padded(self.params['spacing'], 3, 0)]
+        start = py2openscad(padded(self.params['start'], 3, 0))
+        return (
+            f'\n{self.modifier}for (ix = [0 : {x_count - 1}], iy = [0 : {y_count - 1}], iz = [0 : {z_count - 1}]) '
+            f'translate({start} + [ix * {dx}, iy * {dy}, iz * {dz}])'
+        )
+
+
+class polar_array(OpenSCADObject):
+
+    def __init__(self, count, angle, axis=(0, 0, 1), start_angle=0):
+        super().__init__('polar_array', {'count': count, 'angle': angle, 'axis': axis, 'start_angle': start_angle})
+
+    def angles(self):
+        return [self.params['start_angle'] + index * self.params['angle'] for index in range(self.params['count'])]
+
+    def expand(self):
+        axis = list(self.params['axis'])
+        return union()([rotate(angle, axis)(child) for angle in self.angles() for child in self.children])
+
+    def _render_str_no_children(self):
+        count = self.params['count']
+        angle = py2openscad(self.params['angle'])
+        start_angle = py2openscad(self.params['start_angle'])
+        axis = py2openscad(list(self.params['axis']))
+        return f'\n{self.modifier}for (i = [0 : {count - 1}]) rotate(a = {start_angle} + i * {angle}, v = {axis})'
+
+
+# Marks a subtree to be rendered once to a cached STL and imported (utilities/baking.py).
+# Until it is baked it is just a union of its children, and a single child below the
+# root renders as if it weren't wrapped, so unbaked output is unchanged by the marking.
+
+class baked(OpenSCADObject):
+
+    def __init__(self):
+        super().__init__('baked', {})
+
+    def expand(self):
+        return union()(self.children)
+
+    def _render(self, render_holes=False):
+        if self.parent and len(self.children) == 1 and not self.modifier:
+            return self.children[0]._render(render_holes)
+        return super()._render(render_holes)
+
+    def _render_str_no_children(self):
+        return f'\n{self.modifier}union()'
+
+
+PATTERN_CLASSES = (linear_grid, rectangular_grid, polar_array, baked)
+
+
+def expand_patterns(root):
+    # Equivalent tree using only plain SolidPython nodes, for consumers that don't
+    # understand the symbolic patterns.  Shared subtrees stay shared.
+    expanded = {}
+    for node in unique_nodes(root):
+        children = [expanded[id(child)] for child in node.children]
+        if isinstance(node, PATTERN_CLASSES):
+            expanded[id(node)] = copy_node(node, children).expand()
+        elif children:
+            expanded[id(node)] = copy_node(node, children)
+        else:
+            expanded[id(node)] = node
+    return expanded[id(root)]
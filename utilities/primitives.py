@@ -0,0 +1,40 @@
+import math
+
+# Primitive parameters and node kinds shared by the geometry engines (mesh, signed
+# distance, volume estimates, complexity).  Nothing here needs NumPy.
+
+DEFAULT_FA = 12  # OpenSCAD $fa
+DEFAULT_FS = 2  # OpenSCAD $fs
+# Nodes that pass their children's geometry through unchanged.
+PASS_THROUGH = ['color', 'render', 'part', 'hole']
+
+
+class UnsupportedGeometry(ValueError):
+    pass
+
+
+def radii(params):
+    # (bottom, top) radius of a cylinder, or the radius of a sphere or circle twice.
+    def radius(name, diameter, default):
+        if params.get(name) is not None:
+            return params[name]
+        if params.get(diameter) is not None:
+            return params[diameter] / 2
+        return default
+    r = radius('r', 'd', 1)
+    return radius('r1', 'd1', r), radius('r2', 'd2', r)
+
+
+def segments(params):
+    # SolidPython's segments argument.  scad_render renames it to $fn in place, so a tree
+    # that has been rendered carries that instead.
+    return params.get('segments') or params.get('$fn')
+
+
+def fragments(radius, segments=None):
+    # OpenSCAD's get_fragments_from_r.
+    if segments:
+        return max(int(segments), 3)
+    if radius < 1e-9:
+        return 3
+    return int(math.ceil(max(min(360 / DEFAULT_FA, radius * 2 * math.pi / DEFAULT_FS), 5)))
@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+from collections import defaultdict
+
+from solid.solidpython import OpenSCADObject
+
+from utilities.registry import NON_DESIGN_DIRECTORIES
+
+# Opt-in profiling of design builders.  While a Profiler is active every call into a
+# design module is timed and charged with the CSG nodes created during it, together
+# with the SCAD output steps in ENTRY_POINTS so rendering shows up too.  Results come out
+# as folded stacks for flame graph tools (flamegraph.pl, speedscope, inferno) and as a
+# table of the most expensive builders.
+
+ENTRY_POINTS = {'save_as_scad', 'render_scad', 'optimize', 'scad_render', 'scad_render_to_file'}
+DEFAULT_TOP = 15
+
+
+class Profiler:
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.keys = {}
+        self.stack = []
+        self.nodes = 0
+        # key -> [calls, seconds, self seconds, nodes, self nodes]
+        self.functions = defaultdict(lambda: [0, 0.0, 0.0, 0, 0])
+        self.stacks = defaultdict(float)
+
+    def key(self, code):
+        # 'design/module:function' for functions worth reporting, otherwise None.
+        if code not in self.keys:
+            path = os.path.abspath(code.co_filename)
+            relative = os.path.relpath(path, self.root)
+            name = getattr(code, 'co_qualname', code.co_name)
+            if code.co_name in ENTRY_POINTS:
+                self.keys[code] = name
+            elif code.co_name.startswith('<') and code.co_name != '<module>' or relative.startswith('..') \
+                    or relative.split(os.sep)[0] in NON_DESIGN_DIRECTORIES:
+                self.keys[code] = None
+            else:
+                self.keys[code] = os.path.splitext(relative)[0].replace(os.sep, '/') + ':' + name
+        return self.keys[code]
+
+    def event(self, frame, event, arg):
+        if event == 'call':
+            key = self.key(frame.f_code)
+            if key is not None:
+                # frame, key, start time, start node count, child seconds, child nodes
+                self.stack.append([frame, key, time.perf_counter(), self.nodes, 0.0, 0])
+        elif event == 'return' and self.stack and self.stack[-1][0] is frame:
+            _, key, start, nodes, child_seconds, child_nodes = self.stack.pop()
+            seconds = time.perf_counter() - start
+            nodes = self.nodes - nodes
+            record = self.functions[key]
+            record[0] += 1
+            if all(entry[1] != key for entry in self.stack):
+                # Recursive calls are already inside the outermost call's total.
+                record[1] += seconds
+                record[3] += nodes
+            record[2] += seconds - child_seconds
+            record[4] += nodes - child_nodes
+            self.stacks[tuple(entry[1] for entry in self.stack) + (key,)] += seconds - child_seconds
+            if self.stack:
+                self.stack[-1][4] += seconds
+                self.stack[-1][5] += nodes
+
+    def __enter__(self):
+        original = OpenSCADObject.__init__
+
+        def counting_init(node, *args, **kwargs):
+            self.nodes += 1
+            original(node, *args, **kwargs)
+
+        self.original_init = original
+        OpenSCADObject.__init__ = counting_init
+        sys.setprofile(self.event)
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.setprofile(None)
+        OpenSCADObject.__init__ = self.original_init
+
+    def folded(self):
+        # One 'caller;callee self-microseconds' line per distinct stack.
+        return [
+            ';'.join(stack) + f' {round(seconds * 1e6)}'
+            for stack, seconds in sorted(self.stacks.items())
+            if round(seconds * 1e6) > 0
+        ]
+
+    def table(self, top=DEFAULT_TOP):
+        ranked = sorted(self.functions.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        lines = [f'{"calls":>8} {"total s":>9} {"self s":>9} {"nodes":>8} {"self":>8}  function']
+        for key, (calls, seconds, self_seconds, nodes, self_nodes) in ranked:
+            lines.append(f'{calls:8} {seconds:9.4f} {self_seconds:9.4f} {nodes:8} {self_nodes:8}  {key}')
+        return lines
+
+    def write(self, stem, top=DEFAULT_TOP):
+        with open(stem + '.folded', 'w') as folded:
+            folded.write(''.join(line + '\n' for line in self.folded()))
+        with open(stem + '.txt', 'w') as table:
+            table.write(''.join(line + '\n' for line in self.table(top)))
@@ -0,0 +1,252 @@
+import ast
+import fnmatch
+import importlib.util
+import operator
+import os
+from typing import Any, NamedTuple, Optional, Tuple
+
+from utilities.schema import TYPES, UNITS, VALUE_TYPES
+
+# Design discovery and inspection without importing anything heavy.  Designs are found
+# by their __main__ guard and inspected by parsing their source, so listing, help and
+# parameter lookups never import solid, geoscad or the design's own module-level work.
+# A design's module is only imported when one of its builders is asked for.  Designs
+# that declare an @builder and VARIANTS (see utilities/schema.py) also have their
+# variants and typed arguments read here.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NON_DESIGN_DIRECTORIES = ['utilities', 'test']
+MAIN_GUARD = "if __name__ == '__main__':"
+CALLS = {'dict': dict, 'range': range, 'list': list, 'tuple': tuple, 'len': len, 'round': round}
+OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    ast.USub: operator.neg, ast.UAdd: operator.pos, ast.Not: operator.not_,
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge,
+}
+
+
+class Parameter(NamedTuple):
+    name: str
+    source: str
+    value: Any = None  # None when the value can't be worked out without running the design
+
+
+class Builder(NamedTuple):
+    name: str
+    arguments: str
+    line: int
+
+
+class Field(NamedTuple):
+    name: str
+    kind: Optional[str]  # a utilities.schema type name
+    default: Any = None
+    required: bool = False
+
+
+class DesignInfo(NamedTuple):
+    name: str
+    path: str
+    parameters: Tuple[Parameter, ...] = ()
+    builders: Tuple[Builder, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    error: Optional[str] = None
+    builder: Optional[str] = None
+    fields: Tuple[Field, ...] = ()
+    variants: Optional[dict] = None  # None when undeclared or not statically known
+
+
+def design_name(path, root=REPO_ROOT):
+    return os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, '/')
+
+
+def discover_designs(root=REPO_ROOT):
+    designs = {}
+    for directory in sorted(os.listdir(root)):
+        directory_path = os.path.join(root, directory)
+        if directory.startswith('.') or directory in NON_DESIGN_DIRECTORIES or not os.path.isdir(directory_path):
+            continue
+        for filename in sorted(os.listdir(directory_path)):
+            path = os.path.join(directory_path, filename)
+            if not filename.endswith('.py') or filename == '__init__.py':
+                continue
+            with open(path) as source:
+                if MAIN_GUARD in source.read():
+                    designs[design_name(path, root)] = path
+    return designs
+
+
+def select_designs(designs, names):
+    # Names match as substrings, with dots standing for slashes as in module paths.
+    if not names:
+        return designs
+    patterns = [name.replace('.', '/') for name in names]
+    return {name: path for name, path in designs.items() if any(pattern in name for pattern in patterns)}
+
+
+def select_variants(design, variants, patterns):
+    # Names of the variants matching any pattern.  Glob patterns must match the whole
+    # 'design/variant' name or the variant name alone; other patterns match 'design/variant'
+    # as substrings.  Dots stand for slashes, as in module paths.
+    if not patterns:
+        return list(variants)
+    patterns = [pattern.replace('.', '/') for pattern in patterns]
+    selected = []
+    for variant in variants:
+        full_name = f'{design}/{variant}'
+        if any(
+            fnmatch.fnmatchcase(full_name, pattern) or fnmatch.fnmatchcase(variant, pattern)
+            if any(character in pattern for character in '*?[') else pattern in full_name
+            for pattern in patterns
+        ):
+            selected.append(variant)
+    return selected
+
+
+def static_value(node, known):
+    # Value of a constant expression over literals, units and earlier parameters.
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        if node.id in known:
+            return known[node.id]
+        if node.id in UNITS:
+            return UNITS[node.id]
+        raise ValueError(node.id)
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = [static_value(element, known) for element in node.elts]
+        return values if isinstance(node, ast.List) else tuple(values)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+        return OPERATORS[type(node.op)](static_value(node.operand, known))
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.MatMult):
+        # geoscad's value @ unit, also applied across lists.
+        value, scale = static_value(node.left, known), static_value(node.right, known)
+        return [element * scale for element in value] if isinstance(value, (list, tuple)) else value * scale
+    if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+        return OPERATORS[type(node.op)](static_value(node.left, known), static_value(node.right, known))
+    if isinstance(node, ast.BoolOp):
+        values = [static_value(value, known) for value in node.values]
+        return all(values) if isinstance(node.op, ast.And) else any(values)
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in OPERATORS:
+        return OPERATORS[type(node.ops[0])](static_value(node.left, known), static_value(node.comparators[0], known))
+    if isinstance(node, ast.IfExp):
+        return static_value(node.body if static_value(node.test, known) else node.orelse, known)
+    if isinstance(node, ast.Dict) and None not in node.keys:
+        return {static_value(key, known): static_value(value, known) for key, value in zip(node.keys, node.values)}
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in CALLS:
+        arguments = [static_value(argument, known) for argument in node.args]
+        keywords = {keyword.arg: static_value(keyword.value, known) for keyword in node.keywords if keyword.arg}
+        if len(keywords) != len(node.keywords):
+            raise ValueError('** arguments')
+        return CALLS[node.func.id](*arguments, **keywords)
+    if isinstance(node, ast.JoinedStr):
+        return ''.join(
+            format(static_value(value.value, known), static_value(value.format_spec, known) if value.format_spec else '')
+            if isinstance(value, ast.FormattedValue) else static_value(value, known)
+            for value in node.values
+        )
+    if isinstance(node, (ast.ListComp, ast.DictComp)):
+        items = []
+        for scope in comprehension_scopes(node.generators, known):
+            if isinstance(node, ast.DictComp):
+                items.append((static_value(node.key, scope), static_value(node.value, scope)))
+            else:
+                items.append(static_value(node.elt, scope))
+        return dict(items) if isinstance(node, ast.DictComp) else items
+    raise ValueError(ast.dump(node))
+
+
+def comprehension_scopes(generators, known):
+    # Name bindings for every iteration of a comprehension's for/if clauses.
+    if not generators:
+        yield known
+        return
+    generator = generators[0]
+    for item in static_value(generator.iter, known):
+        scope = dict(known)
+        bind(generator.target, item, scope)
+        if all(static_value(condition, scope) for condition in generator.ifs):
+            yield from comprehension_scopes(generators[1:], scope)
+
+
+def bind(target, value, scope):
+    if isinstance(target, ast.Name):
+        scope[target.id] = value
+    elif isinstance(target, (ast.Tuple, ast.List)) and len(target.elts) == len(value):
+        for element, item in zip(target.elts, value):
+            bind(element, item, scope)
+    else:
+        raise ValueError(ast.dump(target))
+
+
+def builder_fields(function, known):
+    arguments = function.args.posonlyargs + function.args.args + function.args.kwonlyargs
+    defaults = [None] * (len(function.args.posonlyargs + function.args.args) - len(function.args.defaults))
+    defaults += function.args.defaults + function.args.kw_defaults
+    fields = []
+    for argument, default_node in zip(arguments, defaults):
+        try:
+            default = None if default_node is None else static_value(default_node, known)
+        except (ValueError, TypeError, ArithmeticError):
+            default = None
+        kind = argument.annotation.id if isinstance(argument.annotation, ast.Name) else None
+        if kind not in TYPES:
+            kind = VALUE_TYPES[type(default)].__name__ if type(default) in VALUE_TYPES else None
+        fields.append(Field(argument.arg, kind, default, default_node is None))
+    return tuple(fields)
+
+
+def inspect_design(name, path):
+    # Module-level UPPER_CASE constants, public functions and literal .scad filenames.
+    try:
+        with open(path) as source:
+            text = source.read()
+        tree = ast.parse(text, path)
+    except (OSError, SyntaxError) as problem:
+        return DesignInfo(name, path, error=str(problem))
+    parameters, builders, known = [], [], {}
+    builder, fields = None, ()
+    for statement in tree.body:
+        if isinstance(statement, ast.FunctionDef) and any(
+                isinstance(decorator, ast.Name) and decorator.id == 'builder' for decorator in statement.decorator_list):
+            builder, fields = statement.name, builder_fields(statement, known)
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+            target = statement.targets[0]
+            if isinstance(target, ast.Name) and target.id.isupper():
+                try:
+                    known[target.id] = static_value(statement.value, known)
+                except (ValueError, TypeError, ArithmeticError):
+                    known.pop(target.id, None)
+                parameters.append(Parameter(target.id, ast.unparse(statement.value), known.get(target.id)))
+        elif isinstance(statement, ast.FunctionDef) and not statement.name.startswith('_') and statement.name != 'main':
+            builders.append(Builder(statement.name, ast.unparse(statement.args), statement.lineno))
+    outputs = sorted({
+        node.value for node in ast.walk(tree)
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value.endswith('.scad')
+        and node.value != '.scad'
+    })
+    variants = known.get('VARIANTS') if builder else None
+    if variants is not None:
+        outputs = list(dict.fromkeys([variant + '.scad' for variant in variants] + outputs))
+    return DesignInfo(name, path, tuple(parameters), tuple(builders), tuple(outputs), None, builder, fields, variants)
+
+
+loaded_modules = {}
+
+
+def load_design(path):
+    # Import a design as a module (not as __main__) on first use.
+    path = os.path.abspath(path)
+    if path not in loaded_modules:
+        module_name = 'design_' + design_name(path).replace('/', '_').replace(' ', '_')
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        loaded_modules[path] = module
+    return loaded_modules[path]
+
+
+def load_builder(path, builder):
+    return getattr(load_design(path), builder)
@@ -0,0 +1,61 @@
+import contextlib
+import math
+import os
+from typing import NamedTuple
+
+# Facet counts for circles, cylinders and spheres chosen from their radius, in the
+# spirit of OpenSCAD's $fa/$fs: enough segments to keep every facet within
+# chord_error of the true surface, capped by a minimum facet angle and edge length.
+
+
+class Profile(NamedTuple):
+    chord_error: float  # mm between a facet and the true circle
+    min_angle: float  # degrees per facet, like $fa
+    min_size: float  # mm of facet edge, like $fs
+    min_segments: int
+
+
+PROFILES = {
+    'draft': Profile(chord_error=0.3, min_angle=15, min_size=1.0, min_segments=6),
+    'production': Profile(chord_error=0.05, min_angle=3, min_size=0.2, min_segments=8),
+}
+DEFAULT_PROFILE = 'production'
+
+profile_stack = []
+
+
+def named_profile(name):
+    if name not in PROFILES:
+        raise ValueError(f'Unknown resolution profile {name!r}; choose from {sorted(PROFILES)}')
+    return PROFILES[name]
+
+
+def current_profile():
+    if profile_stack:
+        return profile_stack[-1]
+    return named_profile(os.environ.get('SCAD_RESOLUTION') or DEFAULT_PROFILE)
+
+
+@contextlib.contextmanager
+def resolution(profile):
+    # Per-part override: with resolution('draft'): ... or with resolution(Profile(...)): ...
+    profile_stack.append(named_profile(profile) if isinstance(profile, str) else profile)
+    try:
+        yield profile_stack[-1]
+    finally:
+        profile_stack.pop()
+
+
+def facets(radius, profile=None):
+    if profile is None:
+        profile = current_profile()
+    elif isinstance(profile, str):
+        profile = named_profile(profile)
+    segments = profile.min_segments
+    if radius > profile.chord_error:
+        by_error = math.pi / math.acos(1 - profile.chord_error / radius)
+        by_angle = 360 / profile.min_angle
+        by_size = 2 * math.pi * radius / profile.min_size
+        segments = max(math.ceil(min(by_error, by_angle, by_size)), segments)
+    # Multiples of four keep a vertex on each axis, so holes keep their nominal width.
+    return 4 * math.ceil(segments / 4)
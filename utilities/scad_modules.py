@@ -0,0 +1,131 @@
+import posixpath
+
+from solid import scad_render
+from solid.solidpython import indent
+
+from utilities.tree_utilities import (
+    call_node, copy_node, include_strings, multiplicities, nodes_with_holes, structural_keys, unique_nodes,
+)
+
+MODULE_PREFIX = 'subtree_'
+DEFAULT_MIN_NODES = 2
+LIBRARY_DIRECTORY = 'lib'
+FILE_NODES = ['import', 'surface']
+
+
+def module_name(key):
+    return MODULE_PREFIX + key[:10]
+
+
+def repeated_subtrees(root, min_nodes=DEFAULT_MIN_NODES):
+    # A subtree becomes a module when it appears at least twice and more often than the
+    # subtree around it; otherwise the enclosing module already covers the repetition.
+    order = unique_nodes(root)
+    keys = structural_keys(root, order)
+    counts = multiplicities(root, order)
+    holey = nodes_with_holes(order)
+    key_counts = {}
+    sizes = {}
+    for node in order:
+        key = keys[id(node)]
+        key_counts[key] = key_counts.get(key, 0) + counts[id(node)]
+        sizes[id(node)] = 1 + sum(sizes[id(child)] for child in node.children)
+    repeated = set()
+    for node in order:
+        for child in node.children:
+            child_key = keys[id(child)]
+            if id(child) in holey or sizes[id(child)] < min_nodes:
+                continue
+            if key_counts[child_key] >= 2 and key_counts[child_key] > key_counts[keys[id(node)]]:
+                repeated.add(child_key)
+    return order, keys, repeated
+
+
+def shared_subtrees(root, min_nodes=DEFAULT_MIN_NODES):
+    # Module names for the subtrees worth a library file: those repeated within root, as
+    # for render_with_modules, and part builder results (utilities/memoize.py names
+    # them), since other files probably hold the same part.
+    order, keys, repeated = repeated_subtrees(root, min_nodes)
+    holey = nodes_with_holes(order)
+    names = {key: module_name(key) for key in repeated}
+    sizes = {}
+    for node in order:
+        sizes[id(node)] = 1 + sum(sizes[id(child)] for child in node.children)
+        part = getattr(node, 'part_name', None)
+        if part and id(node) not in holey and sizes[id(node)] >= min_nodes:
+            names[keys[id(node)]] = f'{part}_{keys[id(node)][:10]}'
+    return order, keys, names
+
+
+def replace_subtrees(order, keys, names):
+    # Copy of the tree (the last node of order) with each named subtree replaced by a
+    # call to a module of that name, and the modules' bodies by name.
+    rebuilt = {}
+    modules = {}
+    for node in order:
+        children = []
+        for child in node.children:
+            name = names.get(keys[id(child)])
+            if name:
+                modules.setdefault(name, rebuilt[id(child)])
+                children.append(call_node(name))
+            else:
+                children.append(rebuilt[id(child)])
+        rebuilt[id(node)] = copy_node(node, children)
+    return rebuilt[id(order[-1])], modules
+
+
+def extract_modules(root, min_nodes=DEFAULT_MIN_NODES):
+    order, keys, repeated = repeated_subtrees(root, min_nodes)
+    return replace_subtrees(order, keys, {key: module_name(key) for key in repeated})
+
+
+def render_module(name, body):
+    return f'\nmodule {name}() {{{indent(body._render())}\n}}\n'
+
+
+def render_with_modules(thing, min_nodes=DEFAULT_MIN_NODES, file_header=''):
+    root, modules = extract_modules(thing, min_nodes)
+    includes = include_strings(thing) - include_strings(root)
+    definitions = ''.join(render_module(name, body) for name, body in modules.items())
+    return ''.join(sorted(includes)) + scad_render(root, file_header) + '\n' + definitions
+
+
+def called_modules(body, modules):
+    return sorted({node.name for node in unique_nodes(body) if node.name in modules})
+
+
+def use_lines(names, directory=''):
+    return ''.join(f'use <{directory}{name}.scad>\n' for name in names)
+
+
+def relocated(body, directory):
+    # Copy of body for a file in directory: relative paths in import() and surface() are
+    # resolved from the file that names them, so they must climb back out of it.
+    prefix = '../' * len([part for part in directory.split('/') if part])
+    rebuilt = {}
+    for node in unique_nodes(body):
+        children = [rebuilt[id(child)] for child in node.children]
+        path = node.params.get('file') if node.name in FILE_NODES else None
+        if prefix and isinstance(path, str) and not posixpath.isabs(path):
+            rebuilt[id(node)] = copy_node(node, children)
+            rebuilt[id(node)].params['file'] = prefix + path
+        elif any(new is not old for new, old in zip(children, node.children)):
+            rebuilt[id(node)] = copy_node(node, children)
+        else:
+            rebuilt[id(node)] = node
+    return rebuilt[id(body)]
+
+
+def render_with_library(thing, min_nodes=DEFAULT_MIN_NODES, directory=LIBRARY_DIRECTORY):
+    # The file's text, with its shared subtrees moved to library files it use<>s, and the
+    # library files' texts by filename.  Modules are named after their content, so the
+    # same part in different files ends up in the same library file.
+    order, keys, names = shared_subtrees(thing, min_nodes)
+    root, modules = replace_subtrees(order, keys, names)
+    libraries = {
+        name + '.scad': ''.join(sorted(include_strings(body))) + use_lines(called_modules(body, modules))
+        + render_module(name, relocated(body, directory))
+        for name, body in modules.items()
+    }
+    return use_lines(called_modules(root, modules), directory + '/') + scad_render(root), libraries
@@ -0,0 +1,96 @@
+import inspect
+import re
+
+# Typed builder parameters.  Designs annotate their builder's arguments with these types
+# and list named variants as argument dicts, which lets the command line build any
+# variant and override its arguments from text such as 3mm or 1/4in.  Lengths are in
+# mm and angles in degrees, as everywhere else.  Nothing here imports solid, so the
+# registry can use it while inspecting designs.
+
+# geoscad units in millimetres.
+UNITS = {
+    'mm': 1.0, 'cm': 10.0, 'inches': 25.4, 'Degrees': 1.0,
+    'nscale_feet': 12 * 25.4 / 160, 'nscale_inches': 25.4 / 160,
+}
+LENGTH_SUFFIXES = {'': 1.0, 'mm': 1.0, 'cm': 10.0, 'in': 25.4, 'inch': 25.4, 'inches': 25.4, '"': 25.4}
+NUMBER = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?:\s*/\s*(\d+\.?\d*))?\s*(\S*?)\s*$')
+TRUE = ['1', 'true', 'yes', 'on']
+FALSE = ['0', 'false', 'no', 'off']
+
+
+def number(text, suffixes):
+    match = NUMBER.match(text)
+    if not match or match.group(3).lower() not in suffixes:
+        units = ', '.join(sorted(suffix for suffix in suffixes if suffix.isalpha()))
+        raise ValueError(f'{text!r} is not a number' + (f' in {units}' if units else ''))
+    value = float(match.group(1))
+    if match.group(2):
+        value /= float(match.group(2))
+    return value * suffixes[match.group(3).lower()]
+
+
+class Length(float):
+    @staticmethod
+    def parse(text):
+        return number(text, LENGTH_SUFFIXES)
+
+
+class Angle(float):
+    @staticmethod
+    def parse(text):
+        return number(text, {'': 1.0, 'deg': 1.0, 'degrees': 1.0})
+
+
+class Count(int):
+    @staticmethod
+    def parse(text):
+        return int(text)
+
+
+class Flag(int):
+    @staticmethod
+    def parse(text):
+        if text.lower() not in TRUE + FALSE:
+            raise ValueError(f'{text!r} is not one of {", ".join(TRUE + FALSE)}')
+        return text.lower() in TRUE
+
+
+class Text(str):
+    @staticmethod
+    def parse(text):
+        return text
+
+
+TYPES = {kind.__name__: kind for kind in [Length, Angle, Count, Flag, Text]}
+# Unannotated arguments are parsed after their default's type.
+VALUE_TYPES = {bool: Flag, int: Count, float: Length, str: Text}
+
+
+def builder(function):
+    # Marks the function a design's VARIANTS are built with.
+    function.is_builder = True
+    return function
+
+
+def parameter_type(annotation, default=None):
+    if isinstance(annotation, str):
+        annotation = TYPES.get(annotation)
+    if annotation in TYPES.values():
+        return annotation
+    return VALUE_TYPES.get(type(default))
+
+
+def parse_overrides(function, overrides):
+    # Builder arguments from name=text overrides, skipping names the builder doesn't take.
+    arguments = {}
+    for name, parameter in inspect.signature(function).parameters.items():
+        if name in overrides:
+            default = None if parameter.default is inspect.Parameter.empty else parameter.default
+            kind = parameter_type(parameter.annotation, default)
+            if kind is None:
+                raise ValueError(f'{function.__name__}() argument {name} has no type to parse {overrides[name]!r} with')
+            try:
+                arguments[name] = kind.parse(overrides[name])
+            except ValueError as problem:
+                raise ValueError(f'{function.__name__}() argument {name}: {problem}') from None
+    return arguments
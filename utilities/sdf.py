@@ -0,0 +1,170 @@
+import numpy as np
+
+from utilities.bounds import bounds
+from utilities.flattening import flatten_booleans
+from utilities.matrices import node_matrix
+from utilities.patterns import expand_patterns
+from utilities.primitives import PASS_THROUGH, UnsupportedGeometry, radii
+from utilities.tree_utilities import unique_nodes
+
+# Signed distance evaluation of SolidPython trees over arrays of points: negative
+# inside, positive outside.  Distances are exact for primitives under rigid transforms;
+# under scaling they are scaled by the smallest stretch, which keeps them a lower bound
+# on the true distance, and booleans give the usual min/max bounds.
+
+CHUNK = 1 << 18
+
+
+def box_distance(points, low, high):
+    qx, qy, qz = [
+        np.abs(points[axis] - (low[axis] + high[axis]) / 2) - (high[axis] - low[axis]) / 2
+        for axis in range(3)
+    ]
+    outside = np.sqrt(np.maximum(qx, 0) ** 2 + np.maximum(qy, 0) ** 2 + np.maximum(qz, 0) ** 2)
+    return outside + np.minimum(np.maximum(np.maximum(qx, qy), qz), 0)
+
+
+def cone_distance(points, r1, r2, z_low, z_high):
+    # Capped cone about Z between z_low (radius r1) and z_high (radius r2).
+    half = (z_high - z_low) / 2
+    radial = np.hypot(points[0], points[1])
+    height = points[2] - (z_low + z_high) / 2
+    cap_radius = np.where(height < 0, r1, r2)
+    cap_x = radial - np.minimum(radial, cap_radius)
+    cap_y = np.abs(height) - half
+    k2x, k2y = r2 - r1, 2 * half
+    along = np.clip(((r2 - radial) * k2x + (half - height) * k2y) / max(k2x * k2x + k2y * k2y, 1e-300), 0, 1)
+    side_x = radial - r2 + k2x * along
+    side_y = height - half + k2y * along
+    sign = np.where((side_x < 0) & (cap_y < 0), -1, 1)
+    return sign * np.sqrt(np.minimum(cap_x * cap_x + cap_y * cap_y, side_x * side_x + side_y * side_y))
+
+
+def primitive(node):
+    params = node.params
+    if node.name == 'cube':
+        size = np.broadcast_to(np.array(params['size'] if params.get('size') is not None else 1, dtype=float), 3)
+        low = -size / 2 if params.get('center') else np.zeros(3)
+        return lambda points: box_distance(points, low, low + size)
+    if node.name == 'cylinder':
+        r1, r2 = radii(params)
+        height = params.get('h') if params.get('h') is not None else 1
+        z_low = -height / 2 if params.get('center') else 0
+        return lambda points: cone_distance(points, r1, r2, z_low, z_low + height)
+    if node.name == 'sphere':
+        radius = radii(params)[0]
+        return lambda points: np.sqrt(points[0] ** 2 + points[1] ** 2 + points[2] ** 2) - radius
+    return None
+
+
+def nothing(points):
+    return np.full(points.shape[1], np.inf)
+
+
+def transformed(function, matrix):
+    matrix = np.array(matrix, dtype=float)
+    inverse = np.linalg.inv(matrix)
+    rotation, offset = inverse[:3, :3], inverse[:3, 3:]
+    stretch = np.linalg.svd(matrix[:3, :3], compute_uv=False).min()
+    if abs(stretch - 1) < 1e-12:
+        return lambda points: function(rotation @ points + offset)
+    return lambda points: function(rotation @ points + offset) * stretch
+
+
+def combined(name, functions, boxes=None):
+    # Children are only evaluated at points where their bounding box says they could
+    # change the result; distance to a child's box never exceeds distance to the child,
+    # so the pruning is exact.
+    if not functions:
+        return nothing
+    if len(functions) == 1:
+        return functions[0]
+    if boxes is None:
+        boxes = [None] * len(functions)
+    if name == 'intersection':
+        return lambda points: np.max([function(points) for function in functions], axis=0)
+    if name == 'difference':
+        def difference(points):
+            result = functions[0](points)
+            for cut, box in zip(functions[1:], boxes[1:]):
+                near = needed(points, box, -result)
+                if near is None:
+                    result = np.maximum(result, -cut(points))
+                elif near.any():
+                    result[near] = np.maximum(result[near], -cut(points[:, near]))
+            return result
+        return difference
+
+    def union(points):
+        result = np.full(points.shape[1], np.inf)
+        for function, box in zip(functions, boxes):
+            near = needed(points, box, result)
+            if near is None:
+                result = np.minimum(result, function(points))
+            elif near.any():
+                result[near] = np.minimum(result[near], function(points[:, near]))
+        return result
+    return union
+
+
+def needed(points, box, threshold):
+    # Mask of points whose distance to box is below threshold, or None to use them all.
+    if box is None:
+        return None
+    if box.empty:
+        return np.zeros(points.shape[1], dtype=bool)
+    return box_distance(points, np.array(box.low, dtype=float), np.array(box.high, dtype=float)) < threshold
+
+
+def compile_tree(thing):
+    # Distance function for the whole tree.  Each node compiles to a (solid, holes) pair
+    # so SolidPython holes can be cut at part roots and at the top, as they are when
+    # rendered.  Shared subtrees are compiled once.
+    thing = flatten_booleans(expand_patterns(thing))
+    compiled = {}
+    boxes = {}
+    for node in unique_nodes(thing):
+        if node.modifier in ['%', '*']:
+            compiled[id(node)] = (nothing, None)
+            continue
+        solid = primitive(node)
+        holes = None
+        if solid is None:
+            matrix = node_matrix(node)
+            if node.name not in ['union', 'intersection', 'difference'] + PASS_THROUGH and matrix is None:
+                raise UnsupportedGeometry(f'{node.name}() has no signed distance')
+            children = [compiled[id(child)] for child in node.children]
+            solid = combined(
+                node.name,
+                [child_solid for child_solid, _ in children],
+                [bounds(child, boxes) for child in node.children],
+            )
+            child_holes = [child_holes for _, child_holes in children if child_holes is not None]
+            holes = combined('union', child_holes) if child_holes else None
+            if matrix is not None:
+                solid = transformed(solid, matrix)
+                holes = transformed(holes, matrix) if holes is not None else None
+        if node.is_hole:
+            solid, holes = nothing, solid if holes is None else combined('union', [solid, holes])
+        elif node.is_part_root and holes is not None:
+            solid, holes = combined('difference', [solid, holes]), None
+        compiled[id(node)] = (solid, holes)
+    solid, holes = compiled[id(thing)]
+    return solid if holes is None else combined('difference', [solid, holes])
+
+
+def chunked(function, points):
+    # Points arrive as (N, 3) but are evaluated as (3, N) so each coordinate is contiguous.
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    return np.concatenate([
+        function(np.ascontiguousarray(points[start:start + CHUNK].T))
+        for start in range(0, len(points), CHUNK)
+    ] or [np.zeros(0)])
+
+
+def signed_distance(thing, points):
+    return chunked(compile_tree(thing), points)
+
+
+def contains(thing, points):
+    return signed_distance(thing, points) <= 0
@@ -0,0 +1,317 @@
+import math
+import os
+import time
+import traceback
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utilities.bounds import bounds
+from utilities.build import design_outputs
+from utilities.primitives import UnsupportedGeometry
+from utilities.sdf import CHUNK, compile_tree
+
+# Layer cross-sections for slice previews.  The signed distance is sampled on an XY
+# node lattice at every layer's mid height, and marching squares turns sign changes
+# into closed polygons, outlines counter-clockwise and holes clockwise.  Node blocks
+# whose centre is further from the surface than their half diagonal are filled without
+# evaluating each node, and layers are done in batches of at most MAX_NODES nodes.
+# Parts needing more than MAX_LAYER_NODES per layer want a coarser pixel.
+
+DEFAULT_LAYER = 0.2  # mm
+DEFAULT_PIXEL = 0.2  # mm
+BLOCK = 32
+LEAF = 4
+MAX_NODES = 1 << 24
+MAX_LAYER_NODES = 1 << 22
+SVG_COLUMNS = 8
+SVG_TILE = 200  # px
+
+
+class Slices(NamedTuple):
+    # Polygon vertices for all layers, loop by loop: loop n is
+    # points[offsets[n]:offsets[n + 1]] and lies at heights[layers[n]].
+    heights: np.ndarray
+    points: np.ndarray
+    offsets: np.ndarray
+    layers: np.ndarray
+
+    def layer(self, index):
+        return [
+            self.points[start:stop]
+            for start, stop, layer in zip(self.offsets[:-1], self.offsets[1:], self.layers)
+            if layer == index
+        ]
+
+    def save(self, filename):
+        np.savez_compressed(filename, **self._asdict())
+
+
+class SliceResult(NamedTuple):
+    design: str
+    seconds: float
+    error: Optional[str] = None
+    # (output, layer count, problem) for each saved part
+    parts: Tuple[Tuple[str, int, Optional[str]], ...] = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def load_slices(filename):
+    with np.load(filename) as arrays:
+        return Slices(*(arrays[field] for field in Slices._fields))
+
+
+def cell_nodes(i, j, k, size, nx, ny):
+    # Node indices of the size x size cells with low corners (i, j) in layers k, and the
+    # cell each node belongs to.
+    offsets = np.indices((size, size)).reshape(2, -1)
+    node_i = (i[:, None] + offsets[0]).ravel()
+    node_j = (j[:, None] + offsets[1]).ravel()
+    node_k = np.repeat(k, size * size)
+    cell = np.repeat(np.arange(len(i)), size * size)
+    valid = (node_i < nx) & (node_j < ny)
+    return (node_i[valid], node_j[valid], node_k[valid]), cell[valid]
+
+
+def node_values(function, xs, ys, zs):
+    # Signed distance at every (x, y, z) node as float32, shape (len(xs), len(ys), len(zs)).
+    # Cells start at BLOCK x BLOCK nodes and are quartered while the surface may cross
+    # them; nodes of a settled cell take the cell centre's distance, whose sign is right,
+    # and only the sign matters away from the surface.
+    nx, ny, nz = len(xs), len(ys), len(zs)
+    values = np.empty((nx, ny, nz), dtype=np.float32)
+    i, j, k = [axis.ravel() for axis in np.meshgrid(
+        np.arange(0, nx, BLOCK), np.arange(0, ny, BLOCK), np.arange(nz), indexing='ij')]
+    size = BLOCK
+    while True:
+        last_i, last_j = np.minimum(i + size, nx) - 1, np.minimum(j + size, ny) - 1
+        centres = np.stack([(xs[i] + xs[last_i]) / 2, (ys[j] + ys[last_j]) / 2, zs[k]])
+        distances = np.concatenate([np.zeros(0)] + [
+            function(centres[:, start:start + CHUNK]) for start in range(0, centres.shape[1], CHUNK)
+        ])
+        settled = np.abs(distances) > np.hypot(xs[last_i] - xs[i], ys[last_j] - ys[j]) / 2
+        step = max(CHUNK // (size * size), 1)
+        for start in range(0, np.count_nonzero(settled), step):
+            cells = slice(start, start + step)
+            nodes, cell = cell_nodes(i[settled][cells], j[settled][cells], k[settled][cells], size, nx, ny)
+            values[nodes] = distances[settled][cells][cell]
+        i, j, k = i[~settled], j[~settled], k[~settled]
+        if size <= LEAF:
+            break
+        size //= 2
+        i, j, k = [
+            np.concatenate(parts) for parts in zip(*[
+                (i + di * size, j + dj * size, k) for di in (0, 1) for dj in (0, 1)
+            ])
+        ]
+        inside_grid = (i < nx) & (j < ny)
+        i, j, k = i[inside_grid], j[inside_grid], k[inside_grid]
+    for start in range(0, len(i), CHUNK // (LEAF * LEAF)):
+        cells = slice(start, start + CHUNK // (LEAF * LEAF))
+        nodes, _ = cell_nodes(i[cells], j[cells], k[cells], LEAF, nx, ny)
+        values[nodes] = function(np.stack([xs[nodes[0]], ys[nodes[1]], zs[nodes[2]]]))
+    return values
+
+
+def crossings(values):
+    # Marching squares over every cell of every layer at once.  Returns the start and end
+    # edge ids of each contour segment.  Edge ids encode
+    # (i, j, k, direction): direction 0 runs from node (i, j) to (i + 1, j), 1 to (i, j + 1).
+    nx, ny, nz = values.shape
+    inside = values <= 0
+    corners = np.stack([inside[:-1, :-1], inside[1:, :-1], inside[1:, 1:], inside[:-1, 1:]], axis=-1)
+    case = corners @ np.array([1, 2, 4, 8])
+    i, j, k = np.nonzero((case != 0) & (case != 15))
+    corners = corners[i, j, k]
+    case = case[i, j, k]
+    saddle = (case == 5) | (case == 10)
+    centre_inside = (values[i, j, k] + values[i + 1, j, k] + values[i + 1, j + 1, k] + values[i, j + 1, k]) <= 0
+
+    def edge_id(edge):
+        # Cell edges counter-clockwise: bottom, right, top, left.
+        edge_i = i + (edge == 1)
+        edge_j = j + (edge == 2)
+        return ((edge_i * ny + edge_j) * nz + k) * 2 + (edge % 2)
+
+    # Walking the cell counter-clockwise, the contour leaves through edges that go from
+    # inside to outside and comes back in through edges that go from outside to inside;
+    # following it from exit to entry keeps the material on the left.
+    exits = corners & ~np.roll(corners, -1, axis=1)
+    entries = ~corners & np.roll(corners, -1, axis=1)
+    only_entry = np.argmax(entries, axis=1)
+    starts, ends = [], []
+    for edge in range(4):
+        has_exit = exits[:, edge]
+        partner = np.where(saddle, np.where(centre_inside, (edge + 1) % 4, (edge + 3) % 4), only_entry)
+        starts.append(edge_id(np.full(len(i), edge))[has_exit])
+        ends.append(edge_id(partner)[has_exit])
+    return np.concatenate(starts), np.concatenate(ends)
+
+
+def edge_points(function, ids, shape, xs, ys, zs):
+    # Where the surface crosses each edge, interpolating distances evaluated afresh at
+    # the edge ends: the lattice only holds the right sign for nodes of settled cells.
+    nx, ny, nz = shape
+    direction = ids % 2
+    k = (ids // 2) % nz
+    j = (ids // 2 // nz) % ny
+    i = ids // 2 // nz // ny
+    first = np.stack([xs[i], ys[j], zs[k]])
+    second = np.stack([xs[i + 1 - direction], ys[j + direction], zs[k]])
+    first_distance, second_distance = [
+        np.concatenate([np.zeros(0)] + [function(ends[:, start:start + CHUNK]) for start in range(0, len(ids), CHUNK)])
+        for ends in (first, second)
+    ]
+    along = first_distance / (first_distance - second_distance)
+    return (first + along * (second - first))[:2].T, k
+
+
+def ordered_loops(starts, ends):
+    # Every edge id is the start of one segment and the end of another, so successors form
+    # a permutation whose cycles are the loops.  Cycles are labelled by their smallest
+    # member and ranked from it by pointer jumping.  Returns node order and loop labels.
+    order = np.argsort(starts)
+    nodes = starts[order]
+    successor = np.searchsorted(nodes, ends[order])
+    count = len(nodes)
+    label = np.arange(count)
+    jump = successor.copy()
+    for _ in range(max(count, 1).bit_length()):
+        label = np.minimum(label, label[jump])
+        jump = jump[jump]
+    # Cut each cycle just before its label, then rank by distance to the cut.
+    successor = np.where(successor == label, np.arange(count), successor)
+    distance = (successor != np.arange(count)).astype(np.int64)
+    for _ in range(max(count, 1).bit_length()):
+        distance = distance + distance[successor]
+        successor = successor[successor]
+    loop_order = np.lexsort((-distance, label))
+    return nodes[loop_order], label[loop_order]
+
+
+def loop_index(points, offsets):
+    return np.searchsorted(offsets, np.arange(len(points)), side='right') - 1
+
+
+def neighbours(points, offsets):
+    index = np.arange(len(points))
+    loop = loop_index(points, offsets)
+    previous = np.where(index == offsets[loop], offsets[loop + 1] - 1, index - 1)
+    following = np.where(index == offsets[loop + 1] - 1, offsets[loop], index + 1)
+    return previous, following
+
+
+def kept(points, offsets, keep):
+    counts = np.bincount(loop_index(points, offsets)[keep], minlength=len(offsets) - 1)
+    return points[keep], np.concatenate([[0], np.cumsum(counts)])
+
+
+def simplified(points, offsets, layers):
+    # Drop repeated vertices (where the surface passes through a node), then vertices
+    # lying on the straight line between their neighbours, then loops with no area left.
+    previous, _ = neighbours(points, offsets)
+    points, offsets = kept(points, offsets, np.any(points != points[previous], axis=1))
+    previous, following = neighbours(points, offsets)
+    a, b = points - points[previous], points[following] - points
+    area = np.abs(a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0])
+    points, offsets = kept(points, offsets, area > 1e-9 * np.hypot(*a.T) * np.hypot(*b.T))
+    loops = np.diff(offsets) >= 3
+    points, _ = kept(points, offsets, loops[loop_index(points, offsets)])
+    return points, np.concatenate([[0], np.cumsum(np.diff(offsets)[loops])]), layers[loops]
+
+
+def layer_heights(box, layer=DEFAULT_LAYER):
+    count = max(int(math.ceil((box.high[2] - box.low[2]) / layer - 1e-9)), 1)
+    return box.low[2] + (np.arange(count) + 0.5) * layer
+
+
+def cross_sections(thing, layer=DEFAULT_LAYER, pixel=DEFAULT_PIXEL, heights=None):
+    function = compile_tree(thing)
+    box = bounds(thing)
+    if box is None:
+        raise UnsupportedGeometry('no bounding box to slice')
+    if box.empty:
+        return Slices(np.zeros(0), np.zeros((0, 2)), np.zeros(1, dtype=int), np.zeros(0, dtype=int))
+    heights = layer_heights(box, layer) if heights is None else np.asarray(heights, dtype=float)
+    # One pixel of margin keeps the outermost nodes outside, so every loop closes.
+    xs = box.low[0] - pixel + np.arange(int(math.ceil(box.size[0] / pixel)) + 3) * pixel
+    ys = box.low[1] - pixel + np.arange(int(math.ceil(box.size[1] / pixel)) + 3) * pixel
+    if len(xs) * len(ys) > MAX_LAYER_NODES:
+        raise UnsupportedGeometry(
+            f'{len(xs) * len(ys)} nodes per layer needed at {pixel} mm, more than the limit of {MAX_LAYER_NODES}')
+    batch = MAX_NODES // (len(xs) * len(ys))
+    points, lengths, layers = [], [], []
+    for first in range(0, len(heights), batch):
+        values = node_values(function, xs, ys, heights[first:first + batch])
+        starts, ends = crossings(values)
+        nodes, labels = ordered_loops(starts, ends)
+        loop_points, loop_layers = edge_points(function, nodes, values.shape, xs, ys, heights[first:first + batch])
+        boundaries = np.nonzero(np.diff(labels, prepend=-1))[0]
+        points.append(loop_points)
+        lengths.append(np.diff(np.append(boundaries, len(nodes))))
+        layers.append(first + loop_layers[boundaries])
+    offsets = np.concatenate([[0], np.cumsum(np.concatenate(lengths))]).astype(np.int64)
+    return Slices(heights, *simplified(np.concatenate(points), offsets, np.concatenate(layers)))
+
+
+def write_svg(slices, filename, columns=SVG_COLUMNS, tile=SVG_TILE):
+    # Every layer as a tile of one SVG, first layer top left, material filled.
+    if len(slices.points):
+        low, high = slices.points.min(axis=0), slices.points.max(axis=0)
+    else:
+        low, high = np.zeros(2), np.ones(2)
+    scale = 0.9 * tile / max(high - low)
+    rows = max(int(math.ceil(len(slices.heights) / columns)), 1)
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{columns * tile}" height="{rows * tile}" '
+        f'font-family="sans-serif" font-size="{tile // 16}">'
+    ]
+    for index, height in enumerate(slices.heights):
+        x, y = index % columns * tile, index // columns * tile
+        # SVG y grows downwards.
+        path = ' '.join(
+            'M' + ' L'.join(f'{(px - low[0]) * scale:.2f},{(high[1] - py) * scale:.2f}' for px, py in loop) + ' Z'
+            for loop in slices.layer(index)
+        )
+        lines.append(f'<g transform="translate({x + 0.05 * tile:.1f},{y + 0.05 * tile:.1f})">')
+        lines.append(f'<path d="{path}" fill="#4a7fb5" fill-rule="evenodd" stroke="none"/>')
+        lines.append(f'<text x="0" y="{tile // 16}">{height:.2f}</text>')
+        lines.append('</g>')
+    lines.append('</svg>')
+    with open(filename, 'w') as output:
+        output.write('\n'.join(lines) + '\n')
+
+
+def slice_design(name, path, output_directory, layer=DEFAULT_LAYER, pixel=DEFAULT_PIXEL, formats=('svg',)):
+    start = time.perf_counter()
+    error = None
+    parts = []
+    try:
+        for output, thing in design_outputs(path):
+            stem = os.path.join(output_directory, os.path.splitext(output)[0])
+            try:
+                slices = cross_sections(thing, layer, pixel)
+            except UnsupportedGeometry as problem:
+                parts.append((output, 0, str(problem)))
+                continue
+            if 'svg' in formats:
+                write_svg(slices, stem + '.svg')
+            if 'npz' in formats:
+                slices.save(stem + '.npz')
+            parts.append((output, len(slices.heights), None))
+    except BaseException:
+        error = traceback.format_exc()
+    return SliceResult(name, time.perf_counter() - start, error, tuple(parts))
+
+
+def report_lines(result):
+    if not result.ok:
+        return [f'{result.design:50} FAILED: ' + result.error.strip().splitlines()[-1]]
+    lines = []
+    for output, layers, problem in result.parts:
+        label = f'{result.design}/{output}'
+        lines.append(f'{label:64} ' + (f'skipped: {problem}' if problem else f'{layers:5} layers'))
+    return lines
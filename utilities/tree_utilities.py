@@ -0,0 +1,89 @@
+import copy
+import hashlib
+
+from solid import OpenSCADObject
+from solid.solidpython import IncludedOpenSCADObject
+
+
+def unique_nodes(root):
+    # Post-order (children before parents) list of distinct node objects.  Builders reuse
+    # one object under several transforms, so the tree is really a DAG; walk it iteratively
+    # so long left-deep operator chains don't hit the recursion limit.
+    order = []
+    seen = set()
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        stack.append((node, True))
+        for child in reversed(node.children):
+            if id(child) not in seen:
+                stack.append((child, False))
+    return order
+
+
+def multiplicities(root, order=None):
+    # How many times each distinct node appears once the DAG is expanded into a tree.
+    if order is None:
+        order = unique_nodes(root)
+    counts = {id(node): 0 for node in order}
+    counts[id(root)] = 1
+    for node in reversed(order):
+        for child in node.children:
+            counts[id(child)] += counts[id(node)]
+    return counts
+
+
+def node_head(node):
+    head = node._render_str_no_children().strip()
+    if node.is_hole:
+        head = 'hole:' + head
+    if node.is_part_root:
+        head = 'part:' + head
+    return head
+
+
+def structural_keys(root, order=None):
+    if order is None:
+        order = unique_nodes(root)
+    keys = {}
+    for node in order:
+        text = node_head(node) + '{' + ','.join(keys[id(child)] for child in node.children) + '}'
+        keys[id(node)] = hashlib.sha1(text.encode()).hexdigest()
+    return keys
+
+
+def copy_node(node, children):
+    other = copy.copy(node)
+    other.params = dict(node.params)
+    other.children = []
+    other.parent = None
+    other.add(list(children))
+    return other
+
+
+def call_node(name):
+    return OpenSCADObject(name, {})
+
+
+def nodes_with_holes(order):
+    # Ids of nodes that are, or contain, SolidPython holes or part roots.  Those are
+    # rendered specially at the root, so they can't be moved around freely.
+    holey = set()
+    for node in order:
+        if node.is_hole or node.is_part_root or any(id(child) in holey for child in node.children):
+            holey.add(id(node))
+    return holey
+
+
+def include_strings(root):
+    return {
+        node.include_string
+        for node in unique_nodes(root)
+        if isinstance(node, IncludedOpenSCADObject)
+    }
@@ -0,0 +1,138 @@
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from utilities.bounds import bounds
+from utilities.primitives import UnsupportedGeometry
+from utilities.sdf import CHUNK, compile_tree
+
+# Voxel grids of a design, indexed [x, y, z], with voxel (i, j, k) filled when its centre
+# origin + (i + 0.5, j + 0.5, k + 0.5) * size is inside the part.  The grid is filled in
+# slabs BLOCK voxels thick along x, each cut into BLOCK^3 blocks.  A block whose centre's
+# signed distance is larger than its half diagonal is all inside or all outside and is
+# settled without evaluating its voxels; the rest are split octree fashion down to
+# LEAF^3 blocks, which are evaluated voxel by voxel.  Output can go to a .npy file
+# through a memory map, so grids larger than RAM only ever hold a slab's cells per worker.
+
+DEFAULT_VOXEL = 0.5  # mm
+BLOCK = 32
+LEAF = 4
+
+
+class Voxels(NamedTuple):
+    grid: np.ndarray
+    origin: Tuple[float, float, float]
+    size: float
+    filled: int
+
+    @property
+    def volume(self):
+        return self.filled * self.size ** 3
+
+
+def grid_shape(box, size):
+    return tuple(max(int(math.ceil(extent / size - 1e-9)), 1) for extent in box.size)
+
+
+def centres(origin, size, start, stop):
+    return origin + (np.arange(start, stop) + 0.5) * size
+
+
+def fill_slab(function, grid, origin, size, i, block=BLOCK):
+    # Fill the slab of blocks starting at x index i; returns the filled voxel count.
+    # Cells are [low, high) voxel index ranges, refined breadth first.
+    shape = np.array(grid.shape)
+    low = np.array([(i, j, k) for j in range(0, shape[1], block) for k in range(0, shape[2], block)])
+    high = np.minimum(low + block, shape)
+    filled = 0
+    while len(low):
+        distances = function((origin + (low + high) / 2 * size).T)
+        radii = size / 2 * np.linalg.norm(high - low - 1, axis=1)
+        for cell_low, cell_high in zip(low[distances < -radii], high[distances < -radii]):
+            grid[tuple(slice(a, b) for a, b in zip(cell_low, cell_high))] = 1
+            filled += int(np.prod(cell_high - cell_low))
+        mixed = np.abs(distances) <= radii
+        leaves = mixed & np.all(high - low <= LEAF, axis=1)
+        filled += fill_leaves(function, grid, origin, size, low[leaves], high[leaves])
+        low, high = split(low[mixed & ~leaves], high[mixed & ~leaves])
+    return filled
+
+
+def split(low, high):
+    # The up to eight children of each cell, halving every axis longer than a voxel.
+    middle = (low + high) // 2
+    children_low, children_high = [], []
+    for corner in np.ndindex(2, 2, 2):
+        upper = np.array(corner, dtype=bool)
+        children_low.append(np.where(upper, middle, low))
+        children_high.append(np.where(upper, high, middle))
+    low, high = np.concatenate(children_low), np.concatenate(children_high)
+    keep = np.all(low < high, axis=1)
+    return low[keep], high[keep]
+
+
+def fill_leaves(function, grid, origin, size, low, high):
+    filled = 0
+    offsets = np.indices((LEAF,) * 3).reshape(3, -1)[None]
+    for start in range(0, len(low), CHUNK // LEAF ** 3):
+        index = low[start:start + CHUNK // LEAF ** 3, :, None] + offsets
+        valid = np.all(index < high[start:start + CHUNK // LEAF ** 3, :, None], axis=1).ravel()
+        index = index.transpose(1, 0, 2).reshape(3, -1)[:, valid]
+        inside = function(origin[:, None] + (index + 0.5) * size) <= 0
+        grid[tuple(index[:, inside])] = 1
+        filled += int(np.count_nonzero(inside))
+    return filled
+
+
+worker_state = None
+
+
+def _initialize_worker(thing, filename, origin, size):
+    global worker_state
+    worker_state = compile_tree(thing), np.load(filename, mmap_mode='r+'), origin, size
+
+
+def _fill_worker_slab(i):
+    function, grid, origin, size = worker_state
+    filled = fill_slab(function, grid, origin, size, i)
+    grid.flush()
+    return filled
+
+
+def voxelize(thing, size=DEFAULT_VOXEL, filename=None, dtype=bool, jobs=None):
+    # Voxels of thing at size mm.  With a filename the grid is a memory-mapped .npy file,
+    # otherwise an in-memory array.
+    function = compile_tree(thing)
+    box = bounds(thing)
+    if box is None:
+        raise UnsupportedGeometry('no bounding box to voxelize in')
+    if box.empty:
+        return Voxels(np.zeros((0, 0, 0), dtype=dtype), (0.0, 0.0, 0.0), size, 0)
+    shape = grid_shape(box, size)
+    # Centre the grid on the part so it overhangs evenly on every side.
+    origin = tuple(float(c - n * size / 2) for c, n in zip(box.center, shape))
+    slabs = range(0, shape[0], BLOCK)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs == 1 or len(slabs) == 1:
+        if filename is None:
+            grid = np.zeros(shape, dtype=dtype)
+        else:
+            grid = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=shape)
+        filled = sum(fill_slab(function, grid, np.array(origin), size, i) for i in slabs)
+        return Voxels(grid, origin, size, filled)
+    if filename is None:
+        with tempfile.TemporaryDirectory() as scratch:
+            voxels = voxelize(thing, size, os.path.join(scratch, 'voxels.npy'), dtype, jobs)
+            return voxels._replace(grid=np.array(voxels.grid))
+    # A fresh .npy memmap is a sparse file of zeros, so empty blocks cost nothing.
+    np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=shape).flush()
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_initialize_worker, initargs=(thing, filename, np.array(origin), size),
+    ) as executor:
+        filled = sum(executor.map(_fill_worker_slab, slabs))
+    return Voxels(np.load(filename, mmap_mode='r+'), origin, size, filled)
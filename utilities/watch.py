@@ -0,0 +1,130 @@
+import ast
+import os
+import time
+
+from utilities.build import build_designs
+from utilities.registry import REPO_ROOT, discover_designs, select_designs
+
+# Rebuilds on change.  Every Python file in the repository is parsed for the repository
+# modules it imports, and a design is rebuilt when its own file or anything it imports,
+# directly or not, changes.  Sources are polled by modification time, so nothing beyond
+# the standard library is needed.  Rebuilds always run in fresh worker processes, so no
+# stale copy of an edited module is ever reused.
+
+DEFAULT_INTERVAL = 0.5  # seconds
+SKIPPED_DIRECTORIES = ['test']
+
+
+def source_files(root=REPO_ROOT):
+    files = []
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories[:] = sorted(
+            name for name in subdirectories
+            if not name.startswith('.') and name != '__pycache__'
+            and not (directory == str(root) and name in SKIPPED_DIRECTORIES)
+        )
+        files += [os.path.join(directory, name) for name in sorted(filenames) if name.endswith('.py')]
+    return files
+
+
+def module_name(path, root=REPO_ROOT):
+    parts = os.path.splitext(os.path.relpath(path, root))[0].split(os.sep)
+    return '.'.join(parts[:-1] if parts[-1] == '__init__' else parts)
+
+
+def imported_modules(path, root=REPO_ROOT):
+    # Dotted names of everything path imports, including the packages on the way to
+    # each module, since importing a.b.c runs a and a.b too.
+    with open(path) as source:
+        tree = ast.parse(source.read(), path)
+    package = module_name(path, root).split('.')
+    if not path.endswith('__init__.py'):
+        package = package[:-1]
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            targets = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base = '.'.join(package[:len(package) - node.level + 1] if node.level else [])
+            module = '.'.join(filter(None, [base, node.module or '']))
+            targets = [module] + [f'{module}.{alias.name}' for alias in node.names]
+        else:
+            continue
+        for target in targets:
+            parts = target.split('.')
+            names.update('.'.join(parts[:index]) for index in range(1, len(parts) + 1))
+    return names
+
+
+def import_graph(files, root=REPO_ROOT, graph=None):
+    # path -> paths of the repository modules it imports.  Pass the previous graph to
+    # only re-read some of the files.
+    modules = {module_name(path, root): path for path in files}
+    graph = dict(graph or {})
+    for path in files:
+        if path in graph:
+            continue
+        try:
+            names = imported_modules(path, root)
+        except (OSError, SyntaxError, ValueError):
+            names = set()
+        graph[path] = {modules[name] for name in names if name in modules and modules[name] != path}
+    return {path: graph[path] for path in files}
+
+
+def dependencies(graph, path):
+    seen, stack = set(), [path]
+    while stack:
+        for dependency in graph.get(stack.pop(), ()):
+            if dependency not in seen:
+                seen.add(dependency)
+                stack.append(dependency)
+    return seen
+
+
+def affected_designs(designs, graph, changed):
+    changed = set(changed)
+    return {
+        name: path for name, path in designs.items()
+        if path in changed or dependencies(graph, path) & changed
+    }
+
+
+def modification_times(files):
+    times = {}
+    for path in files:
+        try:
+            times[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+    return times
+
+
+def changed_files(before, after):
+    return {path for path in set(before) | set(after) if before.get(path) != after.get(path)}
+
+
+def watch(names, output_directory, jobs=None, interval=DEFAULT_INTERVAL, root=REPO_ROOT, initial=True, rounds=None):
+    # Yields (changed files, build results as they finish) for every rebuild, starting
+    # with a full build unless initial is false.  rounds limits the number of polls, for
+    # tests; otherwise this runs until interrupted.
+    files = source_files(root)
+    graph = import_graph(files, root)
+    times = modification_times(files)
+    designs = select_designs(discover_designs(root), names)
+    if initial:
+        yield set(), build_designs(designs, output_directory, jobs, root, isolated=True)
+    while rounds is None or rounds > 0:
+        if rounds is not None:
+            rounds -= 1
+        time.sleep(interval)
+        files = source_files(root)
+        current = modification_times(files)
+        changed = changed_files(times, current)
+        if not changed:
+            continue
+        times = current
+        graph = import_graph(files, root, {path: imports for path, imports in graph.items() if path not in changed})
+        designs = select_designs(discover_designs(root), names)
+        affected = affected_designs(designs, graph, changed)
+        yield changed, build_designs(affected, output_directory, jobs, root, isolated=True)
@@ -2,9 +2,12 @@ import math
 
 from geoscad.as_units import mm
 from geoscad.utilities import grounded_cube
-from solid import scad_render_to_file, rotate, cube, mirror, union
+from solid import rotate, cube, mirror, union
 from solid.utils import down, forward, back, up, right
 
+from utilities.file_utilities import save_variants
+from utilities.schema import builder
+
 WIDTH = 57 * mm
 HEIGHT = 10 * mm
 LENGTH = 68 * mm
@@ -25,6 +28,9 @@ END_RIDGE_W = 22 * mm
 SIDE_RIDGE_OFFSET = END_RIDGE_W + SIDE_RIDGE_THICKNESS - THICKNESS / 2
 RIDGE_X = [-0.5 * SIDE_RIDGE_OFFSET, 0.5 * SIDE_RIDGE_OFFSET]
 
+VARIANTS = {'bard_brick': dict()}
+
+@builder
 def bard_brick():
     double_thickness = 2 * THICKNESS
     base = basic_brick(WIDTH, LENGTH, HEIGHT)
@@ -59,7 +65,7 @@ def basic_brick(width, length, height):
 
 
 def main():
-    scad_render_to_file(bard_brick(), 'bard_brick.scad')
+    save_variants(bard_brick, VARIANTS)
 
 
 if __name__ == '__main__':
@@ -6,7 +6,11 @@ from geoscad.utilities import grounded_cube
 from solid import scad_render_to_file, cylinder, union, rotate, sphere, cube, mirror
 from solid.utils import up, right, forward, box_align, left, back, down
 
-from print3d.utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_as_scad, save_variants
+from utilities.memoize import part_builder
+from utilities.patterns import baked, polar_array
+from utilities.resolution import facets
+from utilities.schema import Flag, Length, builder
 
 USE_WOOD = True
 
@@ -73,16 +77,21 @@ INSERT_THICKNESS = TAB_WIDTH - 0.4 * mm
 INSERT_TAB_HEIGHT = INSERT_HEIGHT + DEFAULT_CONNECTOR_BLOCK_THICKNESS
 INSERT_TAB_LENGTH = TAB_LENGTH - 0.8 * mm
 INSERT_SIZES = ['cross', 'turnout_left', 'turnout_right', 'short', 'medium', 'long']
+CUBE_SIZE = (1 + 1 / 3) * inches
+
+VARIANTS = {
+    'circuit_board_for_turnout_left': dict(cube_size=CUBE_SIZE, left_hand=True),
+    'circuit_board_for_turnout_right': dict(cube_size=CUBE_SIZE, left_hand=False),
+}
 
 
 def main():
-    cube_size = (1 + 1 / 3) * inches
-    # create_all(cube_size)
-    save_as_scad(circuit_board_for_turnout(cube_size, True), 'circuit_board_for_turnout_left.scad')
-    save_as_scad(circuit_board_for_turnout(cube_size, False), 'circuit_board_for_turnout_right.scad')
+    # create_all(CUBE_SIZE)
+    save_variants(circuit_board_for_turnout, VARIANTS)
 
 
-def circuit_board_for_turnout(cube_size, left_hand):
+@builder
+def circuit_board_for_turnout(cube_size: Length, left_hand: Flag):
     led_lead_holes, led_pedastals = turnout_led_mount_holes(cube_size)
     button_holes = button_switch_mount_holes(cube_size)
     row_of_cable_holes = right(0.01 * inches)(union()(back( 0.35 * inches)(cable_holes(cube_size))))
@@ -95,7 +104,7 @@ def circuit_board_for_turnout(cube_size, left_hand):
     return whole
 
 def cable_holes(cube_size):
-    single_cable_hole = cylinder(r=LED_LEAD_DIAMETER/2, h=2*cube_size, center=True, segments=16)
+    single_cable_hole = cylinder(r=LED_LEAD_DIAMETER/2, h=2*cube_size, center=True, segments=facets(LED_LEAD_DIAMETER/2))
     return  left(0.4 * inches)([right(index * 0.2 * inches)(single_cable_hole) for index in range(5)])
 
 def circuit_board():
@@ -112,7 +121,7 @@ def turnout_led_mount_holes(cube_size):
         )
         for index in range(len(BUTTON_LED_Y_OFFSETS))
     ]
-    single_pedastal = cylinder(r=BUTTON_HOLE_DIAMETER/2, h=CIRCUIT_BOARD_TOTAL_THICKNESS, segments=16)
+    single_pedastal = cylinder(r=BUTTON_HOLE_DIAMETER/2, h=CIRCUIT_BOARD_TOTAL_THICKNESS, segments=facets(BUTTON_HOLE_DIAMETER/2))
     led_pedastals = [
         right(BUTTON_LED_X_OFFSETS[index])(
             forward(BUTTON_LED_Y_OFFSETS[index])(single_pedastal)
@@ -122,12 +131,12 @@ def turnout_led_mount_holes(cube_size):
     return (union()(led_lead_holes), union()(led_pedastals))
 
 def resistor_holes(cube_size):
-    one_hole = cylinder(r=LED_LEAD_DIAMETER / 2, h=cube_size, center=True, segments=16)
+    one_hole = cylinder(r=LED_LEAD_DIAMETER / 2, h=cube_size, center=True, segments=facets(LED_LEAD_DIAMETER / 2))
     resistor_holes = [right(x)(forward(y)(one_hole)) for (x, y) in RESISTOR_HOLE_OFFSETS]
     return union()(resistor_holes)
 
 def button_switch_mount_holes(cube_size, add_cleat=True):
-    single_lead_cylinder = cylinder(r=SWITCH_LEAD_DIAMETER / 2, h=cube_size, center=True, segments=16)
+    single_lead_cylinder = cylinder(r=SWITCH_LEAD_DIAMETER / 2, h=cube_size, center=True, segments=facets(SWITCH_LEAD_DIAMETER / 2))
     hole_displacement = 0.075 * inches
     lead_hole_pair = left(hole_displacement)(single_lead_cylinder) + right(hole_displacement)(single_lead_cylinder)
     lead_hole_pair = rotate(-45)(lead_hole_pair)
@@ -143,7 +152,7 @@ def button_switch_mount_holes(cube_size, add_cleat=True):
 
 
 def led_mount_holes(cube_size):
-    one_hole = cylinder(r=LED_LEAD_DIAMETER / 2, h=cube_size, center=True, segments=16)
+    one_hole = cylinder(r=LED_LEAD_DIAMETER / 2, h=cube_size, center=True, segments=facets(LED_LEAD_DIAMETER / 2))
     hole_displacement = 0.05 * inches
     return left(hole_displacement)(one_hole) + right(hole_displacement)(one_hole)
 
@@ -285,16 +294,10 @@ def edging(cube_size, thickness):
     )
     edging = right(cube_size / 2 - thickness / 2)(
         rotate(90, [0, 1, 0])(
-            union()([
-                rotate(45 * angle_index, [0, 0, 1])(edging_cube)
-                for angle_index in range(8)
-            ])
+            polar_array(8, 45)(edging_cube)
         )
     )
-    quad_edging = union()([
-        rotate(90 * index)(edging)
-        for index in range(4)
-    ])
+    quad_edging = polar_array(4, 90)(edging)
     return up(cube_size / 2)(quad_edging)
 
 
@@ -315,16 +318,16 @@ def block_led_holes(cube_size, led_offset):
 
 
 def led_hole(cube_size):
-    return cylinder(r=LED_HOLE_DIAMETER / 2, h=cube_size, center=True, segments=16)
+    return cylinder(r=LED_HOLE_DIAMETER / 2, h=cube_size, center=True, segments=facets(LED_HOLE_DIAMETER / 2))
 
 
 def toggle_switch_hole(cube_size):
-    main_hole = cylinder(r=SWITCH_HOLE_DIAMETER / 2, h=cube_size, center=True, segments=16)
+    main_hole = cylinder(r=SWITCH_HOLE_DIAMETER / 2, h=cube_size, center=True, segments=facets(SWITCH_HOLE_DIAMETER / 2))
     return main_hole + cleat_opening()
 
 
 def button_switch_holes(cube_size, add_cleat=True):
-    hole_cylinder = cylinder(r=BUTTON_HOLE_DIAMETER / 2, h=cube_size, center=True, segments=16)
+    hole_cylinder = cylinder(r=BUTTON_HOLE_DIAMETER / 2, h=cube_size, center=True, segments=facets(BUTTON_HOLE_DIAMETER / 2))
     cylinder_with_cleat = hole_cylinder + cleat_opening() if add_cleat else hole_cylinder
     button_holes = [
         right(BUTTON_HOLE_X_OFFSETS[index])(
@@ -343,6 +346,7 @@ def cleat_opening():
     )))
 
 
+@part_builder
 def grooves(cube_size, diagonal=False, doubled=False, turnout=False):
     groove = groove_cylinder(cube_size)
     if diagonal:
@@ -372,7 +376,7 @@ def grooves(cube_size, diagonal=False, doubled=False, turnout=False):
 
 def groove_cylinder(cube_size, round_groove=False):
     if round_groove:
-        target = cylinder(r=GROOVE_DIAMETER / 2, h=cube_size * 2.1, center=True, segments=16)
+        target = cylinder(r=GROOVE_DIAMETER / 2, h=cube_size * 2.1, center=True, segments=facets(GROOVE_DIAMETER / 2))
     else:
         target = cube([GROOVE_DIAMETER, GROOVE_DIAMETER, cube_size * 2.1], center=True)
     groove = rotate(90, [0, 1, 0])(target)
@@ -396,6 +400,7 @@ def peg_connector_block(
     )
 
 
+@part_builder
 def sphere_connector_block(
     width: float,
     paneling,
@@ -435,7 +440,7 @@ def connector_block(
     block = outer_cube
     if paneling != 'solid':
         block -= thumb_holes(width)
-        block += edging(width, thickness)
+        block += baked()(edging(width, thickness))
         if paneling is not None:
             assert paneling in ['thin', 'hatched', 'cutout']
             span = THUMB_HOLE_DIAMETER * math.cos(math.radians(22.5))
@@ -484,6 +489,7 @@ def octogonal_distance_squared(x, y):
     return max(OCTOGONAL_WEIGHT * diamond, square)
 
 
+@part_builder
 def connector_peg(
     peg_diameter: float = DEFAULT_PEG_DIAMETER,
     peg_length: Optional[float] = None,
@@ -491,26 +497,27 @@ def connector_peg(
 ):
     if peg_length is None:
         peg_length = peg_diameter
-    return cylinder(r=peg_diameter / 2, h=peg_length + thickness, center=False, segments=16)
+    return cylinder(r=peg_diameter / 2, h=peg_length + thickness, center=False, segments=facets(peg_diameter / 2))
 
 
 def peg_connector_hole(
     hole_diameter: float = DEFAULT_PEG_HOLE_DIAMETER,
     thickness: float = DEFAULT_CONNECTOR_BLOCK_THICKNESS
 ):
-    return cylinder(r=hole_diameter / 2, h=3 * thickness, center=True, segments=16)
+    return cylinder(r=hole_diameter / 2, h=3 * thickness, center=True, segments=facets(hole_diameter / 2))
 
 
+@part_builder
 def connector_sphere(
     diameter: float = DEFAULT_SPHERE_DIAMETER,
 ):
-    return sphere(r=diameter / 2, segments=16)
+    return sphere(r=diameter / 2, segments=facets(diameter / 2))
 
 
 def connector_sphere_hole(
     diameter: float = DEFAULT_SPHERE_HOLE_DIAMETER,
 ):
-    return sphere(r=diameter / 2, segments=16)
+    return sphere(r=diameter / 2, segments=facets(diameter / 2))
 
 
 def male_connectors(male_connector, connector_offset, width):
@@ -3,20 +3,28 @@ from geoscad.utilities import grounded_cube, rounded_platter
 from solid import scad_render_to_file, cylinder, union, cube, intersection, scale
 from solid.utils import forward, back, down, up, right, left, math, rotate
 
+from utilities.file_utilities import save_variants
+from utilities.resolution import facets
+from utilities.schema import Length, builder
+
+VARIANTS = {'coffee_cover': dict(diameter=95 * mm)}
 
 
 def main():
     # scad_render_to_file(battery_cup(), 'battery_cup.scad')
     # scad_render_to_file(coffee_cover(85 * mm), 'coffee_cover.scad')
-    scad_render_to_file(coffee_cover(95 * mm), 'coffee_cover.scad')
+    save_variants(coffee_cover, VARIANTS)
 
-def coffee_cover(diameter):
+@builder
+def coffee_cover(diameter: Length):
     height = 19 * mm
     thickness = 2 * mm
     notch = forward(diameter/2 - 5*mm)((up(height)(rotate([-90, 0, 0])(cylinder(r=12 * mm, h=10 * mm)))))
-    return cup(diameter, height, thickness, segments=96) - notch
+    return cup(diameter, height, thickness) - notch
 
-def cup(diameter, height, thickness, segments=32):
+def cup(diameter, height, thickness, segments=None):
+    if segments is None:
+        segments = facets(diameter / 2 + thickness)
     outer = cylinder(r=diameter/2 + thickness, h=height, segments=segments)
     inner = cylinder(r=diameter/2, h=height, segments=segments)
     return outer - up(thickness)(inner)
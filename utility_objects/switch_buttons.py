@@ -4,7 +4,8 @@ from geoscad.as_units import mm
 from solid import scad_render_to_file, cylinder, rotate
 from solid.utils import up
 
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.schema import builder
 
 BASE_DIAMETER = 10 * mm
 BASE_HEIGHT = 12 * mm
@@ -16,11 +17,14 @@ COLLAR_HEIGHT = HOLE_HEIGHT - 4.7 * mm
 COLLAR_DIAMETER = HOLE_DIAMETER - 0.8 * mm
 COLLAR_THICKNESS = 1 * mm
 
+VARIANTS = {'button_peaked': dict()}
+
 
 def main():
-    save_as_scad(peaked_button(), 'button_peaked.scad')
+    save_variants(peaked_button, VARIANTS)
 
 
+@builder
 def peaked_button():
     return up(BASE_HEIGHT + BASE_DIAMETER * math.sqrt(3) / 4)(rotate([180, 0, 0])(base() + ridge() - mounting_hole()))
 
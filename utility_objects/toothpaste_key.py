@@ -3,7 +3,10 @@ from geoscad.utilities import smudge
 from solid import cylinder, union, cube, text, linear_extrude, scale
 from solid.utils import forward, back, up, rotate
 
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.patterns import baked
+from utilities.resolution import facets
+from utilities.schema import builder
 
 DO_SMUDGE = True
 
@@ -22,15 +25,18 @@ KEY_HEIGHT = THICKNESS
 SMUDGE = 2 * mm
 LETTERING_RISE = 1 * mm
 
+VARIANTS = {'toothpaste_key': dict()}
+
 
 def main():
-    save_as_scad(toothpaste_key(), 'toothpaste_key.scad')
+    save_variants(toothpaste_key, VARIANTS)
 
 
+@builder
 def toothpaste_key():
     non_lettering = back(1 * mm)(key_shaft()) + key_handle()
     if DO_SMUDGE:
-        non_lettering = smudge(SMUDGE, non_lettering)
+        non_lettering = baked()(smudge(SMUDGE, non_lettering))
     key = up(THICKNESS / 2)(non_lettering + key_lettering())
     return rotate(-90, [0, 0, 1])(key)
 
@@ -39,13 +45,13 @@ def key_shaft():
     trunk_length = SHAFT_LENGTH - 0.5 * THICKNESS
     trunk = back(trunk_length / 2)(cube([THICKNESS, trunk_length, KEY_HEIGHT], center=True))
     slot = back(SLOT_LENGTH / 2)(cube([SLOT_WIDTH, SLOT_LENGTH, 2 * KEY_HEIGHT], center=True))
-    tip = cylinder(r=THICKNESS / 2, h=KEY_HEIGHT, center=True, segments=16)
+    tip = cylinder(r=THICKNESS / 2, h=KEY_HEIGHT, center=True, segments=facets(THICKNESS / 2))
     return forward(trunk_length)(trunk + tip - slot)
 
 
 def key_handle():
     radius = HANDLE_DIAMETER / 2
-    base = scale([1.5, 1.0, 1.0])(cylinder(r=radius, h=KEY_HEIGHT, center=True, segments=32))
+    base = scale([1.5, 1.0, 1.0])(cylinder(r=radius, h=KEY_HEIGHT, center=True, segments=facets(1.5 * radius)))
     return back(radius)(base)
 
 
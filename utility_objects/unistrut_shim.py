@@ -3,6 +3,9 @@ from geoscad.utilities import grounded_cube, rounded_platter
 from solid import scad_render_to_file, cylinder, union, cube, intersection
 from solid.utils import forward, back, down, up, right, left, math, rotate
 
+from utilities.file_utilities import save_variants
+from utilities.schema import Length, builder
+
 # X dimensions
 UNISTRUT_CHANNEL_WIDTH = 1.75 * inches
 UNISTRUT_CHANNEL_SLOT = 1.135 * inches
@@ -17,15 +20,13 @@ SHIM_LIST = [
     ('2_16', 2 / 16 * inches),
     ('4_16', 4 / 16 * inches),
 ]
+VARIANTS = {f'unistrut_shim_{label}': dict(thickness=thickness) for label, thickness in SHIM_LIST}
 
 def main():
-    for label, thickness in SHIM_LIST:
-        render_shim(label, thickness)
-
-def render_shim(label, thickness):
-    scad_render_to_file(unistrut_shim(thickness), f'unistrut_shim_{label}.scad')
+    save_variants(unistrut_shim, VARIANTS)
 
-def unistrut_shim(thickness, length=UNISTRUT_CHANNEL_WIDTH):
+@builder
+def unistrut_shim(thickness: Length, length: Length = UNISTRUT_CHANNEL_WIDTH):
     return up(length / 2)(bar(thickness, length) + v_channel(length) - left(thickness)( v_channel(length * 1.1)))
 
 def v_channel(length):
@@ -2,17 +2,24 @@ from geoscad.as_units import mm
 from solid import cylinder
 from solid.utils import down
 
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.resolution import facets
+from utilities.schema import Length, builder
+
+VARIANTS = {
+    'washer': dict(outer_diameter=10 * mm, inner_diameter=4 * mm, thickness=2.75 * mm),
+    'washer_small': dict(outer_diameter=6.4 * mm, inner_diameter=3.4 * mm, thickness=2 * mm),
+}
 
 
 def main():
-    save_as_scad(washer(10 * mm, 4 * mm, 2.75 * mm), 'washer.scad')
-    save_as_scad(washer(6.4 * mm, 3.4 * mm, 2 * mm), 'washer_small.scad')
+    save_variants(washer, VARIANTS)
 
 
-def washer(outer_diameter, inner_diameter, thickness):
-    return cylinder(r=outer_diameter / 2, h=thickness, segments=32) - down(thickness / 2)(
-        cylinder(r=inner_diameter / 2, h=2 * thickness, segments=32))
+@builder
+def washer(outer_diameter: Length, inner_diameter: Length, thickness: Length):
+    return cylinder(r=outer_diameter / 2, h=thickness, segments=facets(outer_diameter / 2)) - down(thickness / 2)(
+        cylinder(r=inner_diameter / 2, h=2 * thickness, segments=facets(inner_diameter / 2)))
 
 
 if __name__ == '__main__':
@@ -5,7 +5,9 @@ from geoscad.utilities import grounded_cube
 from solid import scad_render_to_file, cylinder, rotate, cube, mirror, multmatrix, scale
 from solid.utils import up, right, forward, left, back, union, down
 
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.resolution import facets
+from utilities.schema import builder
 
 FRAME_THICKNESS = 0.5 * inches
 BOTTOM_THICKNESS = 0.25 * inches
@@ -27,11 +29,14 @@ EXPLOSION_FACTOR = 5 * inches
 BOTTOM_CLEARANCE = 2 * 1.0 / 16 * inches
 
 measurements = {'transition': {'depth': TRANSITION_DEPTH / inches, 'radius': TRANSITION_RADIUS / inches}}
+VARIANTS = {'pantry_drawer': dict()}
+
 def main():
-    save_as_scad(display_drawer(), 'pantry_drawer.scad')
+    save_variants(display_drawer, VARIANTS)
     print(measurements)
 
 
+@builder
 def display_drawer():
     return assembled_drawer() + exploded_drawer()
 
@@ -92,7 +97,7 @@ def drawer_left(explode):
     upper_back_offset = lower_back_offset + (depth - upper_depth) / 2
     lower_section = back(lower_back_offset)(grounded_cube([FRAME_THICKNESS, depth, FRONT_HEIGHT]))
     upper_section = back(upper_back_offset)(grounded_cube([FRAME_THICKNESS, upper_depth, BACK_HEIGHT]))
-    roller = rotate(a=90, v=[0, 1, 0])(cylinder(r=TRANSITION_RADIUS, h=FRAME_THICKNESS, segments=32, center=True))
+    roller = rotate(a=90, v=[0, 1, 0])(cylinder(r=TRANSITION_RADIUS, h=FRAME_THICKNESS, segments=facets(TRANSITION_RADIUS), center=True))
     transition_offset = TRANSITION_DEPTH - DEPTH / 2
     rolldown = up(MIDDLE_HEIGHT)(back(transition_offset)(roller))
     filler_cube = back(transition_offset - TRANSITION_RADIUS)(
@@ -5,7 +5,9 @@ from geoscad.utilities import grounded_cube
 from solid import scad_render_to_file, cylinder, rotate, cube, mirror, multmatrix, scale
 from solid.utils import up, right, forward, left, back, union, down
 
-from utilities.file_utilities import save_as_scad
+from utilities.file_utilities import save_variants
+from utilities.resolution import facets
+from utilities.schema import Length, builder
 
 INFLATION_DEFAULT = 0.05 * mm
 PLATE_DIAMETER = 3.90 * inches
@@ -22,13 +24,17 @@ TAB_WIDTH = 1.64 * inches
 TAB_SINE = TAB_WIDTH / INNER_DIAMETER
 TAB_ANGLE = math.asin(TAB_SINE)
 
+# Openings from 1 to 2 inches in eighths.
+VARIANTS = {f'router_plate_{index}': dict(opening_diameter=index / 8 * inches) for index in range(8, 17)}
+
 
 def main():
-    for index in range(8, 17):
-        scad_file_name = f'router_plate_{index}.scad'
-        opening_diameter = index / 8
-        print(opening_diameter, scad_file_name)
-        save_as_scad(RouterPlate()(opening_diameter * inches), scad_file_name)
+    save_variants(router_plate, VARIANTS)
+
+
+@builder
+def router_plate(opening_diameter: Length, inflation: Length = INFLATION_DEFAULT):
+    return RouterPlate(inflation)(opening_diameter)
 
 
 class RouterPlate:
@@ -53,7 +59,7 @@ class RouterPlate:
                 r=radius - self.inflation,
                 h=thickness - 2 * self.inflation,
                 center=True,
-                segments=64
+                segments=facets(radius - self.inflation)
             ))
 
     def inner_cylinder(self):
@@ -62,7 +68,7 @@ class RouterPlate:
             r=INNER_DIAMETER / 2 - self.inflation,
             h=height,
             center=True,
-            segments=64
+            segments=facets(INNER_DIAMETER / 2 - self.inflation)
         ))
 
     def tab_cylinder(self):
@@ -71,7 +77,7 @@ class RouterPlate:
             r=TAB_DIAMETER / 2 - self.inflation,
             h=height,
             center=True,
-            segments=64
+            segments=facets(TAB_DIAMETER / 2 - self.inflation)
         ))
 
     def tabs(self):
@@ -102,7 +108,7 @@ class RouterPlate:
             r=opening_diameter/2 + self.inflation,
             h=PLATE_THICKNESS*2,
             center=True,
-            segments=64
+            segments=facets(opening_diameter/2 + self.inflation)
         )
 
     def tool_holes(self):
@@ -111,7 +117,7 @@ class RouterPlate:
             r=TOOL_HOLE_DIAMETER/2 + self.inflation,
             h=2 * PLATE_THICKNESS,
             center=True,
-            segments=32
+            segments=facets(TOOL_HOLE_DIAMETER/2 + self.inflation)
         )
         return left(offset)(hole) + right(offset)(hole)
 